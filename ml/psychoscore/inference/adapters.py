@@ -0,0 +1,271 @@
+"""
+PSYCHOSCORE LoRA Adapter Registry
+
+Serves many named LoRA adapters (e.g. one per genre) over a single copy
+of the base weights. Adapters live as subdirectories of an adapter
+directory and are loaded into the shared PeftModel on first use or via
+the hot-load endpoint. At most `max_resident` stay in memory; the least
+recently used is unloaded to make room.
+
+PEFT activates one adapter for the whole model, so requests for the
+same adapter run concurrently while a switch waits for in-flight
+decoding to finish. Once a switch is waiting, new requests for the
+active adapter queue behind it, so steady traffic for one adapter
+cannot starve the others. PEFT also rebinds and rewrites the model
+in place, so decode only with the model use() yields.
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Adapter names double as directory names, so keep them to a safe alphabet
+ADAPTER_NAME_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+_NAME = re.compile(ADAPTER_NAME_PATTERN)
+
+# Adapter name PEFT gives the checkpoint's own adapter (MODEL_PATH)
+DEFAULT_ADAPTER = "default"
+
+# Waiting key for load/unload, which need the model to themselves
+_EXCLUSIVE = object()
+
+
+class AdapterNotFound(KeyError):
+    """Requested adapter is neither resident nor in the adapter directory"""
+
+
+class AdapterRegistry:
+    """
+    Named adapters over one base model, with an LRU bound on residency.
+
+    Usage:
+        registry = AdapterRegistry(model, "adapters/", max_resident=4)
+        with registry.use("jazz") as model:
+            rows = decode_batch(model, ...)
+    """
+
+    def __init__(self,
+                 model,
+                 directory: Optional[str] = None,
+                 max_resident: int = 4,
+                 on_unload: Optional[Callable[[str], None]] = None):
+        self.model = model
+        self.directory = Path(directory) if directory else None
+        self.max_resident = max(1, max_resident)
+        self.on_unload = on_unload
+
+        # The checkpoint's own adapter stays loaded and serves requests without one
+        self._resident: "OrderedDict[str, None]" = OrderedDict()
+        self.default: Optional[str] = None
+        if hasattr(model, "peft_config") and DEFAULT_ADAPTER in model.peft_config:
+            self.default = DEFAULT_ADAPTER
+        self._active = self.default
+
+        self._cond = threading.Condition()
+        self._users = 0
+        # Callers waiting for their turn, by the adapter they want
+        self._waiting: Dict[object, int] = {}
+        self.loads = 0
+        self.unloads = 0
+        self.evictions = 0
+        self.switches = 0
+
+    @classmethod
+    def from_env(cls, model, on_unload: Optional[Callable[[str], None]] = None) -> Optional['AdapterRegistry']:
+        """Build from PSYCHOSCORE_ADAPTER_DIR / _ADAPTER_MAX_RESIDENT (None when no directory is set)"""
+        directory = os.environ.get("PSYCHOSCORE_ADAPTER_DIR") or None
+        if directory is None:
+            return None
+        max_resident = int(os.environ.get("PSYCHOSCORE_ADAPTER_MAX_RESIDENT", 4))
+        return cls(model, directory, max_resident=max_resident, on_unload=on_unload)
+
+    def available(self) -> List[str]:
+        """Adapters that can be used: resident ones plus those on disk"""
+        names = set(self._resident)
+        if self.default:
+            names.add(self.default)
+        if self.directory is not None and self.directory.is_dir():
+            names.update(
+                p.name for p in self.directory.iterdir()
+                if _NAME.match(p.name) and (p / "adapter_config.json").exists()
+            )
+        return sorted(names)
+
+    def resident(self) -> List[str]:
+        """Loaded adapters, least recently used first"""
+        with self._cond:
+            return list(self._resident)
+
+    def path(self, name: str) -> Path:
+        """
+        Directory of a named adapter.
+
+        Raises:
+            AdapterNotFound: for invalid names or adapters not on disk
+        """
+        if not _NAME.match(name) or self.directory is None:
+            raise AdapterNotFound(name)
+        path = self.directory / name
+        if not (path / "adapter_config.json").exists():
+            raise AdapterNotFound(name)
+        return path
+
+    def load(self, name: str) -> bool:
+        """
+        Make an adapter resident (hot load). Returns False if it already was.
+
+        Raises:
+            AdapterNotFound: if the adapter does not exist
+        """
+        with self._exclusive():
+            if name == self.default or name in self._resident:
+                self._touch(name)
+                return False
+            self._load(name)
+            return True
+
+    def unload(self, name: str):
+        """
+        Drop a resident adapter and free its weights.
+
+        Raises:
+            AdapterNotFound: if the adapter is not resident
+            ValueError: for the checkpoint's own adapter
+        """
+        if name == self.default:
+            raise ValueError(f"'{name}' is the checkpoint adapter and cannot be unloaded")
+        with self._exclusive():
+            if name not in self._resident:
+                raise AdapterNotFound(name)
+            self._unload(name)
+            self.unloads += 1
+
+    @contextmanager
+    def use(self, name: Optional[str] = None) -> Iterator:
+        """
+        Run with `name` active (None: the checkpoint adapter, or the bare base).
+
+        Loads the adapter if needed. Yields the model to call.
+
+        Raises:
+            AdapterNotFound: if the adapter does not exist
+        """
+        name = name or self.default
+        with self._cond:
+            self._wait(name, lambda: (
+                (self._users and self._active != name)
+                or (self._active == name and self._others_waiting(name))
+            ))
+            if self._active != name:
+                if name is not None and name != self.default and name not in self._resident:
+                    self._load(name)
+                self._activate(name)
+                self.switches += 1
+            self._touch(name)
+            self._users += 1
+        try:
+            yield self.model
+        finally:
+            with self._cond:
+                self._users -= 1
+                if not self._users:
+                    self._cond.notify_all()
+
+    def stats(self) -> Dict[str, object]:
+        """Residency and churn"""
+        with self._cond:
+            return {
+                "active": self._active,
+                "default": self.default,
+                "resident": list(self._resident),
+                "max_resident": self.max_resident,
+                "in_use": self._users,
+                "waiting": sum(self._waiting.values()),
+                "loads": self.loads,
+                "unloads": self.unloads,
+                "evictions": self.evictions,
+                "switches": self.switches,
+            }
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the registry with no decoding in flight"""
+        with self._cond:
+            self._wait(_EXCLUSIVE, lambda: self._users)
+            yield
+
+    def _others_waiting(self, name: Optional[str]) -> bool:
+        return any(key != name for key in self._waiting)
+
+    def _wait(self, key: object, blocked: Callable[[], bool]):
+        """Wait until `blocked()` is false, counted as waiting for `key` (lock held)"""
+        if not blocked():
+            return
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            while blocked():
+                self._cond.wait()
+        finally:
+            self._waiting[key] -= 1
+            if not self._waiting[key]:
+                del self._waiting[key]
+            # Requests held back for this waiter may go now
+            self._cond.notify_all()
+
+    def _touch(self, name: Optional[str]):
+        if name in self._resident:
+            self._resident.move_to_end(name)
+
+    def _load(self, name: str):
+        """Load into the shared model, evicting the LRU adapter if over budget (lock held)"""
+        path = self.path(name)
+        while len(self._resident) >= self.max_resident:
+            evicted = next(iter(self._resident))
+            logger.info(f"Evicting LoRA adapter '{evicted}'")
+            self._unload(evicted)
+            self.evictions += 1
+
+        logger.info(f"Loading LoRA adapter '{name}' from {path}")
+        if hasattr(self.model, "load_adapter") and hasattr(self.model, "peft_config"):
+            self.model.load_adapter(str(path), adapter_name=name)
+        else:
+            from peft import PeftModel
+            self.model = PeftModel.from_pretrained(self.model, str(path), adapter_name=name)
+            self.model.eval()
+        self._resident[name] = None
+        self.loads += 1
+        # Injected layers start in PEFT's default state; restore the active one
+        self._activate(self._active)
+
+    def _unload(self, name: str):
+        """Delete an adapter's weights from the model (lock held)"""
+        del self._resident[name]
+        if not self._resident and self.default is None:
+            # PEFT cannot run with zero adapters: strip the LoRA layers entirely
+            self.model = self.model.unload()
+            self._active = None
+        else:
+            if self._active == name:
+                self._activate(self.default)
+            self.model.delete_adapter(name)
+        if self.on_unload is not None:
+            self.on_unload(name)
+
+    def _activate(self, name: Optional[str]):
+        """Switch the model's active adapter; None runs the bare base weights (lock held)"""
+        if not hasattr(self.model, "peft_config"):
+            self._active = None
+            return
+        if name is None:
+            self.model.base_model.disable_adapter_layers()
+        else:
+            self.model.base_model.enable_adapter_layers()
+            self.model.set_adapter(name)
+        self._active = name
@@ -0,0 +1,184 @@
+"""
+PSYCHOSCORE Micro-Batching Scheduler
+
+Collects concurrent model-backed generation requests for a short window
+(or until the batch is full) and decodes them as one left-padded batch
+on the generation pool. Each request keeps its own temperature, top-p,
+length and seed; results are scattered back to the waiting callers.
+Requests for different LoRA adapters never share a batch.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from inference.worker_pool import GenerationPool, PoolSaturated
+
+logger = logging.getLogger(__name__)
+
+
+# Batch function: (prefixes, temperatures, top_ps, max_new_tokens, seeds, adapter) -> one result per row
+BatchFn = Callable[[List[List[int]], List[float], List[float], List[int], List[Optional[int]], Optional[str]], Sequence]
+
+
+@dataclass
+class BatchConfig:
+    """Micro-batching settings (overridable via environment variables)"""
+    max_size: int = 8             # Requests decoded together
+    max_wait_ms: float = 5.0      # Collection window after the first request
+    max_pending: int = 64         # Requests waiting to join a batch
+
+    @classmethod
+    def from_env(cls) -> 'BatchConfig':
+        """Read PSYCHOSCORE_BATCH_* environment variables"""
+        return cls(
+            max_size=int(os.environ.get("PSYCHOSCORE_BATCH_MAX_SIZE", cls.max_size)),
+            max_wait_ms=float(os.environ.get("PSYCHOSCORE_BATCH_MAX_WAIT_MS", cls.max_wait_ms)),
+            max_pending=int(os.environ.get("PSYCHOSCORE_BATCH_MAX_PENDING", cls.max_pending)),
+        )
+
+
+@dataclass
+class _Pending:
+    prefix: List[int]
+    temperature: float
+    top_p: float
+    max_new_tokens: int
+    seed: Optional[int]
+    adapter: Optional[str]
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    """
+    Groups requests arriving within `max_wait_ms` into one decode call.
+
+    Batches are dispatched to the GenerationPool as single work items, so
+    pool admission, timeouts and saturation behave exactly as for
+    unbatched generation. While one batch decodes, the next is collected.
+
+    Usage:
+        batcher = MicroBatcher(inference.generate_batch, pool, BatchConfig())
+        batcher.start()
+        midi = await batcher.submit(prefix, temperature=0.8, top_p=0.9, max_new_tokens=512)
+    """
+
+    def __init__(self, batch_fn: BatchFn, pool: GenerationPool, config: Optional[BatchConfig] = None):
+        self.batch_fn = batch_fn
+        self.pool = pool
+        self.config = config or BatchConfig()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        """Start the collector task on the running event loop"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.config.max_pending)
+        self._task = asyncio.get_running_loop().create_task(self._collect())
+        logger.info(
+            f"Micro-batching: up to {self.config.max_size} requests "
+            f"within {self.config.max_wait_ms:.1f}ms"
+        )
+
+    async def stop(self):
+        """Stop collecting and fail anything still waiting"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if not item.future.done():
+                item.future.set_exception(RuntimeError("Batcher stopped"))
+
+    def stats(self) -> dict:
+        """Queue depth and average batch size"""
+        return {
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+    async def submit(self,
+                     prefix: List[int],
+                     temperature: float,
+                     top_p: float,
+                     max_new_tokens: int,
+                     seed: Optional[int] = None,
+                     adapter: Optional[str] = None):
+        """
+        Queue one request and await its row of the batch result.
+
+        Raises:
+            PoolSaturated: if too many requests are already waiting
+        """
+        if self._task is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(_Pending(list(prefix), temperature, top_p, max_new_tokens, seed, adapter, future))
+        except asyncio.QueueFull:
+            raise PoolSaturated(self.pool.config.retry_after)
+        return await future
+
+    async def _collect(self):
+        """Form batches: block for the first item, then fill until full or the window closes"""
+        loop = asyncio.get_running_loop()
+        window = self.config.max_wait_ms / 1000.0
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + window
+            while len(batch) < self.config.max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that gave up while waiting don't need decoding
+            batch = [item for item in batch if not item.future.done()]
+            groups = {}
+            for item in batch:
+                groups.setdefault(item.adapter, []).append(item)
+            for adapter, group in groups.items():
+                task = loop.create_task(self._dispatch(group, adapter))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[_Pending], adapter: Optional[str] = None):
+        """Run one batch on the pool and scatter rows to their futures"""
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.pool.run(
+                self.batch_fn,
+                [item.prefix for item in batch],
+                [item.temperature for item in batch],
+                [item.top_p for item in batch],
+                [item.max_new_tokens for item in batch],
+                [item.seed for item in batch],
+                adapter,
+            )
+        except BaseException as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for item, result in zip(batch, results):
+            if not item.future.done():
+                item.future.set_result(result)
@@ -0,0 +1,309 @@
+"""
+PSYCHOSCORE Batched Decoding
+
+Batched autoregressive sampling for the model-backed generation path.
+Rows are left-padded psychometric prefixes; every row carries its own
+temperature and top-p so unrelated requests can share one forward pass.
+
+With a PrefixKVCache, each distinct prefix is encoded once and its
+key/value state is reused: cached states are left-padded and stacked
+into the batch cache, and decoding starts right after the prefix.
+"""
+
+import inspect
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import torch
+
+from inference.prefix_cache import LayerKV, PrefixKVCache, PrefixState
+from inference.runtime import model_device
+
+
+# Optional hook applied to next-token logits: (generated_ids, logits) -> logits
+LogitsHook = Callable[[torch.Tensor, torch.Tensor], torch.Tensor]
+
+
+def left_pad(
+    prefixes: Sequence[Sequence[int]],
+    pad_id: int,
+    device: Optional[torch.device] = None,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Left-pad token sequences into a batch.
+
+    Returns:
+        (input_ids, attention_mask), both shaped (B, max_len)
+    """
+    max_len = max(len(p) for p in prefixes)
+    input_ids = torch.full((len(prefixes), max_len), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(prefixes), max_len), dtype=torch.long)
+    for row, prefix in enumerate(prefixes):
+        if prefix:
+            input_ids[row, max_len - len(prefix):] = torch.as_tensor(prefix, dtype=torch.long)
+            attention_mask[row, max_len - len(prefix):] = 1
+    return input_ids.to(device), attention_mask.to(device)
+
+
+def sampling_probs(
+    logits: torch.Tensor,
+    temperatures: torch.Tensor,
+    top_ps: torch.Tensor,
+) -> torch.Tensor:
+    """
+    Per-row temperature scaling and nucleus (top-p) filtering.
+
+    Args:
+        logits: (B, V) next-token logits
+        temperatures: (B,) temperature per row
+        top_ps: (B,) nucleus mass per row
+
+    Returns:
+        (B, V) normalized sampling distribution
+    """
+    probs = torch.softmax(logits.float() / temperatures[:, None], dim=-1)
+    sorted_probs, sorted_idx = torch.sort(probs, dim=-1, descending=True)
+    # Drop tokens once the mass before them already exceeds top_p (keeps >= 1)
+    mass_before = torch.cumsum(sorted_probs, dim=-1) - sorted_probs
+    sorted_probs = sorted_probs.masked_fill(mass_before > top_ps[:, None], 0.0)
+    probs = torch.zeros_like(probs).scatter_(-1, sorted_idx, sorted_probs)
+    return probs / probs.sum(dim=-1, keepdim=True)
+
+
+def _accepts(model, name: str) -> bool:
+    """Whether model.forward takes a given keyword argument (PEFT wrappers pass kwargs through)"""
+    if hasattr(model, "get_base_model"):
+        model = model.get_base_model()
+    try:
+        return name in inspect.signature(model.forward).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def cache_to_layers(past) -> LayerKV:
+    """Per-layer (key, value) tensors from a model's past_key_values"""
+    if hasattr(past, "layers"):
+        return tuple((layer.keys, layer.values) for layer in past.layers)
+    if hasattr(past, "to_legacy_cache"):
+        return past.to_legacy_cache()
+    return tuple((key, value) for key, value in past)
+
+
+def layers_to_cache(kv: LayerKV):
+    """past_key_values object the model accepts for per-layer tensors"""
+    try:
+        from transformers import DynamicCache
+    except ImportError:
+        return kv
+    if hasattr(DynamicCache, "from_legacy_cache"):
+        return DynamicCache.from_legacy_cache(kv)
+    return DynamicCache(kv)
+
+
+@torch.no_grad()
+def encode_prefix_state(model, prefix: Sequence[int]) -> PrefixState:
+    """Run one unpadded prefix through the model and capture its state"""
+    device = model_device(model)
+    input_ids = torch.as_tensor([list(prefix)], dtype=torch.long, device=device)
+    out = model(input_ids=input_ids, use_cache=True)
+    return PrefixState(
+        kv=cache_to_layers(out.past_key_values),
+        logits=out.logits[0, -1, :],
+        length=len(prefix),
+    )
+
+
+def _prefill(model, prefixes, pad_id, use_positions):
+    """Encode the padded batch; returns (logits, past, attention_mask, next_position)"""
+    device = model_device(model)
+    input_ids, attention_mask = left_pad(prefixes, pad_id, device)
+    position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+
+    kwargs = dict(input_ids=input_ids, attention_mask=attention_mask, use_cache=True)
+    if use_positions:
+        kwargs["position_ids"] = position_ids
+    out = model(**kwargs)
+    return out.logits[:, -1, :], out.past_key_values, attention_mask, position_ids[:, -1:] + 1
+
+
+def _prefill_cached(model, prefixes, cache: PrefixKVCache):
+    """Stack cached (or freshly encoded) prefix states into a left-padded batch cache"""
+    states = {}
+    for prefix in prefixes:
+        key = tuple(prefix)
+        if key in states:
+            continue
+        state = cache.get(key)
+        if state is None:
+            state = encode_prefix_state(model, key)
+            cache.put(key, state)
+        states[key] = state
+    rows = [states[tuple(prefix)] for prefix in prefixes]
+
+    device = rows[0].logits.device
+    max_len = max(row.length for row in rows)
+    attention_mask = torch.zeros((len(rows), max_len), dtype=torch.long, device=device)
+    for i, row in enumerate(rows):
+        attention_mask[i, max_len - row.length:] = 1
+
+    layers = []
+    for layer in range(len(rows[0].kv)):
+        keys, values = [], []
+        for row in rows:
+            key, value = row.kv[layer]
+            pad = max_len - row.length
+            keys.append(torch.nn.functional.pad(key, (0, 0, pad, 0)))
+            values.append(torch.nn.functional.pad(value, (0, 0, pad, 0)))
+        layers.append((torch.cat(keys, dim=0), torch.cat(values, dim=0)))
+
+    logits = torch.stack([row.logits for row in rows])
+    next_position = torch.tensor([[row.length] for row in rows], dtype=torch.long, device=device)
+    return logits, layers_to_cache(tuple(layers)), attention_mask, next_position
+
+
+def _sample(probs: torch.Tensor, generators) -> torch.Tensor:
+    """Draw one token per row, using each row's own RNG when given"""
+    if generators is None:
+        return torch.multinomial(probs, 1).squeeze(1)
+    return torch.cat([
+        torch.multinomial(probs[row:row + 1], 1, generator=generator).view(1)
+        for row, generator in enumerate(generators)
+    ])
+
+
+@torch.no_grad()
+def decode_steps(
+    model,
+    prefixes: Sequence[Sequence[int]],
+    temperatures: Sequence[float],
+    top_ps: Sequence[float],
+    max_new_tokens: int,
+    pad_id: int,
+    eos_id: Optional[int] = None,
+    logits_hook: Optional[LogitsHook] = None,
+    generators: Optional[Sequence[Optional[torch.Generator]]] = None,
+    prefix_cache: Optional[PrefixKVCache] = None,
+) -> Iterator[torch.Tensor]:
+    """
+    Sample a batch in lock-step, yielding each step's tokens as soon as
+    they are drawn.
+
+    Arguments are those of decode_batch(). Yields (B,) tensors; finished
+    rows yield pad_id. Stops once every row has produced eos_id.
+    """
+    device = model_device(model)
+    batch = len(prefixes)
+
+    temps = torch.as_tensor(temperatures, dtype=torch.float32, device=device)
+    tops = torch.as_tensor(top_ps, dtype=torch.float32, device=device)
+
+    use_positions = _accepts(model, "position_ids")
+    if prefix_cache is not None:
+        logits, past, attention_mask, next_position = _prefill_cached(model, prefixes, prefix_cache)
+    else:
+        logits, past, attention_mask, next_position = _prefill(model, prefixes, pad_id, use_positions)
+
+    generated = torch.empty((batch, 0), dtype=torch.long, device=device)
+    finished = torch.zeros(batch, dtype=torch.bool, device=device)
+
+    for step in range(max_new_tokens):
+        if logits_hook is not None:
+            logits = logits_hook(generated, logits)
+
+        probs = sampling_probs(logits, temps, tops)
+        next_tokens = _sample(probs, generators)
+        next_tokens = torch.where(finished, torch.full_like(next_tokens, pad_id), next_tokens)
+        generated = torch.cat([generated, next_tokens[:, None]], dim=1)
+        yield next_tokens
+
+        if eos_id is not None:
+            finished |= next_tokens == eos_id
+        if finished.all() or step == max_new_tokens - 1:
+            break
+
+        attention_mask = torch.cat([attention_mask, torch.ones((batch, 1), dtype=attention_mask.dtype, device=device)], dim=1)
+        kwargs = dict(
+            input_ids=next_tokens[:, None],
+            attention_mask=attention_mask,
+            past_key_values=past,
+            use_cache=True,
+        )
+        if use_positions:
+            kwargs["position_ids"] = next_position
+            next_position = next_position + 1
+        out = model(**kwargs)
+        logits, past = out.logits[:, -1, :], out.past_key_values
+
+
+def decode_batch(
+    model,
+    prefixes: Sequence[Sequence[int]],
+    temperatures: Sequence[float],
+    top_ps: Sequence[float],
+    max_new_tokens: int,
+    pad_id: int,
+    eos_id: Optional[int] = None,
+    logits_hook: Optional[LogitsHook] = None,
+    generators: Optional[Sequence[Optional[torch.Generator]]] = None,
+    prefix_cache: Optional[PrefixKVCache] = None,
+) -> List[List[int]]:
+    """
+    Sample continuations for a batch of prefixes in lock-step.
+
+    Args:
+        model: HuggingFace causal LM
+        prefixes: Token IDs per row (left-padded internally)
+        temperatures: Sampling temperature per row
+        top_ps: Nucleus mass per row
+        max_new_tokens: Decoding steps
+        pad_id: Padding token ID
+        eos_id: Rows stop after sampling this token
+        logits_hook: Optional logits processor
+        generators: Optional per-row torch RNGs; a seeded row samples the
+            same tokens whatever else shares its batch
+        prefix_cache: Optional cache of encoded prefix states
+
+    Returns:
+        Generated token IDs per row (prefix and padding excluded)
+    """
+    steps = list(decode_steps(
+        model, prefixes, temperatures, top_ps, max_new_tokens, pad_id,
+        eos_id=eos_id,
+        logits_hook=logits_hook,
+        generators=generators,
+        prefix_cache=prefix_cache,
+    ))
+    if not steps:
+        return [[] for _ in prefixes]
+
+    results = []
+    for row in torch.stack(steps, dim=1).tolist():
+        if eos_id is not None and eos_id in row:
+            row = row[:row.index(eos_id)]
+        results.append(row)
+    return results
+
+
+def iter_decode(
+    model,
+    prefix: Sequence[int],
+    temperature: float,
+    top_p: float,
+    max_new_tokens: int,
+    pad_id: int,
+    eos_id: Optional[int] = None,
+    logits_hook: Optional[LogitsHook] = None,
+    generator: Optional[torch.Generator] = None,
+    prefix_cache: Optional[PrefixKVCache] = None,
+) -> Iterator[int]:
+    """Sample one prefix token by token (EOS not included), for streaming"""
+    for tokens in decode_steps(
+        model, [prefix], [temperature], [top_p], max_new_tokens, pad_id,
+        eos_id=eos_id,
+        logits_hook=logits_hook,
+        generators=[generator] if generator is not None else None,
+        prefix_cache=prefix_cache,
+    ):
+        token = int(tokens[0])
+        if token == eos_id:
+            return
+        yield token
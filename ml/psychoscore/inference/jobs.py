@@ -0,0 +1,338 @@
+"""
+PSYCHOSCORE Job Store
+
+Asynchronous jobs for generations too long for one HTTP request. Jobs
+live in a SQLite table next to a results directory, so queued work and
+finished results survive restarts; a job that was running when its
+process died is queued again on the next start.
+
+Runners claim the oldest queued job in a write transaction, so several
+pre-forked workers can share one store without running a job twice.
+Results are written to a file (write-then-rename) and served from disk.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+RESULT_SUFFIXES = {"audio/midi": ".mid", "application/zip": ".zip"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    request TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker INTEGER,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    error TEXT,
+    result TEXT,
+    media_type TEXT,
+    bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+"""
+
+_COLUMNS = "id, kind, status, worker, created, started, finished, error, result, media_type, bytes"
+
+
+@dataclass
+class Job:
+    """One row of the job table (without its request body)"""
+    id: str
+    kind: str
+    status: str
+    worker: Optional[int]
+    created: float
+    started: Optional[float]
+    finished: Optional[float]
+    error: Optional[str]
+    result: Optional[str]
+    media_type: Optional[str]
+    bytes: Optional[int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["worker"], data["result"]
+        return data
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """SQLite job table plus a directory of result files"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.results = self.directory / "results"
+        self.results.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.directory / "jobs.sqlite3", timeout=30, isolation_level=None, check_same_thread=False,
+        )
+        # WAL lets pre-forked workers read while one of them writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional['JobStore']:
+        """Build from PSYCHOSCORE_JOB_DIR (disabled when unset)"""
+        directory = os.environ.get("PSYCHOSCORE_JOB_DIR") or None
+        return cls(directory) if directory else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _row(self, query: str, *args) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(query, args).fetchone()
+        return Job(*row) if row else None
+
+    def submit(self, kind: str, request: Dict[str, Any]) -> Job:
+        """Queue a job; `request` is stored as JSON"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, request, status, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(request), QUEUED, time.time()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._row(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", job_id)
+
+    def request(self, job_id: str) -> Dict[str, Any]:
+        """Stored request body of a job"""
+        with self._lock:
+            row = self._db.execute("SELECT request FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        return json.loads(row[0])
+
+    def claim(self, worker: int) -> Optional[Job]:
+        """Mark the oldest queued job as running on `worker` and return it"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, started = ? WHERE id = ?",
+                        (RUNNING, worker, time.time(), row[0]),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row else None
+
+    def finish(self, job_id: str, data: bytes, media_type: str) -> bool:
+        """
+        Write a running job's result and mark it succeeded.
+
+        Returns:
+            False (and keeps nothing) if the job was cancelled meanwhile
+        """
+        name = job_id + RESULT_SUFFIXES.get(media_type, ".bin")
+        fd, tmp = tempfile.mkstemp(dir=self.results, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self.results / name)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, result = ?, media_type = ?, bytes = ? "
+                "WHERE id = ? AND status = ?",
+                (SUCCEEDED, time.time(), name, media_type, len(data), job_id, RUNNING),
+            ).rowcount
+        if not updated:
+            (self.results / name).unlink(missing_ok=True)
+        return bool(updated)
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """Mark a running job failed"""
+        with self._lock:
+            return bool(self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ? AND status = ?",
+                (FAILED, time.time(), error, job_id, RUNNING),
+            ).rowcount)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it had already finished"""
+        with self._lock:
+            return bool(self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            ).rowcount)
+
+    def delete(self, job_id: str) -> bool:
+        """Remove a finished job and its result file"""
+        job = self.get(job_id)
+        if job is None or job.status not in FINISHED:
+            return False
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        if job.result:
+            (self.results / job.result).unlink(missing_ok=True)
+        return True
+
+    def result_path(self, job: Job) -> Optional[Path]:
+        return self.results / job.result if job.result else None
+
+    def requeue_orphans(self) -> int:
+        """
+        Queue again the running jobs whose process is gone.
+
+        Call at startup: this process runs nothing yet, so its own pid
+        (reused after a container restart) counts as gone too.
+        """
+        with self._lock:
+            running = self._db.execute("SELECT id, worker FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+        orphans = [job_id for job_id, worker in running
+                   if worker is None or worker == os.getpid() or not _pid_alive(worker)]
+        with self._lock:
+            for job_id in orphans:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL, started = NULL WHERE id = ? AND status = ?",
+                    (QUEUED, job_id, RUNNING),
+                )
+        return len(orphans)
+
+    def stats(self) -> Dict[str, int]:
+        """Jobs per status"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        counts.update(rows)
+        return counts
+
+
+class JobRunner:
+    """
+    Runs claimed jobs on the event loop, `concurrency` at a time.
+
+    `execute(kind, request)` does the work and returns (bytes,
+    media_type); exceptions mark the job failed. Runners wake on
+    notify() and also poll, which picks up jobs queued by other
+    processes sharing the store. While a job runs, its row is polled
+    too, so a job cancelled through another process stops here.
+    Store calls run in the default executor, off the event loop.
+    """
+
+    def __init__(self,
+                 store: JobStore,
+                 execute: Callable[[str, Dict[str, Any]], Awaitable[Tuple[bytes, str]]],
+                 concurrency: int = 1,
+                 poll_interval: float = 1.0):
+        self.store = store
+        self.execute = execute
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._wake: Optional[asyncio.Event] = None
+        self._loops: list = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def start(self):
+        self._wake = asyncio.Event()
+        self._loops = [asyncio.ensure_future(self._loop()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._loops + list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops = []
+
+    def notify(self):
+        """A job was queued"""
+        if self._wake is not None:
+            self._wake.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a job running in this process now (other processes notice within poll_interval)"""
+        task = self._running.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                job = await loop.run_in_executor(None, self.store.claim, os.getpid())
+            except sqlite3.Error as e:
+                logger.warning(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.ensure_future(self._run(job))
+            self._running[job.id] = task
+            try:
+                # A cancelled runner stops here; its job is requeued on restart
+                await self._watch(job.id, task)
+            finally:
+                self._running.pop(job.id, None)
+
+    async def _watch(self, job_id: str, task: asyncio.Task):
+        """Wait for a job, stopping it once its row is no longer running"""
+        loop = asyncio.get_running_loop()
+        while not task.done():
+            await asyncio.wait({task}, timeout=self.poll_interval)
+            if task.done():
+                break
+            try:
+                job = await loop.run_in_executor(None, self.store.get, job_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Job status check failed: {e}")
+                continue
+            if job is None or job.status != RUNNING:
+                task.cancel()
+
+    async def _run(self, job: Job):
+        loop = asyncio.get_running_loop()
+        try:
+            request = await loop.run_in_executor(None, self.store.request, job.id)
+            data, media_type = await self.execute(job.kind, request)
+            await loop.run_in_executor(None, self.store.finish, job.id, data, media_type)
+        except asyncio.CancelledError:
+            logger.info(f"Job {job.id} cancelled")
+            raise
+        except Exception as e:
+            logger.warning(f"Job {job.id} failed: {e}")
+            await loop.run_in_executor(None, self.store.fail, job.id, str(e))
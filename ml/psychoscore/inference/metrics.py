@@ -0,0 +1,362 @@
+"""
+PSYCHOSCORE Metrics
+
+Counters, gauges and fixed-bucket histograms rendered in the Prometheus
+text exposition format, without a client library. Recording is a dict
+lookup plus an integer add (histograms add one bisect over their
+bucket bounds), so instrumentation stays on in production.
+
+Metrics are recorded from the server's event loop thread only, which
+is what lets them skip locks. Values that other threads own (pool,
+batcher and cache statistics) are copied in when /metrics is scraped.
+
+Every process records its own values. Pre-forked workers share them
+through a directory (MultiprocessMetrics): each worker writes a
+snapshot of its registry there, and a scrape merges every snapshot, so
+the answer doesn't depend on which worker the kernel handed it to.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import tempfile
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    """One metric family; label values are passed positionally in `labelnames` order"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """(suffix, extra label names, label values, value) per exposed line"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, extra_names, values, value in self.samples():
+            labels = _label_text(self.labelnames + extra_names, values)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic total per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set_total(self, *labels: str, value: float):
+        """Mirror a total kept elsewhere (e.g. a cache's hit count)"""
+        self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def dump(self) -> list:
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+    def merged(self, dumps: Sequence[Tuple[int, bool, list]]) -> 'Counter':
+        """Totals summed over every process, exited ones included"""
+        merged = Counter(self.name, self.documentation, self.labelnames)
+        for _, _, dump in dumps:
+            for labels, value in dump:
+                merged.inc(*labels, amount=value)
+        return merged
+
+    def samples(self):
+        for labels, value in sorted(self._values.items()):
+            yield "_total", (), labels, value
+
+
+class Gauge(_Metric):
+    """Current value per label set"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, *labels: str, value: float):
+        self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def dump(self) -> list:
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+    def merged(self, dumps: Sequence[Tuple[int, bool, list]]) -> 'Gauge':
+        """Current values of live processes, labelled by pid"""
+        merged = Gauge(self.name, self.documentation, self.labelnames + ("pid",))
+        for pid, alive, dump in dumps:
+            if alive:
+                for labels, value in dump:
+                    merged.set(*labels, str(pid), value=value)
+        return merged
+
+    def samples(self):
+        for labels, value in sorted(self._values.items()):
+            yield "", (), labels, value
+
+
+class Histogram(_Metric):
+    """
+    Observation counts in fixed buckets, plus sum and count.
+
+    Buckets are counted individually and made cumulative only when
+    rendered, so an observation touches a single slot.
+    """
+
+    kind = "histogram"
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 buckets: Sequence[float],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def dump(self) -> list:
+        return [[list(labels), counts, total] for labels, (counts, total) in self._series.items()]
+
+    def merged(self, dumps: Sequence[Tuple[int, bool, list]]) -> 'Histogram':
+        """Bucket counts and sums added over every process, exited ones included"""
+        merged = Histogram(self.name, self.documentation, self.buckets, self.labelnames)
+        for _, _, dump in dumps:
+            for labels, counts, total in dump:
+                series = merged._series.setdefault(tuple(labels), [[0] * (len(self.buckets) + 1), 0.0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+        return merged
+
+    def samples(self):
+        bounds = self.buckets + (math.inf,)
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield "_bucket", ("le",), labels + (_format_value(bound),), cumulative
+            yield "_sum", (), labels, total
+            yield "_count", (), labels, cumulative
+
+
+class Registry:
+    """Named metric families, rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self,
+                  name: str,
+                  documentation: str,
+                  buckets: Sequence[float],
+                  labelnames: Sequence[str] = ()) -> Histogram:
+        return self._add(Histogram(name, documentation, buckets, labelnames))
+
+    def render(self) -> str:
+        """Prometheus text exposition of every family"""
+        return _render(self._metrics.values())
+
+    def snapshot(self) -> Dict[str, list]:
+        """Raw values of every family, as JSON-able lists"""
+        return {name: metric.dump() for name, metric in self._metrics.items()}
+
+    def render_merged(self, snapshots: Sequence[Tuple[int, bool, Dict[str, list]]]) -> str:
+        """Exposition of (pid, alive, snapshot) triples from several processes merged per family"""
+        return _render(
+            metric.merged([(pid, alive, snapshot.get(name, [])) for pid, alive, snapshot in snapshots])
+            for name, metric in self._metrics.items()
+        )
+
+
+def _render(metrics: Iterator[_Metric]) -> str:
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def clear_metrics_dir(directory: str):
+    """Remove snapshots left by an earlier run (call in the parent, before forking)"""
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    for snapshot in path.glob("*.json"):
+        snapshot.unlink(missing_ok=True)
+
+
+class MultiprocessMetrics:
+    """
+    Shares a registry's values between processes through a directory.
+
+    Each process writes its snapshot to its own file when scraped and
+    every `interval` seconds. A scrape merges all files: counters and
+    histograms are summed over every process that ever wrote, exited
+    workers included, so totals never go backwards whichever worker
+    answers; gauges are reported per live process with a `pid` label.
+    """
+
+    def __init__(self, registry: Registry, directory: str, interval: float = 5.0):
+        self.registry = registry
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        # A restarted worker may get a recycled pid; its file must not replace the old one
+        self.path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+
+    @classmethod
+    def from_env(cls, registry: Registry) -> Optional['MultiprocessMetrics']:
+        """Build from PSYCHOSCORE_METRICS_DIR / _METRICS_INTERVAL (None when no directory is set)"""
+        directory = os.environ.get("PSYCHOSCORE_METRICS_DIR") or None
+        if directory is None:
+            return None
+        return cls(registry, directory, interval=float(os.environ.get("PSYCHOSCORE_METRICS_INTERVAL", 5.0)))
+
+    def write(self):
+        """Publish this process's values (write-then-rename, so readers never see a partial file)"""
+        data = json.dumps({"pid": os.getpid(), "metrics": self.registry.snapshot()})
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Metrics snapshot write failed: {e}")
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def render(self) -> str:
+        """Exposition merged over every process sharing the directory"""
+        self.write()
+        snapshots = []
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            pid = data["pid"]
+            snapshots.append((pid, pid == os.getpid() or _pid_alive(pid), data["metrics"]))
+        return self.registry.render_merged(snapshots)
+
+    async def run(self, refresh: Callable[[], None]):
+        """Refresh and publish every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            refresh()
+            self.write()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them per route.
+
+    Routes are labelled by their path template (e.g. /adapters/{name}),
+    so path parameters don't multiply series. Latency runs until the
+    last body chunk is sent, which covers the whole of a streamed
+    response.
+    """
+
+    def __init__(self, app, requests: Counter, latency: Histogram, clock):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+        self.clock = clock
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = self.clock()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.requests.inc(route, scope["method"], str(status))
+            self.latency.observe(self.clock() - started, route)
@@ -0,0 +1,122 @@
+"""
+PSYCHOSCORE Bulk MIDI Writer
+
+Serializes note arrays to a Standard MIDI File in one vectorized pass:
+note-on/off events are built as arrays, sorted once, delta-encoded as
+variable-length quantities and flattened to bytes. There is no per-note
+Python work, so thousands of notes cost about as much as a handful.
+
+Output is a format-0 file: one track with a tempo event, then the notes
+on a single channel.
+"""
+
+import struct
+from typing import Sequence
+
+import numpy as np
+
+TICKS_PER_QUARTER = 960
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+
+_END_OF_TRACK = b"\x00\xff\x2f\x00"
+
+
+def _vlq(values: np.ndarray) -> np.ndarray:
+    """
+    Variable-length quantities for non-negative ints below 2**28.
+
+    Returns:
+        (N, 4) uint8 groups, most significant first, with continuation
+        bits on the first three; only the last _vlq_lengths() groups of
+        each row are kept
+    """
+    values = values.astype(np.uint32)
+    groups = np.stack([(values >> shift) & 0x7F for shift in (21, 14, 7, 0)], axis=1).astype(np.uint8)
+    # Every group but the last carries the continuation bit
+    groups[:, :3] |= 0x80
+    return groups
+
+
+def _vlq_lengths(values: np.ndarray) -> np.ndarray:
+    """Bytes each VLQ needs (1-4)"""
+    return 1 + (values >= 1 << 7).astype(np.int64) + (values >= 1 << 14) + (values >= 1 << 21)
+
+
+def encode_events(ticks: np.ndarray, status: np.ndarray, data1: np.ndarray, data2: np.ndarray) -> bytes:
+    """
+    Encode already-sorted channel events (absolute ticks) as track bytes.
+
+    Args:
+        ticks: (N,) absolute event times, non-decreasing
+        status, data1, data2: (N,) event bytes
+    """
+    deltas = np.diff(ticks, prepend=0)
+    rows = np.empty((len(ticks), 7), dtype=np.uint8)
+    rows[:, :4] = _vlq(deltas)
+    rows[:, 4] = status
+    rows[:, 5] = data1
+    rows[:, 6] = data2
+    # Keep the last `length` VLQ slots of each row plus its three event bytes
+    keep = np.ones(rows.shape, dtype=bool)
+    keep[:, :4] = np.arange(4)[None, :] >= 4 - _vlq_lengths(deltas)[:, None]
+    return rows[keep].tobytes()
+
+
+def write_midi(
+    pitches: Sequence[int],
+    starts: Sequence[float],
+    durations: Sequence[float],
+    velocities: Sequence[int],
+    tempo: int = 120,
+    channel: int = 0,
+    ticks_per_quarter: int = TICKS_PER_QUARTER,
+) -> bytes:
+    """
+    One-track MIDI file from note arrays (times in beats).
+
+    Args:
+        pitches, velocities: MIDI values per note
+        starts, durations: Note onsets and lengths in quarter notes
+        tempo: Beats per minute
+        channel: MIDI channel (0-15)
+
+    Returns:
+        MIDI file bytes
+    """
+    pitches = np.asarray(pitches, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.float64)
+    durations = np.asarray(durations, dtype=np.float64)
+    velocities = np.asarray(velocities, dtype=np.int64)
+
+    on = np.rint(starts * ticks_per_quarter).astype(np.int64)
+    off = np.maximum(np.rint((starts + durations) * ticks_per_quarter).astype(np.int64), on + 1)
+
+    # A note-off ends every sounding note of its pitch, so a note still
+    # held when the same pitch starts again would cut the new one short.
+    # End it at the next onset of its pitch instead.
+    by_pitch = np.lexsort((on, pitches))
+    same_pitch_next = pitches[by_pitch][1:] == pitches[by_pitch][:-1]
+    next_on = on[by_pitch][1:]
+    clip = same_pitch_next & (next_on > on[by_pitch][:-1])
+    current = by_pitch[:-1][clip]
+    off[current] = np.minimum(off[current], next_on[clip])
+
+    ticks = np.concatenate([on, off])
+    is_on = np.concatenate([np.ones(len(on), dtype=np.int8), np.zeros(len(off), dtype=np.int8)])
+    # Time order; at equal ticks note-offs go first so repeated pitches retrigger cleanly
+    order = np.lexsort((is_on, ticks))
+    ticks = ticks[order]
+    status = np.where(is_on[order] == 1, NOTE_ON | channel, NOTE_OFF | channel)
+    data1 = np.concatenate([pitches, pitches])[order]
+    data2 = np.concatenate([velocities, np.zeros(len(off), dtype=np.int64)])[order]
+
+    microseconds = int(round(60_000_000 / tempo))
+    track = (
+        b"\x00\xff\x51\x03" + microseconds.to_bytes(3, "big")
+        + encode_events(ticks, status, data1, data2)
+        + _END_OF_TRACK
+    )
+    header = b"MThd" + struct.pack(">IHHH", 6, 0, 1, ticks_per_quarter)
+    return header + b"MTrk" + struct.pack(">I", len(track)) + track
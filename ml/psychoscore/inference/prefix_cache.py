@@ -0,0 +1,146 @@
+"""
+PSYCHOSCORE Prefix KV Cache
+
+Psychometric values are quantized to 0.1 bins before tokenization, so
+many requests share an identical PSYCH_START … PSYCH_END prefix. This
+cache keeps the model's key/value state and next-token logits for each
+prefix, letting decoding start right after the prefix instead of
+re-encoding it.
+
+Entries are held in an LRU bounded by tensor memory and by entry count.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import torch
+
+
+# Per-layer (key, value) tensors, each shaped (1, heads, prefix_len, head_dim)
+LayerKV = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+@dataclass
+class PrefixState:
+    """Model state after consuming one prefix"""
+    kv: LayerKV
+    logits: torch.Tensor          # (vocab,) next-token logits after the prefix
+    length: int                   # Prefix length in tokens
+
+    @property
+    def nbytes(self) -> int:
+        total = self.logits.numel() * self.logits.element_size()
+        for key, value in self.kv:
+            total += key.numel() * key.element_size() + value.numel() * value.element_size()
+        return total
+
+
+class PrefixKVCache:
+    """
+    Thread-safe LRU of PrefixState keyed by the prefix token tuple.
+
+    Inserting evicts least recently used entries until the total tensor
+    memory fits `max_bytes` and at most `max_entries` remain (0: no
+    entry limit). A single state larger than the budget is not cached.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int = 0):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, ...], PrefixState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['PrefixKVCache']:
+        """Build from PSYCHOSCORE_PREFIX_CACHE_MB (0 disables the cache) / _ENTRIES"""
+        megabytes = float(os.environ.get("PSYCHOSCORE_PREFIX_CACHE_MB", 256))
+        if megabytes <= 0:
+            return None
+        max_entries = int(os.environ.get("PSYCHOSCORE_PREFIX_CACHE_ENTRIES", 1024))
+        return cls(int(megabytes * 1024 * 1024), max_entries=max(max_entries, 0))
+
+    def get(self, prefix: Sequence[int]) -> Optional[PrefixState]:
+        """Look up a prefix, refreshing its recency on a hit"""
+        key = tuple(prefix)
+        with self._lock:
+            state = self._entries.get(key)
+            if state is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return state
+
+    def put(self, prefix: Sequence[int], state: PrefixState):
+        """Insert a prefix state, evicting old entries to stay within budget"""
+        size = state.nbytes
+        if size > self.max_bytes:
+            return
+        key = tuple(prefix)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            while self._entries and (
+                self.bytes + size > self.max_bytes
+                or (self.max_entries and len(self._entries) >= self.max_entries)
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+            self._entries[key] = state
+            self.bytes += size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def scoped(self, namespace: str) -> 'ScopedPrefixCache':
+        """View whose entries are kept apart from other namespaces (e.g. per LoRA adapter)"""
+        return ScopedPrefixCache(self, namespace)
+
+    def discard(self, namespace: str):
+        """Drop every entry stored through scoped(namespace)"""
+        with self._lock:
+            for key in [k for k in self._entries if k and k[0] == namespace]:
+                self.bytes -= self._entries.pop(key).nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate and memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class ScopedPrefixCache:
+    """PrefixKVCache view that prepends a namespace to every key; shares the parent's budget"""
+
+    def __init__(self, cache: PrefixKVCache, namespace: str):
+        self.cache = cache
+        self.namespace = namespace
+
+    def get(self, prefix: Sequence[int]) -> Optional[PrefixState]:
+        return self.cache.get((self.namespace, *prefix))
+
+    def put(self, prefix: Sequence[int], state: PrefixState):
+        self.cache.put((self.namespace, *prefix), state)
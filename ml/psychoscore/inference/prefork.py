@@ -0,0 +1,136 @@
+"""
+PSYCHOSCORE Pre-Fork Serving
+
+Runs several server workers over one copy of the model weights. The
+parent loads the model, freezes the garbage collector's view of every
+object created so far (so collections in the workers don't write to
+those pages), binds the listening socket and then forks. Workers
+inherit the weights copy-on-write and accept connections from the
+shared socket, so the kernel spreads requests across them; each worker
+adds only its own activations and request state.
+
+The parent only supervises: it restarts workers that die and forwards
+SIGINT/SIGTERM for a graceful shutdown.
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between restarts of a crashing worker slot
+RESTART_BACKOFF = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket shared by all workers"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def worker_threads(workers: int) -> int:
+    """Intra-op threads per worker so workers together use each core once"""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def serve(app,
+          host: str,
+          port: int,
+          workers: int,
+          preload: Optional[Callable[[], None]] = None,
+          log_level: str = "info"):
+    """
+    Load once, fork `workers` uvicorn servers on one socket, supervise.
+
+    Args:
+        app: ASGI application each worker serves
+        host, port: Listening address
+        workers: Number of forked worker processes
+        preload: Runs in the parent before forking (e.g. model loading)
+        log_level: uvicorn log level
+    """
+    import uvicorn
+
+    sock = bind_socket(host, port)
+    if preload is not None:
+        preload()
+    # Objects that exist now are shared with every worker; keep GC off them
+    gc.collect()
+    gc.freeze()
+
+    config = uvicorn.Config(app, log_level=log_level)
+    children: Dict[int, int] = {}       # pid -> worker slot
+    started: Dict[int, float] = {}      # slot -> last fork time
+    stopping = False
+
+    def spawn(slot: int):
+        delay = started.get(slot, 0.0) + RESTART_BACKOFF - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        started[slot] = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(config, sock, slot, workers)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    logger.info(f"Pre-fork serving on {host}:{port} with {workers} workers")
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is None:
+            continue
+        if not stopping:
+            logger.warning(f"Worker {slot} (pid {pid}) exited with status {status}; restarting")
+            spawn(slot)
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def _run_worker(config, sock: socket.socket, slot: int, workers: int):
+    """Child process: serve on the inherited socket, never return"""
+    import uvicorn
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        import sys
+        if "torch" in sys.modules:
+            sys.modules["torch"].set_num_threads(worker_threads(workers))
+        logger.info(f"Worker {slot} started (pid {os.getpid()})")
+        uvicorn.Server(config).run(sockets=[sock])
+        code = 0
+    except BaseException:
+        logger.exception(f"Worker {slot} failed")
+        code = 1
+    os._exit(code)
@@ -0,0 +1,214 @@
+"""
+PSYCHOSCORE Response Cache
+
+Stores generated MIDI for seeded requests. Keys cover everything the
+output depends on: the exact profile (the rules generator and the MIDI
+writer read raw values, not the tokenizer's 0.1 bins), the generation
+settings, the checkpoint and the generator version. Entries live in an
+in-memory LRU and, optionally, in a directory that survives restarts.
+The directory is bounded by bytes (least recently used files go first,
+by mtime) and files from other generator versions are deleted on start.
+
+Only seeded requests are cached: an unseeded request asks for a fresh
+sample every time.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Optional
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tokenizer import PsychometricProfile
+
+logger = logging.getLogger(__name__)
+
+# Bump when the same inputs start producing different MIDI (rules
+# generator, token decoding, MIDI writer), so persisted entries go stale
+GENERATOR_VERSION = 4
+
+
+def checkpoint_fingerprint(path: str) -> str:
+    """
+    Identity of a checkpoint directory: its resolved path plus the name,
+    size and mtime of each file, so a swapped or retrained model changes it.
+    """
+    root = Path(path).resolve()
+    files = sorted(p for p in root.rglob('*') if p.is_file()) if root.is_dir() else []
+    material = repr([str(root)] + [
+        (str(p.relative_to(root)), p.stat().st_size, p.stat().st_mtime_ns) for p in files
+    ])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+
+
+def response_key(profile: PsychometricProfile, **settings) -> str:
+    """Stable hex key for the exact profile plus generation settings and generator version"""
+    material = json.dumps(
+        {"profile": asdict(profile), "settings": settings, "generator": GENERATOR_VERSION},
+        sort_keys=True, default=repr,
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU of MIDI bytes keyed by response_key(), with optional disk backing.
+
+    Memory hits are a dict lookup; disk hits are promoted into memory and
+    refresh the file's mtime, which orders eviction once the directory
+    holds more than max_disk_bytes (0 = unbounded).
+    """
+
+    # Eviction trims the directory to this fraction of the budget, so
+    # consecutive writes don't each rescan it
+    DISK_LOW_WATER = 0.9
+
+    def __init__(self,
+                 max_entries: int = 256,
+                 directory: Optional[str] = None,
+                 max_disk_bytes: int = 0):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._remove_stale()
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            self._evict_disk()
+
+    @classmethod
+    def from_env(cls) -> Optional['ResponseCache']:
+        """
+        Build from PSYCHOSCORE_RESPONSE_CACHE_SIZE / _DIR / _DIR_MB
+        (disabled when size and directory are both unset or 0)
+        """
+        size = int(os.environ.get("PSYCHOSCORE_RESPONSE_CACHE_SIZE", 256))
+        directory = os.environ.get("PSYCHOSCORE_RESPONSE_CACHE_DIR") or None
+        disk_mb = float(os.environ.get("PSYCHOSCORE_RESPONSE_CACHE_DIR_MB", 1024))
+        if size <= 0 and directory is None:
+            return None
+        return cls(max_entries=max(size, 0), directory=directory,
+                   max_disk_bytes=max(int(disk_mb * 1024 * 1024), 0))
+
+    @staticmethod
+    def _prefix() -> str:
+        return f"v{GENERATOR_VERSION}-"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{self._prefix()}{key}.mid"
+
+    def _disk_files(self):
+        """(path, size, mtime) of this version's entries on disk"""
+        files = []
+        for path in self.directory.glob(f"{self._prefix()}*.mid"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another worker
+            files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _remove_stale(self):
+        """Delete entries written by other generator versions; they can never hit"""
+        removed = 0
+        for path in self.directory.glob("*.mid"):
+            if not path.name.startswith(self._prefix()):
+                path.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            logger.info(f"Response cache: removed {removed} entries from other generator versions")
+
+    def _evict_disk(self):
+        """Delete least recently used files until under the low-water mark"""
+        if not self.max_disk_bytes or self._disk_bytes <= self.max_disk_bytes:
+            return
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * self.DISK_LOW_WATER
+        for path, size, _ in files:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._disk_bytes = total
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached MIDI bytes, or None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)  # Recently used: evict last
+            except FileNotFoundError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                with self._lock:
+                    self.hits += 1
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes):
+        """Store MIDI bytes in memory and, if configured, on disk"""
+        self._remember(key, data)
+        if self.directory is not None:
+            # Write-then-rename so readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, self._path(key))
+            except OSError as e:
+                logger.warning(f"Response cache write failed: {e}")
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                return
+            with self._lock:
+                self._disk_bytes += len(data)
+                self._evict_disk()
+
+    def _remember(self, key: str, data: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate and occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk": str(self.directory) if self.directory else None,
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
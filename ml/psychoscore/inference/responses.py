@@ -0,0 +1,160 @@
+"""
+PSYCHOSCORE Binary Responses
+
+Helpers for returning MIDI without the base64/JSON detour:
+
+- content negotiation between JSON, raw MIDI and multipart/mixed
+- multipart/mixed bodies carrying JSON parameters plus the MIDI part
+- a length-prefixed binary envelope for many MIDIs in one payload
+- server-sent event framing for streamed generation
+
+Envelope layout (all integers big-endian):
+
+    b"PSYM" | version:u8 | count:u32
+    count × ( status:u8 | length:u32 | payload[length] )
+
+status 0 marks a MIDI payload, 1 a UTF-8 error message; items keep the
+order of the request.
+"""
+
+import json
+import struct
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+JSON = "application/json"
+MIDI = "audio/midi"
+MULTIPART = "multipart/mixed"
+ENVELOPE = "application/x-psychoscore-envelope"
+EVENT_STREAM = "text/event-stream"
+
+ENVELOPE_MAGIC = b"PSYM"
+ENVELOPE_VERSION = 1
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_HEADER = struct.Struct(">4sBI")
+_ITEM = struct.Struct(">BI")
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> str:
+    """
+    Pick the offered media type the client prefers.
+
+    Honours q-values and wildcards: each type takes the q of the most
+    specific range matching it, and q=0 marks it unacceptable. Ties
+    (including */*) go to the earliest entry in `offered`, so list the
+    default first; when nothing matches, the first offered type the
+    client did not refuse is returned.
+    """
+    if not accept:
+        return offered[0]
+
+    ranges = []
+    for part in accept.split(","):
+        fields = part.strip().split(";")
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((fields[0].strip().lower(), q))
+
+    def quality(candidate: str) -> Optional[float]:
+        """q of the most specific matching range; None when none match"""
+        wildcard = candidate.split("/")[0] + "/*"
+        for pattern in (candidate, wildcard, "*/*"):
+            matches = [q for media, q in ranges if media == pattern]
+            if matches:
+                return max(matches)
+        return None
+
+    qualities = {candidate: quality(candidate) for candidate in offered}
+    best = max(offered, key=lambda candidate: (qualities[candidate] or 0.0, -offered.index(candidate)))
+    if qualities[best]:
+        return best
+    return next((candidate for candidate in offered if qualities[candidate] is None), offered[0])
+
+
+def multipart_body(parameters: Dict[str, Any], midi_bytes: bytes, filename: str) -> Tuple[bytes, str]:
+    """
+    Build a multipart/mixed body: JSON parameters, then the MIDI file.
+
+    Returns:
+        (body, media_type including boundary)
+    """
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f"Content-Type: {JSON}\r\n\r\n"
+        f"{json.dumps(parameters)}\r\n"
+        f"--{boundary}\r\n"
+        f"Content-Type: {MIDI}\r\n"
+        f'Content-Disposition: attachment; filename="{filename}"\r\n\r\n'
+    ).encode("utf-8")
+    tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return head + midi_bytes + tail, f"{MULTIPART}; boundary={boundary}"
+
+
+EnvelopeItem = Union[bytes, Exception, str]
+
+
+def envelope_header(count: int) -> bytes:
+    """Envelope preamble announcing `count` items"""
+    return _HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION, count)
+
+
+def envelope_item(item: EnvelopeItem) -> bytes:
+    """One framed item: MIDI bytes, or an error (exception or message)"""
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        payload, status = bytes(item), STATUS_OK
+    else:
+        payload, status = str(item).encode("utf-8"), STATUS_ERROR
+    return _ITEM.pack(status, len(payload)) + payload
+
+
+def iter_envelope(items: Iterable[EnvelopeItem], count: int) -> Iterator[bytes]:
+    """Stream an envelope chunk by chunk (for StreamingResponse)"""
+    yield envelope_header(count)
+    for item in items:
+        yield envelope_item(item)
+
+
+def pack_envelope(items: Sequence[EnvelopeItem]) -> bytes:
+    """Serialize a complete envelope"""
+    return b"".join(iter_envelope(items, len(items)))
+
+
+def unpack_envelope(data: bytes) -> List[Tuple[int, bytes]]:
+    """
+    Parse an envelope into (status, payload) pairs.
+
+    Raises:
+        ValueError: on a bad magic number, version or truncated payload
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Truncated envelope header")
+    magic, version, count = _HEADER.unpack_from(data, 0)
+    if magic != ENVELOPE_MAGIC or version != ENVELOPE_VERSION:
+        raise ValueError("Not a PSYCHOSCORE envelope")
+
+    items = []
+    offset = _HEADER.size
+    for _ in range(count):
+        if offset + _ITEM.size > len(data):
+            raise ValueError("Truncated envelope item")
+        status, length = _ITEM.unpack_from(data, offset)
+        offset += _ITEM.size
+        if offset + length > len(data):
+            raise ValueError("Truncated envelope payload")
+        items.append((status, data[offset:offset + length]))
+        offset += length
+    return items
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
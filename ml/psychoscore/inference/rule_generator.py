@@ -0,0 +1,79 @@
+"""
+PSYCHOSCORE Rule-Based Generator
+
+The profile-driven fallback used when no model decodes. All notes for
+all bars are drawn at once from a seeded NumPy Generator: scale degrees
+(random with probability `entropy`, else walking the scale), durations
+and velocities come out as arrays, ready for the bulk MIDI writer.
+
+The same seed always gives the same notes.
+"""
+
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+ROOT_PITCH = 60          # Middle C
+BEATS_PER_BAR = 4.0
+
+Note = Tuple[int, float, float, int]
+
+
+class RuleNotes(NamedTuple):
+    """Generated notes as parallel arrays (times in beats)"""
+    pitch: np.ndarray
+    start: np.ndarray
+    duration: np.ndarray
+    velocity: np.ndarray
+    notes_per_bar: int
+
+    def bars(self) -> Iterator[List[Note]]:
+        """Notes grouped per bar as (pitch, start_beat, duration_beats, velocity) tuples"""
+        rows = list(zip(
+            self.pitch.tolist(), self.start.tolist(), self.duration.tolist(), self.velocity.tolist(),
+        ))
+        for i in range(0, len(rows), self.notes_per_bar):
+            yield rows[i:i + self.notes_per_bar]
+
+
+def notes_per_bar(entropy: float) -> int:
+    """2-8 notes per bar, more with higher entropy"""
+    return int(2 + entropy * 6)
+
+
+def rule_notes(
+    scale: Sequence[int],
+    base_velocity: int,
+    entropy: float,
+    max_bars: int,
+    seed: Optional[int] = None,
+) -> RuleNotes:
+    """
+    Generate every note of a rule-based phrase in one vectorized pass.
+
+    Args:
+        scale: Mode intervals above the root
+        base_velocity: Mean velocity (jittered by +/-10, clipped to 40-127)
+        entropy: Probability of a random scale degree instead of the next one
+        max_bars: Bars to generate
+        seed: Generator seed (None: fresh randomness)
+    """
+    rng = np.random.default_rng(seed)
+    scale = np.asarray(scale, dtype=np.int64)
+    per_bar = notes_per_bar(entropy)
+    count = per_bar * max_bars
+    beat_duration = BEATS_PER_BAR / per_bar
+
+    index = np.arange(count)
+    position = index % per_bar
+    bar = index // per_bar
+
+    walk = scale[position % len(scale)]
+    jump = scale[rng.integers(0, len(scale), count)]
+    interval = np.where(rng.random(count) < entropy, jump, walk)
+
+    pitch = ROOT_PITCH + interval + (bar % 2) * 12     # Octave variation
+    start = index * beat_duration
+    duration = beat_duration * (0.8 + rng.random(count) * 0.4)
+    velocity = np.clip(base_velocity + rng.integers(-10, 11, count), 40, 127)
+    return RuleNotes(pitch, start, duration, velocity, per_bar)
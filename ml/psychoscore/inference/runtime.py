@@ -0,0 +1,207 @@
+"""
+PSYCHOSCORE Model Runtime
+
+How a checkpoint is loaded and executed. On GPU the model loads in fp16
+with device_map="auto". On CPU nodes, where fp16 matmuls are slow or
+missing, the default profile loads fp32, merges LoRA adapters into the
+base weights and applies dynamic int8 quantization to every Linear layer
+(GPT-2's Conv1D projections are converted to Linear first so they are
+quantized too).
+
+Either profile can then run eagerly, through torch.compile, or as an
+ONNX Runtime export (requires optimum[onnxruntime]).
+"""
+
+import logging
+import os
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEVICES = ("auto", "cpu", "cuda")
+DTYPES = ("auto", "float32", "bfloat16", "float16")
+BACKENDS = ("eager", "compile", "onnx")
+
+ADAPTER_FILES = ("adapter_model.bin", "adapter_model.safetensors")
+
+
+def _env_flag(name: str) -> Optional[bool]:
+    """True/False from a 1/0-style variable, None when unset"""
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return None
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class RuntimeConfig:
+    """Model runtime settings (overridable via environment variables)"""
+    device: str = "auto"                 # "auto", "cpu" or "cuda"
+    dtype: str = "auto"                  # "auto": float16 on GPU, float32 on CPU
+    int8: Optional[bool] = None          # Dynamic int8 Linear quantization (default: on for fp32 CPU)
+    merge_lora: Optional[bool] = None    # Fold LoRA into base weights (default: on for CPU)
+    backend: str = "eager"               # "eager", "compile" or "onnx"
+    hot_adapters: bool = False           # Named adapters load at runtime (no merging, no int8)
+
+    @classmethod
+    def from_env(cls) -> 'RuntimeConfig':
+        """Read PSYCHOSCORE_DEVICE / _DTYPE / _INT8 / _MERGE_LORA / _RUNTIME (and _ADAPTER_DIR)"""
+        return cls(
+            device=os.environ.get("PSYCHOSCORE_DEVICE", cls.device),
+            dtype=os.environ.get("PSYCHOSCORE_DTYPE", cls.dtype),
+            int8=_env_flag("PSYCHOSCORE_INT8"),
+            merge_lora=_env_flag("PSYCHOSCORE_MERGE_LORA"),
+            backend=os.environ.get("PSYCHOSCORE_RUNTIME", cls.backend),
+            hot_adapters=bool(os.environ.get("PSYCHOSCORE_ADAPTER_DIR")),
+        )
+
+    def resolve(self) -> 'RuntimeConfig':
+        """
+        Fill in "auto" and unset fields for this machine.
+
+        Raises:
+            ValueError: on unknown values or int8 outside fp32 CPU
+        """
+        if self.device not in DEVICES:
+            raise ValueError(f"device must be one of {', '.join(DEVICES)}")
+        if self.dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {', '.join(DTYPES)}")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"runtime must be one of {', '.join(BACKENDS)}")
+
+        device = self.device
+        if device == "auto":
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        dtype = self.dtype
+        if dtype == "auto":
+            dtype = "float16" if device == "cuda" else "float32"
+        int8 = self.int8 if self.int8 is not None else (
+            device == "cpu" and dtype == "float32" and not self.hot_adapters
+        )
+        merge_lora = self.merge_lora if self.merge_lora is not None else (
+            device == "cpu" and not self.hot_adapters
+        )
+
+        if int8 and device != "cpu":
+            raise ValueError("int8 dynamic quantization runs on CPU only")
+        if int8 and dtype != "float32":
+            raise ValueError("int8 dynamic quantization needs float32 activations")
+        if self.hot_adapters and (int8 or merge_lora or self.backend == "onnx"):
+            # PEFT injects adapters into unquantized, unmerged Linear/Conv1D layers
+            raise ValueError("Hot-loaded adapters need unmerged, unquantized eager or compiled weights")
+        return replace(self, device=device, dtype=dtype, int8=int8, merge_lora=merge_lora)
+
+    def describe(self) -> str:
+        """Short label for logs and /health"""
+        parts = [self.device, self.dtype]
+        if self.int8:
+            parts.append("int8")
+        if self.merge_lora:
+            parts.append("merged-lora")
+        parts.append(self.backend)
+        return "/".join(parts)
+
+
+def has_adapter(model_path: Path) -> bool:
+    """Whether a checkpoint directory holds PEFT adapter weights"""
+    return any((Path(model_path) / name).exists() for name in ADAPTER_FILES)
+
+
+def model_device(model):
+    """Device a model's inputs belong on"""
+    device = getattr(model, "device", None)
+    if device is not None:
+        return device
+    return next(model.parameters()).device
+
+
+def load_model(model_path, config: RuntimeConfig):
+    """
+    Load a checkpoint (plus LoRA adapters if present) for inference.
+
+    Args:
+        model_path: Checkpoint directory
+        config: Runtime settings; resolved here if still "auto"
+
+    Returns:
+        A model in eval mode, ready for inference.decoding
+    """
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    config = config.resolve()
+    model_path = Path(model_path)
+    kwargs = dict(torch_dtype=getattr(torch, config.dtype), trust_remote_code=True)
+    if config.device == "cuda":
+        kwargs["device_map"] = "auto"
+    model = AutoModelForCausalLM.from_pretrained(str(model_path), **kwargs)
+
+    if has_adapter(model_path):
+        from peft import PeftModel
+        logger.info("Loading LoRA adapters")
+        model = PeftModel.from_pretrained(model, str(model_path))
+        if config.merge_lora:
+            model = model.merge_and_unload()
+    model.eval()
+
+    if config.backend == "onnx":
+        return _onnx_model(model, model_path, config)
+    if config.int8:
+        model = quantize_int8(model)
+    if config.backend == "compile":
+        model.forward = torch.compile(model.forward, dynamic=True)
+    return model
+
+
+def conv1d_to_linear(model):
+    """Replace transformers Conv1D layers (GPT-2 projections) with equivalent nn.Linear, in place"""
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if not isinstance(child, Conv1D):
+                continue
+            # Conv1D stores weight as (in_features, out_features)
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features, dtype=child.weight.dtype, device=child.weight.device)
+            with torch.no_grad():
+                linear.weight.copy_(child.weight.t())
+                linear.bias.copy_(child.bias)
+            setattr(module, name, linear)
+    return model
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations fp32)"""
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    conv1d_to_linear(model)
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _onnx_model(model, model_path: Path, config: RuntimeConfig):
+    """Export (once) to model_path/onnx and load it with ONNX Runtime"""
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM
+    except ImportError:
+        raise RuntimeError("PSYCHOSCORE_RUNTIME=onnx requires optimum[onnxruntime]")
+
+    export_dir = model_path / "onnx"
+    file_name = "model_quantized.onnx" if config.int8 else "model.onnx"
+    if not (export_dir / "model.onnx").exists():
+        import tempfile
+        logger.info(f"Exporting ONNX model to {export_dir}")
+        with tempfile.TemporaryDirectory() as merged:
+            # Export from plain weights so merged LoRA is baked in
+            model.save_pretrained(merged)
+            ORTModelForCausalLM.from_pretrained(merged, export=True, use_cache=True).save_pretrained(export_dir)
+    if config.int8 and not (export_dir / file_name).exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(export_dir / "model.onnx", export_dir / file_name, weight_type=QuantType.QInt8)
+
+    return ORTModelForCausalLM.from_pretrained(export_dir, file_name=file_name, use_cache=True)
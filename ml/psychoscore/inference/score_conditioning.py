@@ -0,0 +1,212 @@
+"""
+PSYCHOSCORE Score-Conditioned Generation
+
+Renders a whole scored play — the per-beat TRAUMA_R / ENTROPY_H timeline
+produced by mpn_engine — as one multi-track MIDI file. Each speaker gets
+a track; conditioning changes at beat boundaries. Consecutive beats by
+the same speaker with the same quantized values form one segment, and
+all segments are generated together in a single batched pass.
+
+Timelines can be read from the mpn_engine CSV export or from row dicts
+(BatchScorer JSON export / MPNMetrics.to_dict()).
+"""
+
+import csv
+import io
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tokenizer import PsychometricProfile, quantize
+
+# Columns the timeline needs from an MPN score
+REQUIRED_COLUMNS = ('BEAT', 'SPEAKER', 'TRAUMA_R', 'ENTROPY_H')
+
+# Pseudo-speakers that advance time but get no track (as in mpn_engine's SpeakerProfiler)
+NON_SPEAKERS = ('STAGE', 'SCENE', 'NARRATOR')
+
+BEATS_PER_BAR = 4.0  # 4/4 throughout
+
+Note = Tuple[int, float, float, int]
+
+
+@dataclass
+class TimelineBeat:
+    """One scored beat of the play"""
+    beat: int
+    speaker: str
+    trauma: float
+    entropy: float
+
+
+@dataclass
+class Segment:
+    """A run of consecutive beats rendered from one conditioning profile"""
+    speaker: str
+    start: int          # Index of the first beat in the timeline
+    beats: int          # Number of beats covered
+    trauma: float       # Quantized conditioning values
+    entropy: float
+
+
+def timeline_from_rows(rows: Iterable[Mapping[str, object]]) -> List[TimelineBeat]:
+    """
+    Build a timeline from MPN row dicts.
+
+    Raises:
+        ValueError: if a required column is missing or a value is not numeric
+    """
+    timeline = []
+    for i, row in enumerate(rows):
+        missing = [c for c in REQUIRED_COLUMNS if c not in row]
+        if missing:
+            raise ValueError(f"Row {i + 1} is missing columns: {', '.join(missing)}")
+        try:
+            timeline.append(TimelineBeat(
+                beat=int(row['BEAT']),
+                speaker=str(row['SPEAKER']).strip(),
+                trauma=min(1.0, max(0.0, float(row['TRAUMA_R']))),
+                entropy=min(1.0, max(0.0, float(row['ENTROPY_H']))),
+            ))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Row {i + 1}: {e}")
+    timeline.sort(key=lambda b: b.beat)
+    return timeline
+
+
+def parse_timeline_csv(text: str) -> List[TimelineBeat]:
+    """Parse mpn_engine score CSV text. The text is never treated as a path."""
+    return timeline_from_rows(csv.DictReader(io.StringIO(text)))
+
+
+def read_timeline_csv(path) -> List[TimelineBeat]:
+    """Read an mpn_engine score CSV file from disk."""
+    return parse_timeline_csv(Path(path).read_text(encoding='utf-8'))
+
+
+def plan_segments(timeline: Sequence[TimelineBeat]) -> List[Segment]:
+    """Merge consecutive beats with the same speaker and quantized conditioning"""
+    q = quantize
+    segments: List[Segment] = []
+    for i, beat in enumerate(timeline):
+        trauma, entropy = q(beat.trauma), q(beat.entropy)
+        last = segments[-1] if segments else None
+        if last and (last.speaker, last.trauma, last.entropy) == (beat.speaker, trauma, entropy):
+            last.beats += 1
+        else:
+            segments.append(Segment(beat.speaker, i, 1, trauma, entropy))
+    return segments
+
+
+def generate_piece(
+    inference,
+    timeline: Sequence[TimelineBeat],
+    speaker_profiles: Optional[Mapping[str, PsychometricProfile]] = None,
+    bars_per_beat: int = 1,
+    backend: str = "rules",
+    temperature_fn: Optional[Callable[[PsychometricProfile], float]] = None,
+    top_p: float = 0.9,
+    seed: Optional[int] = None,
+    batch_size: int = 32,
+    exclude: Sequence[str] = NON_SPEAKERS,
+    adapter: Optional[str] = None,
+) -> bytes:
+    """
+    Generate one multi-track MIDI for a scored timeline.
+
+    Args:
+        inference: Loaded PsychoscoreInference
+        timeline: Scored beats (see parse_timeline_csv / timeline_from_rows)
+        speaker_profiles: Base profile per speaker; trauma and entropy are
+            taken from the timeline. Unknown speakers use the default profile.
+        bars_per_beat: Bars rendered for each timeline beat
+        backend: "rules" or "model"
+        temperature_fn: Sampling temperature per segment profile (default 0.8)
+        top_p: Nucleus mass for model decoding
+        seed: Base seed; segment i uses seed + i
+        batch_size: Segments decoded together (model backend)
+        exclude: Pseudo-speakers whose beats are rendered as rests
+        adapter: Named LoRA adapter for model decoding
+
+    Returns:
+        MIDI file bytes
+    """
+    from midiutil import MIDIFile
+
+    speaker_profiles = speaker_profiles or {}
+    segments = [s for s in plan_segments(timeline) if s.speaker not in exclude]
+
+    profiles = [
+        replace(speaker_profiles.get(s.speaker) or PsychometricProfile(), trauma=s.trauma, entropy=s.entropy)
+        for s in segments
+    ]
+    bars = [s.beats * bars_per_beat for s in segments]
+    seeds = [seed + i if seed is not None else None for i in range(len(segments))]
+    temperatures = [temperature_fn(p) if temperature_fn else 0.8 for p in profiles]
+
+    if backend == "model":
+        segment_bars = _model_segments(inference, profiles, bars, temperatures, top_p, seeds, batch_size, adapter)
+    else:
+        segment_bars = [
+            list(inference.iter_bars(profile, n, seed=s))
+            for profile, n, s in zip(profiles, bars, seeds)
+        ]
+
+    # One track per speaker, in order of first appearance
+    speakers = list(dict.fromkeys(s.speaker for s in segments))
+    tracks = {speaker: i for i, speaker in enumerate(speakers)}
+    midi = MIDIFile(max(1, len(speakers)))
+    for speaker, track in tracks.items():
+        midi.addTrackName(track, 0, speaker)
+
+    beat_length = bars_per_beat * BEATS_PER_BAR
+    last_tempo = None
+    for segment, profile, notes_by_bar in zip(segments, profiles, segment_bars):
+        offset = segment.start * beat_length
+        tempo = inference.rule_settings(profile)[1]
+        if tempo != last_tempo:
+            midi.addTempo(0, offset, tempo)
+            last_tempo = tempo
+
+        track = tracks[segment.speaker]
+        channel = _channel(track)
+        end = offset + segment.beats * beat_length
+        for notes in notes_by_bar:
+            for pitch, start, duration, velocity in notes:
+                time = offset + start
+                if time >= end:
+                    continue
+                midi.addNote(track, channel, pitch, time, min(duration, end - time), velocity)
+
+    if last_tempo is None:
+        midi.addTempo(0, 0, 120)
+
+    buffer = io.BytesIO()
+    midi.writeFile(buffer)
+    return buffer.getvalue()
+
+
+def _channel(track: int) -> int:
+    """MIDI channel for a track, skipping the General MIDI drum channel"""
+    channel = track % 15
+    return channel + 1 if channel >= 9 else channel
+
+
+def _model_segments(inference, profiles, bars, temperatures, top_p, seeds, batch_size, adapter=None) -> List[List[List[Note]]]:
+    """Decode all segments in batches; notes per bar for each segment"""
+    results: List[List[List[Note]]] = []
+    for start in range(0, len(profiles), batch_size):
+        stop = start + batch_size
+        chunk = profiles[start:stop]
+        rows = inference.decode_rows(
+            [inference.encode_prefix(p) for p in chunk],
+            temperatures[start:stop],
+            [top_p] * len(chunk),
+            [inference.max_new_tokens(n) for n in bars[start:stop]],
+            seeds[start:stop],
+            adapter,
+        )
+        results.extend(inference.tokens_to_bars(row, n) for row, n in zip(rows, bars[start:stop]))
+    return results
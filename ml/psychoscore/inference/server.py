@@ -4,25 +4,82 @@ FastAPI server for generating MIDI from psychometric profiles.
 
 Usage:
     uvicorn server:app --host 0.0.0.0 --port 8001
+
+torch, transformers and peft are imported only when the model is loaded,
+so the rule-based backend starts serving without them. See
+PSYCHOSCORE_LOAD_MODE for when the model is loaded.
 """
 
 import os
 import io
+import json
+import asyncio
+import zipfile
+import base64
+import tempfile
 import logging
+import threading
+from contextlib import contextmanager
+from time import perf_counter
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Literal, Any, Optional, Tuple
 
-import torch
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
-from pydantic import BaseModel, Field
-from transformers import AutoModelForCausalLM
-from peft import PeftModel
+from fastapi import FastAPI, HTTPException, Path as PathParam, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
 # Add parent to path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from tokenizer import PsychoscoreTokenizer, PsychometricProfile
+from tokenizer import PsychometricProfile
+from inference.worker_pool import (
+    GenerationPool,
+    PoolConfig,
+    PoolSaturated,
+    GenerationTimeout,
+    ClientDisconnected,
+)
+from inference.adapters import ADAPTER_NAME_PATTERN, AdapterNotFound
+from inference.batching import BatchConfig, MicroBatcher
+from inference.jobs import SUCCEEDED, JobRunner, JobStore
+from inference.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    LATENCY_BUCKETS,
+    MetricsMiddleware,
+    MultiprocessMetrics,
+    Registry,
+    clear_metrics_dir,
+)
+from inference.midi_writer import write_midi
+from inference.response_cache import ResponseCache, checkpoint_fingerprint, response_key
+from inference.rule_generator import RuleNotes, rule_notes
+from inference.singleflight import SingleFlight
+from inference.runtime import RuntimeConfig, model_device
+from inference.score_conditioning import (
+    TimelineBeat,
+    generate_piece,
+    parse_timeline_csv,
+    timeline_from_rows,
+)
+from inference.responses import (
+    JSON,
+    MIDI,
+    MULTIPART,
+    ENVELOPE,
+    EVENT_STREAM,
+    envelope_header,
+    envelope_item,
+    multipart_body,
+    negotiate,
+    sse_event,
+)
+
+if TYPE_CHECKING:
+    from tokenizer import REMIGrammar
+    from inference.adapters import AdapterRegistry
+    from inference.prefix_cache import PrefixKVCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,6 +90,46 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Compress responses for clients sending Accept-Encoding: gzip (0 disables)
+GZIP_MIN_SIZE = int(os.environ.get("PSYCHOSCORE_GZIP_MIN_SIZE", 1024))
+try:
+    # MIDI compresses well, but recent Starlette skips audio/* by default
+    from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+    GZIP_OPTIONS = {"exclude_content_types": tuple(t for t in DEFAULT_EXCLUDED_CONTENT_TYPES if t != "audio/*")}
+except ImportError:
+    GZIP_OPTIONS = {}
+if GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, **GZIP_OPTIONS)
+
+# Prometheus metrics, served at /metrics
+METRICS = Registry()
+REQUESTS = METRICS.counter(
+    "psychoscore_requests", "HTTP requests by route, method and status", ("endpoint", "method", "status"),
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "psychoscore_request_duration_seconds", "HTTP request latency by route", LATENCY_BUCKETS, ("endpoint",),
+)
+TEMPERATURE = METRICS.histogram(
+    "psychoscore_temperature", "Sampling temperature by source (explicit, dynamic, default)",
+    [round(0.1 * i, 1) for i in range(1, 21)], ("source",),
+)
+BARS_GENERATED = METRICS.counter(
+    "psychoscore_bars_generated", "Bars generated (rate() gives bars per second)", ("backend",),
+)
+QUEUE_DEPTH = METRICS.gauge("psychoscore_queue_depth", "Requests waiting to generate", ("queue",))
+POOL_RUNNING = METRICS.gauge("psychoscore_pool_running", "Generations running on the worker pool")
+CACHE_LOOKUPS = METRICS.counter("psychoscore_cache_lookups", "Cache lookups by result", ("cache", "result"))
+CACHE_HIT_RATIO = METRICS.gauge("psychoscore_cache_hit_ratio", "Cache hits over lookups since start", ("cache",))
+PREFIX_CACHE_BYTES = METRICS.gauge("psychoscore_prefix_cache_bytes", "Resident bytes of cached prefix KV states and logits")
+PREFIX_CACHE_ENTRIES = METRICS.gauge("psychoscore_prefix_cache_entries", "Cached prefix KV states")
+COALESCED = METRICS.counter("psychoscore_coalesced_requests", "Requests served by joining an identical in-flight generation")
+JOBS = METRICS.gauge("psychoscore_jobs", "Stored jobs by status", ("status",))
+MODEL_READY = METRICS.gauge("psychoscore_model_ready", "1 once the configured backend can serve")
+MODEL_LOAD_SECONDS = METRICS.gauge("psychoscore_model_load_seconds", "Seconds the model took to load")
+DRAFT_TOKENS = METRICS.counter("psychoscore_draft_tokens", "Speculative draft tokens by result", ("drafter", "result"))
+DRAFT_ACCEPTANCE = METRICS.gauge("psychoscore_draft_acceptance_ratio", "Accepted over proposed draft tokens since start", ("drafter",))
+app.add_middleware(MetricsMiddleware, requests=REQUESTS, latency=REQUEST_SECONDS, clock=perf_counter)
+
 
 # === REQUEST/RESPONSE MODELS ===
 
@@ -70,7 +167,7 @@ class PhysicsState(BaseModel):
     lyapunov_exponent: float = Field(0.0, ge=-0.5, le=0.5)
 
 
-class GenerateRequest(BaseModel):
+class ProfileRequest(BaseModel):
     disc: Optional[DISCProfile] = None
     ocean: Optional[OCEANProfile] = None
     rsi: Optional[RSIProfile] = None
@@ -84,12 +181,46 @@ class GenerateRequest(BaseModel):
     key: Optional[str] = None
     mode: Optional[str] = None
     tempo: Optional[int] = Field(None, ge=40, le=200)
-    
+
+
+class GenerateRequest(ProfileRequest):
     # Generation settings
     max_bars: int = Field(32, ge=1, le=128)
     temperature: Optional[float] = Field(None, ge=0.1, le=2.0, description="If None, use dynamic temperature")
     top_p: float = Field(0.9, ge=0.1, le=1.0)
     use_dynamic_temperature: bool = Field(True, description="Calculate temperature from profile if temperature is None")
+    seed: Optional[int] = Field(None, ge=0, description="Seed for reproducible output; seeded results are cached")
+    adapter: Optional[str] = Field(None, pattern=ADAPTER_NAME_PATTERN, description="Named LoRA adapter (model backend)")
+    speculative: Optional[Literal["ngram", "draft"]] = Field(None, description="Speculative decoding drafter (model backend): n-gram table or draft model")
+    draft_tokens: int = Field(4, ge=1, le=16, description="Tokens drafted per model pass when speculative")
+
+
+# Largest accepted /generate/batch request
+MAX_BATCH_ITEMS = int(os.environ.get("PSYCHOSCORE_BATCH_MAX_ITEMS", 256))
+
+
+class BatchGenerateRequest(BaseModel):
+    requests: List[GenerateRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+# Longest piece /generate/score will render
+MAX_PIECE_BARS = int(os.environ.get("PSYCHOSCORE_PIECE_MAX_BARS", 4096))
+
+
+class ScoreGenerateRequest(BaseModel):
+    csv: Optional[str] = Field(None, description="mpn_engine score CSV (BEAT, SPEAKER, TRAUMA_R, ENTROPY_H, ...)")
+    beats: Optional[List[Dict[str, Any]]] = Field(None, description="Score rows as exported by BatchScorer")
+    speakers: Dict[str, ProfileRequest] = Field(default_factory=dict, description="Base profile per speaker; trauma/entropy come from the score")
+    bars_per_beat: int = Field(1, ge=1, le=8)
+    temperature: Optional[float] = Field(None, ge=0.1, le=2.0, description="If None, use dynamic temperature per segment")
+    top_p: float = Field(0.9, ge=0.1, le=1.0)
+    seed: Optional[int] = Field(None, ge=0)
+    adapter: Optional[str] = Field(None, pattern=ADAPTER_NAME_PATTERN, description="Named LoRA adapter (model backend)")
+
+
+class JobRequest(BaseModel):
+    kind: Literal["generate", "score", "batch"] = Field(..., description="Endpoint the job runs: /generate, /generate/score or /generate/batch")
+    request: Dict[str, Any] = Field(default_factory=dict, description="Body that endpoint accepts")
 
 
 class GenerateResponse(BaseModel):
@@ -141,59 +272,228 @@ def calculate_dynamic_temperature(
 
 # === MODEL LOADER ===
 
+# Model-backed decoding budget
+TOKENS_PER_BAR = int(os.environ.get("PSYCHOSCORE_TOKENS_PER_BAR", 32))
+MAX_NEW_TOKENS = 2048
+
+# Mask tokens that would break REMI structure while sampling ("0" disables)
+GRAMMAR = os.environ.get("PSYCHOSCORE_GRAMMAR", "1") != "0"
+
+# Speculative decoding drafters: a small checkpoint sharing the model's
+# vocabulary, and a tokenized dataset split to build the n-gram table
+# from (without it, n-grams come from the sequence being generated)
+DRAFT_MODEL = os.environ.get("PSYCHOSCORE_DRAFT_MODEL") or None
+DRAFT_NGRAM = os.environ.get("PSYCHOSCORE_DRAFT_NGRAM") or None
+
+
+# Model load states, as reported by /health
+NOT_LOADED, LOADING, READY, FAILED = "not_loaded", "loading", "ready", "failed"
+
 
 class PsychoscoreInference:
     """Handles model loading and generation"""
     
     def __init__(self, model_path: str):
         self.model_path = Path(model_path)
-        self.model = None
+        self._model = None
         self.tokenizer = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device: Optional[str] = None
+        self._music_ids = frozenset()
+        self.grammar: Optional['REMIGrammar'] = None
+        self.prefix_cache: Optional['PrefixKVCache'] = None
+        self.drafters: Dict[str, Any] = {}
+        self.adapters: Optional['AdapterRegistry'] = None
+        self.state = NOT_LOADED
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.runtime = RuntimeConfig.from_env()
+        self._load_lock = threading.Lock()
         
     def load(self):
-        """Load model and tokenizer"""
+        """
+        Load model and tokenizer (once; concurrent callers wait for the first).
+        
+        Raises:
+            Exception: whatever stopped the load; state becomes "failed"
+        """
+        with self._load_lock:
+            if self.state == READY:
+                return
+            self.state = LOADING
+            started = perf_counter()
+            try:
+                self._load_model()
+            except Exception as e:
+                self.state = FAILED
+                self.load_error = str(e)
+                raise
+            self.load_seconds = perf_counter() - started
+            self.load_error = None
+            self.state = READY
+    
+    def _load_model(self):
+        # Heavy imports happen here, not at server import
+        from tokenizer import PsychoscoreTokenizer, REMIGrammar
+        from inference.adapters import AdapterRegistry
+        from inference.prefix_cache import PrefixKVCache
+        from inference.runtime import load_model, model_device
+        
         logger.info(f"Loading model from {self.model_path}")
         
         # Load tokenizer
         self.tokenizer = PsychoscoreTokenizer.from_pretrained(str(self.model_path))
         
-        # Load base model
-        base_model = AutoModelForCausalLM.from_pretrained(
-            str(self.model_path),
-            device_map="auto",
-            torch_dtype=torch.float16,
-            trust_remote_code=True,
+        # Base model plus LoRA adapters, in the configured runtime profile
+        self.runtime = self.runtime.resolve()
+        self._model = load_model(self.model_path, self.runtime)
+        self.device = str(model_device(self._model))
+        
+        # REMI token IDs that can be decoded to MIDI (no specials, no psych prefix)
+        special = set(self.tokenizer.special_tokens_ids)
+        self._music_ids = frozenset(
+            i for i in self.tokenizer._vocab_inv if i < 10000 and i not in special
         )
+        self.grammar = REMIGrammar.from_tokenizer(self.tokenizer) if GRAMMAR else None
+        # ONNX Runtime sessions take their own cache format, so prefix reuse
+        # and speculative decoding (which crops the cache) are off
+        self.prefix_cache = PrefixKVCache.from_env() if self.runtime.backend != "onnx" else None
+        self.drafters = self._load_drafters() if self.runtime.backend != "onnx" else {}
         
-        # Check if LoRA adapters exist (support both .bin and .safetensors)
-        adapter_path_bin = self.model_path / "adapter_model.bin"
-        adapter_path_st = self.model_path / "adapter_model.safetensors"
+        # Named adapters share these base weights (PSYCHOSCORE_ADAPTER_DIR)
+        self.adapters = AdapterRegistry.from_env(self._model, on_unload=self._forget_adapter)
+        logger.info(f"Model loaded on {self.device} ({self.runtime.describe()})")
+    
+    def _load_drafters(self) -> Dict[str, Any]:
+        """Speculative decoding drafters by request name ("ngram" always, "draft" if configured)"""
+        from inference.runtime import load_model
+        from inference.speculative import ModelDraft, NGramDraft
         
-        if adapter_path_bin.exists() or adapter_path_st.exists():
-            logger.info("Loading LoRA adapters")
-            self.model = PeftModel.from_pretrained(base_model, str(self.model_path))
+        drafters: Dict[str, Any] = {}
+        if DRAFT_NGRAM:
+            logger.info(f"Building n-gram drafts from {DRAFT_NGRAM}")
+            drafters["ngram"] = NGramDraft.from_dataset(DRAFT_NGRAM)
         else:
-            self.model = base_model
+            drafters["ngram"] = NGramDraft()
+        if DRAFT_MODEL:
+            logger.info(f"Loading draft model from {DRAFT_MODEL}")
+            draft = load_model(DRAFT_MODEL, self.runtime)
+            if draft.config.vocab_size != self._model.config.vocab_size:
+                raise ValueError(
+                    f"Draft model vocabulary ({draft.config.vocab_size}) differs "
+                    f"from the model's ({self._model.config.vocab_size})"
+                )
+            drafters["draft"] = ModelDraft(draft)
+        return drafters
+    
+    def _forget_adapter(self, name: str):
+        """Drop prefix states computed under an unloaded adapter"""
+        if self.prefix_cache is not None:
+            self.prefix_cache.discard(name)
+    
+    @property
+    def model(self):
+        """
+        Current model object, for inspection only.
         
-        self.model.eval()
-        logger.info(f"Model loaded on {self.device}")
+        With adapters the registry may wrap or strip the base, and the
+        active adapter can change at any time; decode through use_adapter().
+        """
+        if self.adapters is not None:
+            return self.adapters.model
+        return self._model
     
-    def generate(
-        self,
-        profile: PsychometricProfile,
-        max_bars: int = 32,
-        temperature: float = 0.8,
-        top_p: float = 0.9,
-    ) -> bytes:
-        """Generate MIDI from psychometric profile using rule-based approach"""
+    @contextmanager
+    def use_adapter(self, name: Optional[str] = None):
+        """
+        Model and prefix cache to decode with under a named adapter.
         
-        # Use profile parameters directly for MIDI generation
-        # This is a rule-based fallback until model is trained with proper music data
+        Raises:
+            AdapterNotFound: if the adapter does not exist
+        """
+        if self.adapters is None:
+            if name:
+                raise AdapterNotFound(name)
+            yield self._model, self.prefix_cache
+            return
+        with self.adapters.use(name) as model:
+            cache = self.prefix_cache
+            if cache is not None and name and name != self.adapters.default:
+                cache = cache.scoped(name)
+            yield model, cache
+    
+    def encode_prefix(self, profile: PsychometricProfile) -> List[int]:
+        """Psychometric prefix tokens the model is conditioned on"""
+        return self.tokenizer.encode_psychometric_profile(profile)
+    
+    @staticmethod
+    def max_new_tokens(max_bars: int) -> int:
+        """Decoding budget for a requested number of bars"""
+        return min(MAX_NEW_TOKENS, max_bars * TOKENS_PER_BAR)
+    
+    def tokens_to_midi(self, tokens: List[int]) -> bytes:
+        """Decode generated REMI tokens to MIDI bytes, skipping non-music IDs"""
+        music = [t for t in tokens if t in self._music_ids]
+        if not music:
+            music = [self.tokenizer.vocab["Bar_None"]]
+        return self.tokenizer.decode(music).dumps_midi()
+    
+    def generate_batch(
+        self,
+        prefixes: List[List[int]],
+        temperatures: List[float],
+        top_ps: List[float],
+        max_new_tokens: List[int],
+        seeds: Optional[List[Optional[int]]] = None,
+        adapter: Optional[str] = None,
+    ) -> List[bytes]:
+        """Model-backed generation for a micro-batch of prefixes, as MIDI bytes per row"""
+        rows = self.decode_rows(prefixes, temperatures, top_ps, max_new_tokens, seeds, adapter)
+        return [self.tokens_to_midi(row) for row in rows]
+    
+    def decode_rows(
+        self,
+        prefixes: List[List[int]],
+        temperatures: List[float],
+        top_ps: List[float],
+        max_new_tokens: List[int],
+        seeds: Optional[List[Optional[int]]] = None,
+        adapter: Optional[str] = None,
+    ) -> List[List[int]]:
+        """
+        Decode a batch of prefixes in one pass.
         
-        from midiutil import MIDIFile
-        import random
+        Rows decode together up to the longest budget, then each row is
+        cut to its own budget. Seeded rows get their own RNG so their
+        output does not depend on batch mates. All rows share `adapter`.
+        """
+        import torch
+        from inference.decoding import decode_batch
         
+        with self.use_adapter(adapter) as (model, prefix_cache):
+            generators = None
+            if seeds and any(seed is not None for seed in seeds):
+                device = model_device(model)
+                generators = [
+                    torch.Generator(device=device).manual_seed(seed) if seed is not None else None
+                    for seed in seeds
+                ]
+            rows = decode_batch(
+                model,
+                prefixes,
+                temperatures,
+                top_ps,
+                max_new_tokens=max(max_new_tokens),
+                pad_id=self.tokenizer.pad_token_id,
+                eos_id=self.tokenizer.vocab["EOS_None"],
+                logits_hook=self.grammar,
+                generators=generators,
+                prefix_cache=prefix_cache,
+            )
+        return [row[:n] for row, n in zip(rows, max_new_tokens)]
+    
+    @staticmethod
+    def rule_settings(profile: PsychometricProfile) -> Tuple[List[int], int, int]:
+        """Scale intervals, tempo (BPM) and base velocity for the rule-based generator"""
         # Derive musical parameters from psychometric profile
         rsi = profile.rsi
         dominant = max(rsi.items(), key=lambda x: x[1])[0] if isinstance(rsi, dict) else 'symbolic'
@@ -218,161 +518,1221 @@ class PsychoscoreInference:
         disc = profile.disc if hasattr(profile, 'disc') and profile.disc else {'D': 0.5}
         base_velocity = int(60 + (disc.get('D', 0.5) * 40))
         
-        # Create MIDI file
-        midi = MIDIFile(1)  # One track
-        track = 0
-        channel = 0
-        midi.addTempo(track, 0, tempo)
+        return scale, tempo, base_velocity
+    
+    def rule_notes(
+        self,
+        profile: PsychometricProfile,
+        max_bars: int = 32,
+        seed: Optional[int] = None,
+    ) -> RuleNotes:
+        """All rule-based notes for a profile as arrays (same seed, same notes)"""
+        scale, _, base_velocity = self.rule_settings(profile)
+        entropy = profile.entropy if hasattr(profile, 'entropy') else 0.3
+        return rule_notes(scale, base_velocity, entropy, max_bars, seed)
+    
+    def iter_bars(
+        self,
+        profile: PsychometricProfile,
+        max_bars: int = 32,
+        seed: Optional[int] = None,
+    ) -> Iterator[List[Tuple[int, float, float, int]]]:
+        """
+        Rule-based generation, one bar at a time.
+        
+        Yields each bar's notes as (pitch, start_beat, duration_beats,
+        velocity) with absolute start times.
+        """
+        return self.rule_notes(profile, max_bars, seed).bars()
+    
+    def generate(
+        self,
+        profile: PsychometricProfile,
+        max_bars: int = 32,
+        temperature: float = 0.8,
+        top_p: float = 0.9,
+        seed: Optional[int] = None,
+    ) -> bytes:
+        """Generate MIDI from psychometric profile using rule-based approach"""
+        
+        # Use profile parameters directly for MIDI generation
+        # This is a rule-based fallback until model is trained with proper music data
         
-        # Generate melodic phrase
-        root = 60  # Middle C
-        time = 0
+        _, tempo, _ = self.rule_settings(profile)
+        notes = self.rule_notes(profile, max_bars, seed)
+        return write_midi(notes.pitch, notes.start, notes.duration, notes.velocity, tempo=tempo)
+    
+    def decode_speculative(
+        self,
+        prefix: List[int],
+        temperature: float,
+        top_p: float,
+        max_new_tokens: int,
+        drafter: str,
+        draft_tokens: int = 4,
+        seed: Optional[int] = None,
+        adapter: Optional[str] = None,
+    ) -> Iterator[int]:
+        """
+        Decode one prefix with speculative decoding, yielding tokens as committed.
         
-        for bar in range(max_bars):
-            notes_per_bar = int(2 + entropy * 6)  # 2-8 notes per bar
-            beat_duration = 4.0 / notes_per_bar
-            
-            for i in range(notes_per_bar):
-                # Choose note from scale with some randomness based on entropy
-                if random.random() < entropy:
-                    interval = random.choice(scale)
-                else:
-                    interval = scale[i % len(scale)]
-                
-                pitch = root + interval + (bar % 2) * 12  # Octave variation
-                duration = beat_duration * (0.8 + random.random() * 0.4)
-                velocity = base_velocity + random.randint(-10, 10)
-                velocity = max(40, min(127, velocity))
-                
-                midi.addNote(track, channel, pitch, time, duration, velocity)
-                time += beat_duration
+        Samples from the same distribution as decode_rows, in fewer
+        model passes; seeded output differs from the batched path's.
+        """
+        import torch
+        from inference.speculative import speculative_decode
         
-        # Write to bytes
-        midi_bytes = io.BytesIO()
-        midi.writeFile(midi_bytes)
-        return midi_bytes.getvalue()
+        with self.use_adapter(adapter) as (model, prefix_cache):
+            generator = None
+            if seed is not None:
+                generator = torch.Generator(device=model_device(model)).manual_seed(seed)
+            yield from speculative_decode(
+                model,
+                prefix,
+                self.drafters[drafter],
+                temperature,
+                top_p,
+                max_new_tokens=max_new_tokens,
+                pad_id=self.tokenizer.pad_token_id,
+                eos_id=self.tokenizer.vocab["EOS_None"],
+                draft_tokens=draft_tokens,
+                logits_hook=self.grammar,
+                generator=generator,
+                prefix_cache=prefix_cache,
+            )
+    
+    def generate_speculative(
+        self,
+        profile: PsychometricProfile,
+        max_bars: int,
+        temperature: float,
+        top_p: float,
+        drafter: str,
+        draft_tokens: int = 4,
+        seed: Optional[int] = None,
+        adapter: Optional[str] = None,
+    ) -> bytes:
+        """Model-backed generation of one request with speculative decoding, as MIDI bytes"""
+        tokens = self.decode_speculative(
+            self.encode_prefix(profile), temperature, top_p, self.max_new_tokens(max_bars),
+            drafter, draft_tokens, seed, adapter,
+        )
+        return self.tokens_to_midi(list(tokens))
+    
+    def tokens_to_notes(self, tokens: List[int], bar: int) -> List[Tuple[int, float, float, int]]:
+        """
+        Notes of one bar of REMI tokens, as (pitch, start_beat,
+        duration_beats, velocity) offset to bar `bar` (4/4 assumed).
+        """
+        bar_id = self.tokenizer.vocab["Bar_None"]
+        music = [t for t in tokens if t in self._music_ids]
+        if not music or music[0] != bar_id:
+            music.insert(0, bar_id)
+        score = self.tokenizer.decode(music)
+        tpq = score.ticks_per_quarter
+        offset = bar * 4.0
+        return [
+            (note.pitch, offset + note.time / tpq, note.duration / tpq, note.velocity)
+            for track in score.tracks
+            for note in track.notes
+        ]
+    
+    def iter_model_bars(
+        self,
+        profile: PsychometricProfile,
+        max_bars: int = 32,
+        temperature: float = 0.8,
+        top_p: float = 0.9,
+        seed: Optional[int] = None,
+        adapter: Optional[str] = None,
+        speculative: Optional[str] = None,
+        draft_tokens: int = 4,
+    ) -> Iterator[List[Tuple[int, float, float, int]]]:
+        """Model-backed generation, yielding each bar's notes once its next Bar token is sampled"""
+        import torch
+        from inference.decoding import iter_decode
+        
+        if speculative:
+            tokens = self.decode_speculative(
+                self.encode_prefix(profile), temperature, top_p, self.max_new_tokens(max_bars),
+                speculative, draft_tokens, seed, adapter,
+            )
+            for bar, bar_tokens in enumerate(self.split_bars(tokens, max_bars)):
+                yield self.tokens_to_notes(bar_tokens, bar)
+            return
+        
+        with self.use_adapter(adapter) as (model, prefix_cache):
+            generator = None
+            if seed is not None:
+                generator = torch.Generator(device=model_device(model)).manual_seed(seed)
+            tokens = iter_decode(
+                model,
+                self.encode_prefix(profile),
+                temperature,
+                top_p,
+                max_new_tokens=self.max_new_tokens(max_bars),
+                pad_id=self.tokenizer.pad_token_id,
+                eos_id=self.tokenizer.vocab["EOS_None"],
+                logits_hook=self.grammar,
+                generator=generator,
+                prefix_cache=prefix_cache,
+            )
+            for bar, bar_tokens in enumerate(self.split_bars(tokens, max_bars)):
+                yield self.tokens_to_notes(bar_tokens, bar)
+    
+    def split_bars(self, tokens: Iterable[int], max_bars: int) -> Iterator[List[int]]:
+        """Group a (possibly streaming) token sequence into at most max_bars bars"""
+        bar_id = self.tokenizer.vocab["Bar_None"]
+        current: List[int] = []
+        bars = 0
+        for token in tokens:
+            if token == bar_id and current:
+                yield current
+                bars += 1
+                current = []
+                if bars >= max_bars:
+                    return
+            current.append(token)
+        if current:
+            yield current
+    
+    def tokens_to_bars(self, tokens: List[int], max_bars: int) -> List[List[Tuple[int, float, float, int]]]:
+        """Notes per bar for a decoded token sequence (bar-relative offsets as in tokens_to_notes)"""
+        return [self.tokens_to_notes(bar_tokens, bar) for bar, bar_tokens in enumerate(self.split_bars(tokens, max_bars))]
 
 
 
 # === GLOBAL MODEL INSTANCE ===
 inference: Optional[PsychoscoreInference] = None
+pool: Optional[GenerationPool] = None
+batcher: Optional[MicroBatcher] = None
+response_cache: Optional[ResponseCache] = None
+flights: Optional[SingleFlight] = None
+jobs: Optional[JobStore] = None
+job_runner: Optional[JobRunner] = None
+# Metrics shared with the other pre-forked workers (PSYCHOSCORE_METRICS_DIR)
+shared_metrics: Optional[MultiprocessMetrics] = None
+_metrics_publisher: Optional[asyncio.Future] = None
+
+# Stored jobs run at once per process (each uses the worker pool)
+JOB_CONCURRENCY = int(os.environ.get("PSYCHOSCORE_JOB_CONCURRENCY", 1))
+
+# Share one generation among identical concurrent requests: "seeded"
+# (deterministic requests only), "all" (unseeded ones too, so they get
+# the same sample) or "off"
+COALESCE = os.environ.get("PSYCHOSCORE_COALESCE", "seeded")
+COALESCE_MODES = ("seeded", "all", "off")
+
+# "rules" (profile-driven fallback) or "model" (batched model decoding)
+BACKEND = os.environ.get("PSYCHOSCORE_BACKEND", "rules")
+
+# When to load the model: "eager" (before serving), "background" (right
+# after startup, serving meanwhile) or "lazy" (on first model-backed use).
+# Unset: background for the model backend, lazy for rules.
+LOAD_MODE = os.environ.get("PSYCHOSCORE_LOAD_MODE", "")
+LOAD_MODES = ("eager", "background", "lazy")
+
+# Fingerprint of MODEL_PATH at startup, part of every response key
+checkpoint_id: Optional[str] = None
+
+# Shared model load, started by the first caller of start_model_load()
+_model_loader: Optional[asyncio.Future] = None
+
+# Model loaded by a pre-fork parent before its workers start
+_preloaded: Optional[PsychoscoreInference] = None
+
+
+def model_path_from_env() -> str:
+    return os.environ.get("MODEL_PATH", "./checkpoints/psychoscore/final")
+
+
+def preload():
+    """
+    Load the model in a pre-fork parent so workers share its weights
+    copy-on-write. Does nothing for the rules backend.
+    """
+    global _preloaded
+    if BACKEND != "model":
+        return
+    _preloaded = PsychoscoreInference(model_path_from_env())
+    try:
+        _preloaded.load()
+        logger.info(f"Preloaded model in {_preloaded.load_seconds:.1f}s on {_preloaded.device}")
+    except Exception as e:
+        logger.error(f"Failed to preload model: {e}")
+
+
+def load_mode() -> str:
+    """Effective load mode for the configured backend"""
+    if LOAD_MODE:
+        if LOAD_MODE not in LOAD_MODES:
+            raise ValueError(f"PSYCHOSCORE_LOAD_MODE must be one of {', '.join(LOAD_MODES)}")
+        return LOAD_MODE
+    return "background" if BACKEND == "model" else "lazy"
+
+
+def start_model_load() -> asyncio.Future:
+    """Begin loading the model off the event loop (idempotent)"""
+    global _model_loader
+    if _model_loader is None:
+        _model_loader = asyncio.get_running_loop().run_in_executor(None, inference.load)
+        _model_loader.add_done_callback(_log_model_load)
+    return _model_loader
+
+
+def _log_model_load(future: asyncio.Future):
+    if future.cancelled():
+        return
+    if future.exception() is not None:
+        logger.error(f"Failed to load model: {future.exception()}")
+    else:
+        logger.info(f"Model ready in {inference.load_seconds:.1f}s on {inference.device}")
+
+
+async def ensure_model():
+    """
+    Wait for the model, starting the load if nobody has yet.
+    
+    Raises:
+        HTTPException: 503 if the model failed to load
+    """
+    if inference is not None and inference.state == READY:
+        return
+    if inference is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    try:
+        # Shielded: a caller giving up must not cancel the load for everyone
+        await asyncio.shield(start_model_load())
+    except Exception:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+
+def is_ready() -> bool:
+    """Ready to serve the configured backend (rules need no model)"""
+    if pool is None:
+        return False
+    return BACKEND != "model" or inference.state == READY
+
+
+def _run_generation(profile: PsychometricProfile,
+                    max_bars: int,
+                    temperature: float,
+                    top_p: float,
+                    seed: Optional[int] = None) -> bytes:
+    """Pool entry point (module-level so process pools can pickle it)"""
+    return inference.generate(
+        profile,
+        max_bars=max_bars,
+        temperature=temperature,
+        top_p=top_p,
+        seed=seed,
+    )
+
+
+def _run_batch(prefixes: List[List[int]],
+               temperatures: List[float],
+               top_ps: List[float],
+               max_new_tokens: List[int],
+               seeds: Optional[List[Optional[int]]] = None,
+               adapter: Optional[str] = None) -> List[bytes]:
+    """Micro-batch entry point; process workers use the model they forked with"""
+    return inference.generate_batch(prefixes, temperatures, top_ps, max_new_tokens, seeds, adapter)
+
+
+def _run_speculative(profile: PsychometricProfile,
+                     max_bars: int,
+                     temperature: float,
+                     top_p: float,
+                     seed: Optional[int],
+                     adapter: Optional[str],
+                     drafter: str,
+                     draft_tokens: int) -> bytes:
+    """Pool entry point for one speculatively decoded request"""
+    return inference.generate_speculative(
+        profile, max_bars, temperature, top_p, drafter, draft_tokens, seed, adapter,
+    )
+
+
+def _iter_generation(
+    backend: str,
+    profile: PsychometricProfile,
+    max_bars: int,
+    temperature: float,
+    top_p: float,
+    seed: Optional[int] = None,
+    adapter: Optional[str] = None,
+    speculative: Optional[str] = None,
+    draft_tokens: int = 4,
+) -> Iterator[List[Tuple[int, float, float, int]]]:
+    """Streaming pool entry point: bars from the rule-based or model generator"""
+    if backend == "model":
+        return inference.iter_model_bars(
+            profile, max_bars, temperature, top_p, seed, adapter, speculative, draft_tokens,
+        )
+    return inference.iter_bars(profile, max_bars, seed)
+
+
+def _run_piece(
+    backend: str,
+    timeline: List[TimelineBeat],
+    speaker_profiles: Dict[str, PsychometricProfile],
+    bars_per_beat: int,
+    temperature: Optional[float],
+    top_p: float,
+    seed: Optional[int],
+    adapter: Optional[str] = None,
+) -> bytes:
+    """Score-conditioned pool entry point; fixed temperature, else dynamic per segment"""
+    def temperature_fn(profile: PsychometricProfile) -> float:
+        if temperature is not None:
+            return temperature
+        return calculate_dynamic_temperature(profile.trauma, profile.entropy, profile.rsi)
+    
+    return generate_piece(
+        inference,
+        timeline,
+        speaker_profiles,
+        bars_per_beat=bars_per_beat,
+        backend=backend,
+        temperature_fn=temperature_fn,
+        top_p=top_p,
+        seed=seed,
+        batch_size=batcher.config.max_size if batcher is not None else 32,
+        adapter=adapter,
+    )
 
 
 @app.on_event("startup")
 async def load_model():
-    """Load model on startup"""
-    global inference
+    """Start serving; load the model now, in the background or on demand"""
+    global inference, pool, batcher, response_cache, flights, jobs, job_runner, _model_loader, checkpoint_id
+    global shared_metrics, _metrics_publisher
     
-    model_path = os.environ.get("MODEL_PATH", "./checkpoints/psychoscore/final")
-    inference = PsychoscoreInference(model_path)
+    # Pre-fork workers inherit the parent's loaded model (see preload)
+    inference = _preloaded if _preloaded is not None else PsychoscoreInference(model_path_from_env())
+    _model_loader = None
     
-    try:
-        inference.load()
-    except Exception as e:
-        logger.error(f"Failed to load model: {e}")
-        logger.warning("Server running without model - generate endpoint will fail")
+    pool_config = PoolConfig.from_env()
+    mode = load_mode()
+    if mode != "eager" and BACKEND == "model" and pool_config.kind == "process":
+        # Process workers fork the parent, so the model must be in memory first
+        logger.info("Process pool with the model backend: loading the model eagerly")
+        mode = "eager"
+    
+    if mode == "eager":
+        try:
+            await start_model_load()
+        except Exception:
+            logger.warning("Server running without model - model-backed generation will fail")
+    
+    pool = GenerationPool(pool_config)
+    pool.start()
+    response_cache = ResponseCache.from_env()
+    checkpoint_id = checkpoint_fingerprint(model_path_from_env())
+    if COALESCE not in COALESCE_MODES:
+        raise ValueError(f"PSYCHOSCORE_COALESCE must be one of {', '.join(COALESCE_MODES)}")
+    flights = SingleFlight() if COALESCE != "off" else None
+    
+    jobs = JobStore.from_env()
+    if jobs is not None:
+        requeued = jobs.requeue_orphans()
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted jobs")
+        job_runner = JobRunner(jobs, run_job, concurrency=JOB_CONCURRENCY)
+        job_runner.start()
+    
+    shared_metrics = MultiprocessMetrics.from_env(METRICS)
+    if shared_metrics is not None:
+        _metrics_publisher = asyncio.ensure_future(shared_metrics.run(refresh_metrics))
+    
+    if BACKEND == "model":
+        batcher = MicroBatcher(_run_batch, pool, BatchConfig.from_env())
+        batcher.start()
+    
+    if mode == "background":
+        start_model_load()
+
+
+@app.on_event("shutdown")
+async def stop_pool():
+    """Cancel queued generations on shutdown; unfinished jobs resume on restart"""
+    global batcher, jobs, job_runner, shared_metrics, _metrics_publisher
+    if _metrics_publisher is not None:
+        _metrics_publisher.cancel()
+        _metrics_publisher = None
+    if shared_metrics is not None:
+        # Final totals stay in the directory for the surviving workers to report
+        refresh_metrics()
+        shared_metrics.write()
+        shared_metrics = None
+    if job_runner is not None:
+        await job_runner.stop()
+        job_runner = None
+    if jobs is not None:
+        jobs.close()
+        jobs = None
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    if pool is not None:
+        pool.shutdown()
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint.
+    
+    `live` is true while the process answers; `ready` once the configured
+    backend can serve (immediately for rules, after the model loads for
+    the model backend).
+    """
     return {
         "status": "healthy",
+        "pid": os.getpid(),
+        "live": True,
+        "ready": is_ready(),
+        "model_state": inference.state if inference else NOT_LOADED,
+        "model_error": inference.load_error if inference else None,
+        "model_load_seconds": inference.load_seconds if inference else None,
         "model_loaded": inference is not None and inference.model is not None,
         "device": inference.device if inference else None,
+        "runtime": inference.runtime.describe() if inference and inference.state == READY else None,
+        "backend": BACKEND,
+        "pool": pool.stats() if pool else None,
+        "batcher": batcher.stats() if batcher else None,
+        "prefix_cache": inference.prefix_cache.stats() if inference and inference.prefix_cache else None,
+        "adapters": inference.adapters.stats() if inference and inference.adapters else None,
+        "response_cache": response_cache.stats() if response_cache else None,
+        "coalescing": flights.stats() if flights else None,
+        "speculative": {name: d.stats() for name, d in inference.drafters.items()} if inference and inference.drafters else None,
+        "jobs": jobs.stats() if jobs else None,
     }
 
 
-@app.post("/generate", response_model=GenerateResponse)
-async def generate_midi(request: GenerateRequest):
-    """Generate MIDI from psychometric profile"""
-    
-    if inference is None or inference.model is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and answering"""
+    return {"live": True}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 503 until the configured backend can serve"""
+    body = {
+        "ready": is_ready(),
+        "backend": BACKEND,
+        "model_state": inference.state if inference else NOT_LOADED,
+    }
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics for this process, or for all pre-forked workers.
     
-    try:
-        # Build RSI dict for temperature calculation
-        rsi_dict = request.rsi.model_dump() if request.rsi else {'real': 0.33, 'symbolic': 0.34, 'imaginary': 0.33}
-        
-        # Calculate temperature: use explicit value, or dynamic based on profile
-        if request.temperature is not None:
-            temperature = request.temperature
-        elif request.use_dynamic_temperature:
-            temperature = calculate_dynamic_temperature(
-                trauma=request.trauma,
-                entropy=request.entropy,
-                rsi=rsi_dict,
-            )
-            logger.info(f"Dynamic temperature: {temperature:.2f} (trauma={request.trauma:.2f}, entropy={request.entropy:.2f})")
-        else:
-            temperature = 0.8  # Default fallback
-        
-        # Build psychometric profile
-        profile = PsychometricProfile(
-            disc=request.disc.model_dump() if request.disc else {'D': 0.5, 'I': 0.5, 'S': 0.5, 'C': 0.5},
-            ocean=request.ocean.model_dump() if request.ocean else {'O': 0.5, 'C': 0.5, 'E': 0.5, 'A': 0.5, 'N': 0.5},
-            rsi=rsi_dict,
+    Request counts and latencies, temperatures and generated bars are
+    recorded as requests run; queue depth, cache statistics and model
+    state are read from their owners here. With PSYCHOSCORE_METRICS_DIR
+    set, counters are summed over every worker and gauges carry a pid.
+    """
+    refresh_metrics()
+    if shared_metrics is not None:
+        return Response(content=shared_metrics.render(), media_type=METRICS_CONTENT_TYPE)
+    return Response(content=METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def refresh_metrics():
+    """Copy values owned by the pool, caches, jobs and drafters into their metrics"""
+    if pool is not None:
+        stats = pool.stats()
+        QUEUE_DEPTH.set("pool", value=stats["queued"])
+        POOL_RUNNING.set(value=stats["running"])
+    if batcher is not None:
+        QUEUE_DEPTH.set("batcher", value=batcher.stats()["pending"])
+    caches = {
+        "response": response_cache,
+        "prefix": inference.prefix_cache if inference else None,
+    }
+    for name, cache in caches.items():
+        if cache is None:
+            continue
+        stats = cache.stats()
+        CACHE_LOOKUPS.set_total(name, "hit", value=stats["hits"])
+        CACHE_LOOKUPS.set_total(name, "miss", value=stats["misses"])
+        CACHE_HIT_RATIO.set(name, value=stats["hit_rate"])
+        if name == "prefix":
+            PREFIX_CACHE_BYTES.set(value=stats["bytes"])
+            PREFIX_CACHE_ENTRIES.set(value=stats["entries"])
+    if jobs is not None:
+        for status, count in jobs.stats().items():
+            JOBS.set(status, value=count)
+    for name, drafter in (inference.drafters if inference else {}).items():
+        stats = drafter.stats()
+        DRAFT_TOKENS.set_total(name, "accepted", value=stats["accepted"])
+        DRAFT_TOKENS.set_total(name, "rejected", value=stats["proposed"] - stats["accepted"])
+        DRAFT_ACCEPTANCE.set(name, value=stats["acceptance_rate"])
+    MODEL_READY.set(value=int(is_ready()))
+    if inference is not None and inference.load_seconds is not None:
+        MODEL_LOAD_SECONDS.set(value=inference.load_seconds)
+
+
+def resolve_temperature(request: GenerateRequest, rsi_dict: Dict[str, float]) -> float:
+    """Explicit temperature, else dynamic from profile, else default"""
+    if request.temperature is not None:
+        TEMPERATURE.observe(request.temperature, "explicit")
+        return request.temperature
+    if request.use_dynamic_temperature:
+        temperature = calculate_dynamic_temperature(
             trauma=request.trauma,
             entropy=request.entropy,
-            dark_triad=request.dark_triad.model_dump() if request.dark_triad else {'machiavellianism': 0.1, 'narcissism': 0.1, 'psychopathy': 0.1},
-            cognitive_biases=request.cognitive_biases,
-            physics=request.physics.model_dump() if request.physics else {'hamiltonian_energy': 0.5, 'ising_spin': '+', 'granovetter_threshold': 0.5, 'lyapunov_exponent': 0.0},
-            key=request.key,
-            mode=request.mode,
-            tempo=request.tempo,
+            rsi=rsi_dict,
         )
-        
-        # Generate MIDI
-        midi_bytes = inference.generate(
-            profile,
-            max_bars=request.max_bars,
+        logger.info(f"Dynamic temperature: {temperature:.2f} (trauma={request.trauma:.2f}, entropy={request.entropy:.2f})")
+        TEMPERATURE.observe(temperature, "dynamic")
+        return temperature
+    TEMPERATURE.observe(0.8, "default")
+    return 0.8  # Default fallback
+
+
+def build_profile(request: ProfileRequest) -> PsychometricProfile:
+    """Build a PsychometricProfile from a request, filling defaults"""
+    return PsychometricProfile(
+        disc=request.disc.model_dump() if request.disc else {'D': 0.5, 'I': 0.5, 'S': 0.5, 'C': 0.5},
+        ocean=request.ocean.model_dump() if request.ocean else {'O': 0.5, 'C': 0.5, 'E': 0.5, 'A': 0.5, 'N': 0.5},
+        rsi=request.rsi.model_dump() if request.rsi else {'real': 0.33, 'symbolic': 0.34, 'imaginary': 0.33},
+        trauma=request.trauma,
+        entropy=request.entropy,
+        dark_triad=request.dark_triad.model_dump() if request.dark_triad else {'machiavellianism': 0.1, 'narcissism': 0.1, 'psychopathy': 0.1},
+        cognitive_biases=request.cognitive_biases,
+        physics=request.physics.model_dump() if request.physics else {'hamiltonian_energy': 0.5, 'ising_spin': '+', 'granovetter_threshold': 0.5, 'lyapunov_exponent': 0.0},
+        key=request.key,
+        mode=request.mode,
+        tempo=request.tempo,
+    )
+
+
+async def run_on_pool(fn, *args, http_request: Optional[Request] = None):
+    """
+    Run blocking generation work on the pool, mapping pool errors to HTTP.
+    
+    503 + Retry-After when saturated, 504 on timeout, 499 if the client
+    disconnected while waiting.
+    """
+    if pool is None:
+        raise HTTPException(status_code=503, detail="Worker pool not started")
+    try:
+        return await pool.run(
+            fn, *args,
+            is_disconnected=http_request.is_disconnected if http_request else None,
+        )
+    except (PoolSaturated, GenerationTimeout, ClientDisconnected) as e:
+        raise pool_error_to_http(e)
+
+
+async def run_batched(profile: PsychometricProfile,
+                      max_bars: int,
+                      temperature: float,
+                      top_p: float,
+                      seed: Optional[int] = None,
+                      adapter: Optional[str] = None) -> bytes:
+    """Model-backed generation through the micro-batcher"""
+    await ensure_model()
+    try:
+        return await batcher.submit(
+            inference.encode_prefix(profile),
             temperature=temperature,
-            top_p=request.top_p,
+            top_p=top_p,
+            max_new_tokens=inference.max_new_tokens(max_bars),
+            seed=seed,
+            adapter=adapter,
         )
-        
-        # Encode to base64
-        import base64
-        midi_b64 = base64.b64encode(midi_bytes).decode('utf-8')
+    except (PoolSaturated, GenerationTimeout, ClientDisconnected) as e:
+        raise pool_error_to_http(e)
 
-        
-        return GenerateResponse(
-            success=True,
-            midi_base64=midi_b64,
-            parameters={
-                "bars": request.max_bars,
-                "temperature": temperature,
-                "dynamic_temperature_used": request.temperature is None and request.use_dynamic_temperature,
-                "rsi_dominant": profile.get_rsi_dominant(),
-            }
+
+async def check_adapter(name: Optional[str]):
+    """
+    Validate a requested adapter before generation.
+    
+    Raises:
+        HTTPException: 422 on the rules backend, 404 for unknown adapters
+    """
+    if name is None:
+        return
+    if BACKEND != "model":
+        raise HTTPException(status_code=422, detail="Adapters need the model backend")
+    await ensure_model()
+    if inference.adapters is None or name not in inference.adapters.available():
+        raise HTTPException(status_code=404, detail=f"Unknown adapter '{name}'")
+
+
+async def check_speculative(name: Optional[str]):
+    """
+    Validate a requested speculative drafter before generation.
+    
+    Raises:
+        HTTPException: 422 on the rules backend or for a drafter that isn't configured
+    """
+    if name is None:
+        return
+    if BACKEND != "model":
+        raise HTTPException(status_code=422, detail="Speculative decoding needs the model backend")
+    await ensure_model()
+    if name not in inference.drafters:
+        raise HTTPException(status_code=422, detail=f"Speculative drafter '{name}' is not configured")
+
+
+def pool_error_to_http(error: Exception) -> HTTPException:
+    """Map worker pool errors to HTTP errors"""
+    if isinstance(error, PoolSaturated):
+        return HTTPException(
+            status_code=503,
+            detail="Generation queue is full",
+            headers={"Retry-After": str(error.retry_after)},
         )
-        
+    if isinstance(error, GenerationTimeout):
+        return HTTPException(status_code=504, detail=str(error))
+    return HTTPException(status_code=499, detail="Client disconnected")
+
+
+# Media types /generate can answer with; the first is the default
+GENERATE_MEDIA_TYPES = (JSON, MIDI, MULTIPART)
+MIDI_FILENAME = "psychoscore_output.mid"
+
+
+async def produce_midi(request: GenerateRequest, http_request: Optional[Request] = None) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Generate raw MIDI bytes for a request.
+    
+    Returns:
+        (midi_bytes, parameters used for generation)
+    """
+    profile = build_profile(request)
+    
+    # Calculate temperature: use explicit value, or dynamic based on profile
+    temperature = resolve_temperature(request, profile.rsi)
+    
+    backend = "model" if batcher is not None else "rules"
+    await check_adapter(request.adapter)
+    await check_speculative(request.speculative)
+    
+    # Requests with equal keys produce the same MIDI (for unseeded ones,
+    # the same as any other sample), so they share cache entries and
+    # in-flight generations
+    key = None
+    if request.seed is not None or COALESCE == "all":
+        settings = dict(
+            backend=backend,
+            model=checkpoint_id,
+            bars=request.max_bars,
+            temperature=round(temperature, 4),
+            top_p=request.top_p,
+            seed=request.seed,
+        )
+        if request.adapter:
+            settings["adapter"] = request.adapter
+        if request.speculative:
+            # Same distribution, but a seed draws different tokens
+            settings["speculative"] = (request.speculative, request.draft_tokens)
+        key = response_key(profile, **settings)
+    
+    # Seeded requests are deterministic, so they can be served from cache
+    cacheable = request.seed is not None and response_cache is not None
+    midi_bytes = response_cache.get(key) if cacheable else None
+    cached = midi_bytes is not None
+    
+    async def generate(http_request: Optional[Request]) -> bytes:
+        # Generate MIDI off the event loop
+        if request.speculative:
+            # One sequence at a time, bypassing the micro-batcher
+            midi = await run_on_pool(
+                _run_speculative,
+                profile,
+                request.max_bars,
+                temperature,
+                request.top_p,
+                request.seed,
+                request.adapter,
+                request.speculative,
+                request.draft_tokens,
+                http_request=http_request,
+            )
+        elif batcher is not None:
+            midi = await run_batched(
+                profile, request.max_bars, temperature, request.top_p, request.seed, request.adapter,
+            )
+        else:
+            midi = await run_on_pool(
+                _run_generation,
+                profile,
+                request.max_bars,
+                temperature,
+                request.top_p,
+                request.seed,
+                http_request=http_request,
+            )
+        if cacheable:
+            response_cache.put(key, midi)
+        BARS_GENERATED.inc(backend, amount=request.max_bars)
+        return midi
+    
+    coalesced = False
+    if not cached and key is not None and flights is not None:
+        # Shared work outlives any one client, so it doesn't watch for disconnects
+        midi_bytes, coalesced = await flights.run(key, lambda: generate(None))
+        if coalesced:
+            COALESCED.inc()
+    elif not cached:
+        midi_bytes = await generate(http_request)
+    
+    return midi_bytes, {
+        "bars": request.max_bars,
+        "temperature": temperature,
+        "dynamic_temperature_used": request.temperature is None and request.use_dynamic_temperature,
+        "rsi_dominant": profile.get_rsi_dominant(),
+        "backend": backend,
+        "seed": request.seed,
+        "adapter": request.adapter,
+        "speculative": request.speculative,
+        "cached": cached,
+        "coalesced": coalesced,
+    }
+
+
+def midi_response(midi_bytes: bytes, parameters: Dict[str, Any]) -> Response:
+    """Raw MIDI download; generation parameters travel in a header"""
+    return Response(
+        content=midi_bytes,
+        media_type=MIDI,
+        headers={
+            "Content-Disposition": f"attachment; filename={MIDI_FILENAME}",
+            "X-Psychoscore-Parameters": json.dumps(parameters),
+        },
+    )
+
+
+@app.post("/generate", response_model=GenerateResponse)
+async def generate_midi(request: GenerateRequest, http_request: Request = None):
+    """
+    Generate MIDI from psychometric profile.
+    
+    Answers JSON with base64 MIDI by default. Clients sending
+    Accept: audio/midi get the raw file; Accept: multipart/mixed gets a
+    JSON parameters part followed by the raw MIDI part.
+    """
+    accept = http_request.headers.get("accept") if http_request else None
+    media_type = negotiate(accept, GENERATE_MEDIA_TYPES)
+    
+    try:
+        midi_bytes, parameters = await produce_midi(request, http_request)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Generation failed: {e}")
+        if media_type != JSON:
+            raise HTTPException(status_code=500, detail=str(e))
         return GenerateResponse(
             success=False,
             error=str(e)
         )
+    
+    if media_type == MIDI:
+        return midi_response(midi_bytes, parameters)
+    if media_type == MULTIPART:
+        body, content_type = multipart_body(parameters, midi_bytes, MIDI_FILENAME)
+        return Response(content=body, media_type=content_type)
+    
+    return GenerateResponse(
+        success=True,
+        midi_base64=base64.b64encode(midi_bytes).decode('utf-8'),
+        parameters=parameters,
+    )
 
 
 @app.post("/generate/midi")
-async def generate_midi_file(request: GenerateRequest):
+async def generate_midi_file(request: GenerateRequest, http_request: Request = None):
     """Generate MIDI and return as downloadable file"""
     
-    result = await generate_midi(request)
+    try:
+        midi_bytes, parameters = await produce_midi(request, http_request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Generation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
     
-    if not result.success:
-        raise HTTPException(status_code=500, detail=result.error)
+    return midi_response(midi_bytes, parameters)
+
+
+@app.post("/generate/stream")
+async def generate_stream(request: GenerateRequest):
+    """
+    Stream generated bars as server-sent events.
+    
+    Events:
+        start  {"bars", "tempo", "temperature", "backend"}
+        bar    {"bar": i, "notes": [[pitch, start_beat, duration_beats, velocity], ...]}
+        end    {"bars": n}
+        error  {"detail": message}   (generation failed mid-stream)
+    
+    Note start times are absolute beats, so a client can schedule each
+    bar for playback as it arrives.
+    """
+    profile = build_profile(request)
+    temperature = resolve_temperature(request, profile.rsi)
+    backend = "model" if batcher is not None else "rules"
+    await check_adapter(request.adapter)
+    await check_speculative(request.speculative)
+    if backend == "model":
+        await ensure_model()
+    tempo = inference.rule_settings(profile)[1] if backend == "rules" else (request.tempo or 120)
     
-    import base64
-    midi_bytes = base64.b64decode(result.midi_base64)
+    try:
+        bars = pool.stream(
+            _iter_generation, backend, profile, request.max_bars, temperature, request.top_p, request.seed,
+            request.adapter, request.speculative, request.draft_tokens,
+        )
+    except PoolSaturated as e:
+        raise pool_error_to_http(e)
+    
+    async def events():
+        yield sse_event("start", {
+            "bars": request.max_bars,
+            "tempo": tempo,
+            "temperature": temperature,
+            "backend": backend,
+        })
+        count = 0
+        try:
+            async for notes in bars:
+                yield sse_event("bar", {
+                    "bar": count,
+                    "notes": [[pitch, round(start, 4), round(duration, 4), velocity]
+                              for pitch, start, duration, velocity in notes],
+                })
+                count += 1
+                BARS_GENERATED.inc(backend)
+        except Exception as e:
+            logger.error(f"Streaming generation failed: {e}")
+            yield sse_event("error", {"detail": str(e)})
+            return
+        finally:
+            await bars.aclose()
+        yield sse_event("end", {"bars": count})
+    
+    return StreamingResponse(events(), media_type=EVENT_STREAM, headers={"Cache-Control": "no-cache"})
+
+
+async def produce_score(request: ScoreGenerateRequest, http_request: Optional[Request] = None) -> bytes:
+    """Multi-track MIDI for a scored play (see /generate/score)"""
+    if (request.csv is None) == (request.beats is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'csv' or 'beats'")
+    
+    try:
+        timeline = parse_timeline_csv(request.csv) if request.csv is not None else timeline_from_rows(request.beats)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not timeline:
+        raise HTTPException(status_code=422, detail="Score has no beats")
+    if len(timeline) * request.bars_per_beat > MAX_PIECE_BARS:
+        raise HTTPException(status_code=422, detail=f"Piece exceeds {MAX_PIECE_BARS} bars")
+    
+    speaker_profiles = {name: build_profile(profile) for name, profile in request.speakers.items()}
+    backend = "model" if batcher is not None else "rules"
+    await check_adapter(request.adapter)
+    if backend == "model":
+        await ensure_model()
+    
+    try:
+        midi_bytes = await run_on_pool(
+            _run_piece,
+            backend,
+            timeline,
+            speaker_profiles,
+            request.bars_per_beat,
+            request.temperature,
+            request.top_p,
+            request.seed,
+            request.adapter,
+            http_request=http_request,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Score generation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    BARS_GENERATED.inc(backend, amount=len(timeline) * request.bars_per_beat)
+    return midi_bytes
+
+
+@app.post("/generate/score")
+async def generate_from_score(request: ScoreGenerateRequest, http_request: Request = None):
+    """
+    Render a whole scored play as one multi-track MIDI.
     
+    Takes the mpn_engine per-beat timeline (as CSV text or row dicts)
+    plus base profiles per speaker. Each speaker gets a track, and
+    conditioning changes at beat boundaries. All segments are generated
+    in one pool job.
+    """
+    midi_bytes = await produce_score(request, http_request)
     return Response(
         content=midi_bytes,
-        media_type="audio/midi",
-        headers={"Content-Disposition": "attachment; filename=psychoscore_output.mid"}
+        media_type=MIDI,
+        headers={"Content-Disposition": "attachment; filename=psychoscore_score.mid"},
     )
 
 
+# === ADAPTERS ===
+
+async def adapter_registry() -> 'AdapterRegistry':
+    """The loaded model's adapter registry, or 404 when hot-loading is off"""
+    if BACKEND != "model":
+        raise HTTPException(status_code=404, detail="Adapters need the model backend")
+    await ensure_model()
+    if inference.adapters is None:
+        raise HTTPException(status_code=404, detail="Adapter hot-loading is off (set PSYCHOSCORE_ADAPTER_DIR)")
+    return inference.adapters
+
+
+@app.get("/adapters")
+async def list_adapters():
+    """Adapters on disk and which of them are resident"""
+    registry = await adapter_registry()
+    return {"available": registry.available(), **registry.stats()}
+
+
+@app.post("/adapters/{name}")
+async def load_adapter(name: str = PathParam(..., pattern=ADAPTER_NAME_PATTERN)):
+    """Hot-load an adapter; the least recently used one is unloaded if over the limit"""
+    registry = await adapter_registry()
+    try:
+        loaded = await asyncio.get_running_loop().run_in_executor(None, registry.load, name)
+    except AdapterNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown adapter '{name}'")
+    return {"name": name, "loaded": loaded, "resident": registry.resident()}
+
+
+@app.delete("/adapters/{name}")
+async def unload_adapter(name: str = PathParam(..., pattern=ADAPTER_NAME_PATTERN)):
+    """Unload a resident adapter, freeing its weights"""
+    registry = await adapter_registry()
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, registry.unload, name)
+    except AdapterNotFound:
+        raise HTTPException(status_code=404, detail=f"Adapter '{name}' is not loaded")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"name": name, "resident": registry.resident()}
+
+
+ZIP = "application/zip"
+BATCH_MEDIA_TYPES = (ENVELOPE, ZIP)
+
+
+async def produce_item(request: GenerateRequest, limit: asyncio.Semaphore):
+    """One batch item: MIDI bytes and parameters, or the exception that stopped it"""
+    async with limit:
+        try:
+            return await produce_midi(request)
+        except HTTPException as e:
+            return RuntimeError(f"{e.status_code}: {e.detail}")
+        except Exception as e:
+            logger.error(f"Batch item failed: {e}")
+            return e
+
+
+def batch_concurrency() -> int:
+    """Items of one batch in flight at once, leaving queue room for other clients"""
+    if batcher is not None:
+        return batcher.config.max_size * pool.config.workers
+    return pool.config.workers
+
+
+def zip_results(results: List[Any]) -> bytes:
+    """Zip of NNN.mid files (or NNN.error.txt) plus a manifest.json in request order"""
+    buffer = io.BytesIO()
+    manifest = []
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                name = f"{i:03d}.error.txt"
+                archive.writestr(name, str(result))
+                manifest.append({"index": i, "success": False, "file": name, "error": str(result)})
+            else:
+                midi_bytes, parameters = result
+                name = f"{i:03d}.mid"
+                archive.writestr(name, midi_bytes)
+                manifest.append({"index": i, "success": True, "file": name, "parameters": parameters})
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    return buffer.getvalue()
+
+
+async def produce_batch_zip(batch: BatchGenerateRequest) -> bytes:
+    """All items of a batch, zipped once every one has finished"""
+    limit = asyncio.Semaphore(batch_concurrency())
+    results = await asyncio.gather(*(produce_item(item, limit) for item in batch.requests))
+    return zip_results(results)
+
+
+@app.post("/generate/batch")
+async def generate_batch(batch: BatchGenerateRequest, http_request: Request = None):
+    """
+    Generate many MIDIs in one call.
+    
+    Items run concurrently on the worker pool (or micro-batcher) and are
+    returned in request order; a failed item carries its error instead of
+    failing the batch. The default response is a length-prefixed binary
+    envelope streamed as items complete; Accept: application/zip returns
+    a zip with a manifest.json.
+    """
+    accept = http_request.headers.get("accept") if http_request else None
+    media_type = negotiate(accept, BATCH_MEDIA_TYPES)
+    
+    if media_type == ZIP:
+        return Response(
+            content=await produce_batch_zip(batch),
+            media_type=ZIP,
+            headers={"Content-Disposition": "attachment; filename=psychoscore_batch.zip"},
+        )
+    
+    limit = asyncio.Semaphore(batch_concurrency())
+    tasks = [asyncio.ensure_future(produce_item(item, limit)) for item in batch.requests]
+    
+    async def stream():
+        try:
+            yield envelope_header(len(tasks))
+            for task in tasks:
+                result = await task
+                yield envelope_item(result if isinstance(result, Exception) else result[0])
+        finally:
+            # Client went away mid-stream: drop work that hasn't finished
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream(), media_type=ENVELOPE)
+
+
+
+# === JOBS ===
+
+JOB_KINDS = {"generate": GenerateRequest, "score": ScoreGenerateRequest, "batch": BatchGenerateRequest}
+JOB_ID_PATTERN = r"^[0-9a-f]{32}$"
+
+
+async def run_job(kind: str, payload: Dict[str, Any]) -> Tuple[bytes, str]:
+    """
+    Execute a stored job like its endpoint would.
+    
+    A full pool makes the job wait and retry rather than fail.
+    
+    Returns:
+        (result bytes, media type)
+    """
+    request = JOB_KINDS[kind].model_validate(payload)
+    while True:
+        try:
+            if kind == "generate":
+                return (await produce_midi(request))[0], MIDI
+            if kind == "score":
+                return await produce_score(request), MIDI
+            return await produce_batch_zip(request), ZIP
+        except HTTPException as e:
+            retry_after = (e.headers or {}).get("Retry-After")
+            if retry_after is None:
+                raise RuntimeError(f"{e.status_code}: {e.detail}") from None
+            await asyncio.sleep(float(retry_after))
+
+
+def job_store() -> JobStore:
+    if jobs is None:
+        raise HTTPException(status_code=503, detail="Job store not configured (set PSYCHOSCORE_JOB_DIR)")
+    return jobs
+
+
+async def in_executor(fn, *args):
+    """Run a blocking job-store call (SQLite may wait on another worker's lock) off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+def job_body(job) -> Dict[str, Any]:
+    """Job status, with where to fetch the result once it succeeded"""
+    body = job.to_dict()
+    if job.status == SUCCEEDED:
+        body["result_url"] = f"/jobs/{job.id}/result"
+    return body
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(body: JobRequest):
+    """
+    Queue a long generation; poll GET /jobs/{id} for its status.
+    
+    Jobs are stored on disk and survive restarts. The request is
+    validated now, so a job that is accepted can only fail while running.
+    """
+    store = job_store()
+    try:
+        request = JOB_KINDS[body.kind].model_validate(body.request)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", "request", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+    job = await in_executor(store.submit, body.kind, request.model_dump(mode="json", exclude_unset=True))
+    job_runner.notify()
+    return JSONResponse(job_body(job), status_code=202, headers={"Location": f"/jobs/{job.id}"})
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str = PathParam(..., pattern=JOB_ID_PATTERN)):
+    """Job status: queued, running, succeeded, failed or cancelled"""
+    job = await in_executor(job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job_body(job)
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str = PathParam(..., pattern=JOB_ID_PATTERN)):
+    """Stream a succeeded job's result file (MIDI, or a zip for batches)"""
+    store = job_store()
+    job = await in_executor(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    path = store.result_path(job)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Job result is missing")
+    return FileResponse(path, media_type=job.media_type, filename=f"psychoscore_{job.id}{path.suffix}")
+
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str = PathParam(..., pattern=JOB_ID_PATTERN)):
+    """Cancel a queued or running job; delete a finished one and its result"""
+    store = job_store()
+    if await in_executor(store.cancel, job_id):
+        # Stops it here at once; a runner in another worker notices the row
+        job_runner.cancel(job_id)
+        return job_body(await in_executor(store.get, job_id))
+    if await in_executor(store.delete, job_id):
+        return {"id": job_id, "deleted": True}
+    raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    host = os.environ.get("PSYCHOSCORE_HOST", "0.0.0.0")
+    port = int(os.environ.get("PSYCHOSCORE_PORT", 8001))
+    workers = int(os.environ.get("PSYCHOSCORE_WORKERS", 1))
+    if workers > 1:
+        from inference.prefork import serve
+        # Workers pool their metrics here, so any of them can answer a scrape
+        metrics_dir = os.environ.get("PSYCHOSCORE_METRICS_DIR") or tempfile.mkdtemp(prefix="psychoscore-metrics-")
+        clear_metrics_dir(metrics_dir)
+        os.environ["PSYCHOSCORE_METRICS_DIR"] = metrics_dir
+        serve(app, host, port, workers, preload=preload)
+    else:
+        import uvicorn
+        uvicorn.run(app, host=host, port=port)
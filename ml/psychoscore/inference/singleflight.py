@@ -0,0 +1,76 @@
+"""
+PSYCHOSCORE Request Coalescing
+
+Singleflight for identical in-flight generations. The first request for
+a key starts the work as its own task; requests for the same key that
+arrive before it finishes wait on that task instead of generating again,
+and every waiter receives the same result (or the same exception).
+
+The task belongs to no single caller: one waiter going away doesn't
+cancel it for the others. When the last waiter goes, the task is
+cancelled.
+
+Used from the event loop only, so the bookkeeping needs no locks.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one computation among concurrent callers with the same key"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await `fn()` for `key`, joining an identical call already in flight.
+
+        Returns:
+            (result, shared): shared is True if another caller started the work
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if shared:
+            self.shared += 1
+        else:
+            self.leaders += 1
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting; later callers start afresh
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Flights in progress and how many callers joined one"""
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "shared": self.shared,
+        }
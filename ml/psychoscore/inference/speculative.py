@@ -0,0 +1,306 @@
+"""
+PSYCHOSCORE Speculative Decoding
+
+Cheap drafters propose several tokens; the model scores all of them in
+one forward pass and keeps the longest run it agrees with. Each draft
+token x, proposed with draft probability q(x), is accepted with
+probability min(1, p(x) / q(x)) under the model's sampling distribution
+p (temperature, top-p and logits hook applied). The first rejected
+position is resampled from max(0, p - q), renormalized, and when every
+draft is accepted one more token comes from the model for free. Output
+follows exactly the distribution of plain sampling; only the number of
+forward passes changes.
+
+Drafters:
+    NGramDraft  continuation n-grams from a token corpus, falling back
+                to earlier occurrences in the sequence being generated
+                (deterministic, so q is one-hot and acceptance is p(x))
+    ModelDraft  a small causal LM over the same vocabulary, sampling
+                with the request's settings and keeping its own KV cache
+
+Decoding runs one sequence at a time: the latency path for single
+requests and streams, not the micro-batched throughput path.
+"""
+
+import threading
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import torch
+
+from inference.decoding import LogitsHook, _accepts, _prefill, _prefill_cached, cache_to_layers, layers_to_cache, sampling_probs
+from inference.prefix_cache import PrefixKVCache
+from inference.runtime import model_device
+
+# Token IDs from here up are psychometric prefix tokens, never drafted
+PSYCH_ID_START = 10000
+
+# Sampling distribution for a next-token logits row given the tokens generated so far
+ProbsFn = Callable[[torch.Tensor, List[int]], torch.Tensor]
+
+# (draft tokens, their draft distributions or None when drafts are deterministic)
+Proposal = Tuple[List[int], Optional[List[torch.Tensor]]]
+
+
+def crop_cache(past, length: int):
+    """past_key_values truncated to the first `length` positions"""
+    if hasattr(past, "crop"):
+        # A negative count removes that many positions in every transformers version
+        removed = past.get_seq_length() - length
+        if removed > 0:
+            past.crop(-removed)
+        return past
+    return layers_to_cache(tuple(
+        (key[:, :, :length], value[:, :, :length]) for key, value in cache_to_layers(past)
+    ))
+
+
+def _draw(probs: torch.Tensor, generator: Optional[torch.Generator]) -> int:
+    return int(torch.multinomial(probs[None], 1, generator=generator))
+
+
+def _forward(model, tokens: Sequence[int], past, length: int, use_positions: bool):
+    """Feed `tokens` after `length` cached positions; returns (logits (n, V), past)"""
+    device = model_device(model)
+    kwargs = dict(
+        input_ids=torch.as_tensor([list(tokens)], dtype=torch.long, device=device),
+        attention_mask=torch.ones((1, length + len(tokens)), dtype=torch.long, device=device),
+        past_key_values=past,
+        use_cache=True,
+    )
+    if use_positions:
+        kwargs["position_ids"] = torch.arange(length, length + len(tokens), device=device)[None]
+    out = model(**kwargs)
+    return out.logits[0], out.past_key_values
+
+
+class _Stats:
+    """Proposed/accepted draft token totals, updated from pool threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.proposed = 0
+        self.accepted = 0
+
+    def record(self, proposed: int, accepted: int):
+        with self._lock:
+            self.proposed += proposed
+            self.accepted += accepted
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "proposed": self.proposed,
+                "accepted": self.accepted,
+                "acceptance_rate": self.accepted / self.proposed if self.proposed else 0.0,
+            }
+
+
+class NGramDraft(_Stats):
+    """
+    Deterministic drafts from n-gram continuations.
+
+    The corpus table maps each context of 1..order-1 REMI tokens to its
+    most frequent next token; the longest known context wins. Contexts
+    the corpus doesn't know are looked up in the sequence itself, since
+    music repeats.
+    """
+
+    name = "ngram"
+
+    def __init__(self, table: Optional[Dict[Tuple[int, ...], int]] = None, order: int = 4, window: int = 512):
+        super().__init__()
+        self.table = table or {}
+        self.order = order
+        self.window = window
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[Sequence[int]], order: int = 4, **kwargs) -> 'NGramDraft':
+        """Build the continuation table from token sequences (prefix tokens are skipped)"""
+        counts: Dict[Tuple[int, ...], Counter] = defaultdict(Counter)
+        for sequence in sequences:
+            music = [t for t in sequence if t < PSYCH_ID_START]
+            for i in range(1, len(music)):
+                for n in range(1, min(order - 1, i) + 1):
+                    counts[tuple(music[i - n:i])][music[i]] += 1
+        table = {context: nexts.most_common(1)[0][0] for context, nexts in counts.items()}
+        return cls(table, order, **kwargs)
+
+    @classmethod
+    def from_dataset(cls, path: str, order: int = 4, **kwargs) -> 'NGramDraft':
+        """Build from a tokenized split saved by the training pipeline (input_ids column)"""
+        from datasets import load_from_disk
+
+        return cls.from_sequences(load_from_disk(path)["input_ids"], order, **kwargs)
+
+    def _next(self, tokens: List[int]) -> Optional[int]:
+        for n in range(min(self.order - 1, len(tokens)), 0, -1):
+            token = self.table.get(tuple(tokens[-n:]))
+            if token is not None:
+                return token
+        # Most recent earlier occurrence of the longest matching suffix
+        start = max(0, len(tokens) - self.window)
+        for n in range(min(self.order - 1, len(tokens) - 1), 0, -1):
+            suffix = tokens[-n:]
+            for i in range(len(tokens) - n - 1, start - 1, -1):
+                if tokens[i:i + n] == suffix:
+                    return tokens[i + n]
+        return None
+
+    def start(self, prefix: Sequence[int]) -> 'NGramDraft':
+        """Per-sequence proposer (stateless, so the drafter itself)"""
+        return self
+
+    def propose(self, tokens: List[int], k: int, probs_fn: ProbsFn, generator=None) -> Proposal:
+        drafts: List[int] = []
+        context = list(tokens)
+        for _ in range(k):
+            token = self._next(context)
+            if token is None:
+                break
+            drafts.append(token)
+            context.append(token)
+        return drafts, None
+
+
+class ModelDraft(_Stats):
+    """Drafts sampled from a small model sharing the main model's vocabulary"""
+
+    name = "draft"
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.use_positions = _accepts(model, "position_ids")
+
+    def start(self, prefix: Sequence[int]) -> '_ModelProposer':
+        return _ModelProposer(self, prefix)
+
+
+class _ModelProposer:
+    """One sequence's draft model state: the tokens in its KV cache"""
+
+    def __init__(self, draft: ModelDraft, prefix: Sequence[int]):
+        self.draft = draft
+        self.prefix = list(prefix)
+        self.cached: List[int] = []
+        self.past = None
+
+    def propose(self, tokens: List[int], k: int, probs_fn: ProbsFn, generator=None) -> Proposal:
+        model = self.draft.model
+        context = self.prefix + tokens
+        # Keep cached positions that still match; they were drafts the model accepted
+        common = 0
+        for cached, token in zip(self.cached, context):
+            if cached != token:
+                break
+            common += 1
+        common = min(common, len(context) - 1)
+        if self.past is not None and common < len(self.cached):
+            self.past = crop_cache(self.past, common)
+        self.cached = context[:common]
+
+        logits, self.past = _forward(model, context[common:], self.past, common, self.draft.use_positions)
+        self.cached = list(context)
+        drafts: List[int] = []
+        probs: List[torch.Tensor] = []
+        for i in range(k):
+            q = probs_fn(logits[-1], tokens + drafts)
+            token = _draw(q, generator)
+            drafts.append(token)
+            probs.append(q)
+            if i < k - 1:
+                logits, self.past = _forward(model, [token], self.past, len(self.cached), self.draft.use_positions)
+                self.cached.append(token)
+        return drafts, probs
+
+
+@torch.no_grad()
+def speculative_decode(
+    model,
+    prefix: Sequence[int],
+    drafter,
+    temperature: float,
+    top_p: float,
+    max_new_tokens: int,
+    pad_id: int,
+    eos_id: Optional[int] = None,
+    draft_tokens: int = 4,
+    logits_hook: Optional[LogitsHook] = None,
+    generator: Optional[torch.Generator] = None,
+    prefix_cache: Optional[PrefixKVCache] = None,
+) -> Iterator[int]:
+    """
+    Sample one prefix with drafted tokens verified in batches.
+
+    Arguments are those of decoding.iter_decode(), plus the drafter
+    (NGramDraft or ModelDraft) and how many tokens it proposes per model
+    pass. Yields tokens as they are committed (EOS not included).
+    """
+    device = model_device(model)
+    temps = torch.tensor([temperature], dtype=torch.float32, device=device)
+    tops = torch.tensor([top_p], dtype=torch.float32, device=device)
+    use_positions = _accepts(model, "position_ids")
+
+    def probs_fn(logits: torch.Tensor, context: List[int]) -> torch.Tensor:
+        logits = logits[None]
+        if logits_hook is not None:
+            generated = torch.as_tensor([context], dtype=torch.long, device=logits.device).view(1, len(context))
+            logits = logits_hook(generated, logits)
+        return sampling_probs(logits, temps.to(logits.device), tops.to(logits.device))[0]
+
+    if prefix_cache is not None:
+        logits, past, _, _ = _prefill_cached(model, [prefix], prefix_cache)
+    else:
+        logits, past, _, _ = _prefill(model, [prefix], pad_id, use_positions)
+    base = len(prefix)
+    proposer = drafter.start(prefix)
+
+    out: List[int] = []
+    token = _draw(probs_fn(logits[0], out), generator)
+    while True:
+        if token == eos_id:
+            return
+        out.append(token)
+        yield token
+        if len(out) >= max_new_tokens:
+            return
+
+        # The bonus token counts against the budget too
+        k = min(draft_tokens, max_new_tokens - len(out) - 1)
+        drafts, draft_probs = proposer.propose(out, k, probs_fn, generator) if k > 0 else ([], None)
+
+        # One pass scores the pending token and every draft after it
+        logits, past = _forward(model, [token] + drafts, past, base + len(out) - 1, use_positions)
+
+        accepted: List[int] = []
+        token = None
+        for i, draft in enumerate(drafts):
+            p = probs_fn(logits[i], out + accepted)
+            q = draft_probs[i] if draft_probs is not None else None
+            q_draft = float(q[draft]) if q is not None else 1.0
+            if float(torch.rand((), generator=generator, device=p.device)) * q_draft < float(p[draft]):
+                accepted.append(draft)
+                continue
+            # Rejected: resample from the part of p the draft didn't cover
+            if q is None:
+                residual = p.clone()
+                residual[draft] = 0.0
+            else:
+                residual = torch.clamp(p - q, min=0.0)
+            total = residual.sum()
+            token = _draw(residual / total if total > 0 else p, generator)
+            break
+        drafter.record(len(drafts), len(accepted))
+
+        for draft in accepted:
+            if draft == eos_id:
+                return
+            out.append(draft)
+            yield draft
+        if token is None:
+            token = _draw(probs_fn(logits[len(drafts)], out), generator)
+
+        # Forget the rejected drafts; the new pending token goes in next pass
+        if len(accepted) < len(drafts):
+            past = crop_cache(past, base + len(out))
@@ -0,0 +1,286 @@
+"""
+PSYCHOSCORE Generation Worker Pool
+
+Runs blocking generation calls off the asyncio event loop on a bounded
+thread or process pool, with admission control, per-request timeouts
+and cancellation of work that has not started yet. Generator functions
+can be streamed back to the loop item by item.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool and its queue are full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Generation queue is full")
+        self.retry_after = retry_after
+
+
+class GenerationTimeout(Exception):
+    """Raised when a generation exceeds its deadline"""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the requesting client went away before completion"""
+
+
+@dataclass
+class PoolConfig:
+    """Worker pool settings (overridable via environment variables)"""
+    kind: str = "thread"          # "thread" or "process"
+    workers: int = 2              # Concurrent generations
+    max_queue: int = 16           # Admitted requests waiting for a worker
+    timeout: float = 60.0         # Seconds before a request is abandoned
+    retry_after: int = 1          # Retry-After hint (seconds) when saturated
+
+    @classmethod
+    def from_env(cls) -> 'PoolConfig':
+        """Read PSYCHOSCORE_POOL_* environment variables"""
+        return cls(
+            kind=os.environ.get("PSYCHOSCORE_POOL_KIND", cls.kind),
+            workers=int(os.environ.get("PSYCHOSCORE_POOL_WORKERS", cls.workers)),
+            max_queue=int(os.environ.get("PSYCHOSCORE_POOL_MAX_QUEUE", cls.max_queue)),
+            timeout=float(os.environ.get("PSYCHOSCORE_POOL_TIMEOUT", cls.timeout)),
+            retry_after=int(os.environ.get("PSYCHOSCORE_POOL_RETRY_AFTER", cls.retry_after)),
+        )
+
+
+class GenerationPool:
+    """
+    Bounded executor for blocking generation work.
+
+    At most `workers + max_queue` requests are admitted at once; further
+    requests fail fast with PoolSaturated so the server can answer 503
+    with Retry-After instead of queueing unboundedly. Admission slots are
+    released when the underlying work actually finishes, so timed-out
+    work that is still running keeps counting against capacity.
+    """
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        self.config = config or PoolConfig()
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.config.workers + self.config.max_queue
+
+    def start(self):
+        """Create the underlying executor"""
+        if self._executor is not None:
+            return
+        if self.config.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.config.workers)
+        elif self.config.kind == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.workers,
+                thread_name_prefix="psychoscore-gen",
+            )
+        else:
+            raise ValueError(f"Unknown pool kind: {self.config.kind}")
+        logger.info(
+            f"Generation pool: {self.config.workers} {self.config.kind} workers, "
+            f"queue {self.config.max_queue}"
+        )
+
+    def shutdown(self):
+        """Stop accepting work and cancel anything not yet started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        """Current occupancy"""
+        with self._lock:
+            admitted, running = self._admitted, self._running
+        if self.config.kind == "process":
+            # Worker processes don't report back; assume they are busy
+            running = min(admitted, self.config.workers)
+        return {
+            "workers": self.config.workers,
+            "capacity": self.capacity,
+            "running": running,
+            "queued": max(0, admitted - running),
+        }
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Admit and submit work, returning a concurrent Future.
+
+        Raises:
+            PoolSaturated: if the pool and queue are full
+        """
+        if self._executor is None:
+            self.start()
+
+        with self._lock:
+            if self._admitted >= self.capacity:
+                raise PoolSaturated(self.config.retry_after)
+            self._admitted += 1
+
+        try:
+            if self.config.kind == "thread":
+                future = self._executor.submit(_tracked, self, fn, args, kwargs)
+            else:
+                future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self,
+                  fn: Callable,
+                  *args,
+                  timeout: Optional[float] = None,
+                  is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                  poll_interval: float = 0.5,
+                  **kwargs) -> Any:
+        """
+        Run blocking work on the pool and await its result.
+
+        Args:
+            fn: Callable to execute (must be picklable for process pools)
+            timeout: Seconds to wait (default: config.timeout)
+            is_disconnected: Async predicate polled while waiting; when it
+                returns True the work is cancelled
+            poll_interval: Seconds between disconnect checks
+
+        Raises:
+            PoolSaturated: if the request could not be admitted
+            GenerationTimeout: if the deadline passed
+            ClientDisconnected: if is_disconnected reported True
+        """
+        future = self.submit(fn, *args, **kwargs)
+        waiter = asyncio.wrap_future(future)
+        deadline = asyncio.get_running_loop().time() + (timeout or self.config.timeout)
+
+        try:
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    raise GenerationTimeout(f"Generation exceeded {timeout or self.config.timeout:.1f}s")
+                step = min(remaining, poll_interval) if is_disconnected else remaining
+                done, _ = await asyncio.wait({waiter}, timeout=step)
+                if done:
+                    return waiter.result()
+                if is_disconnected is not None and await is_disconnected():
+                    raise ClientDisconnected()
+        except BaseException:
+            # Timeout, disconnect or task cancellation: drop queued work
+            future.cancel()
+            waiter.cancel()
+            raise
+
+    def stream(self,
+               fn: Callable,
+               *args,
+               timeout: Optional[float] = None,
+               **kwargs) -> AsyncIterator:
+        """
+        Run a generator function on the pool, yielding its items to the
+        event loop as they are produced.
+
+        Admission happens immediately, so PoolSaturated is raised by this
+        call rather than on first iteration. Thread pools deliver items
+        incrementally; process pools deliver them once the worker
+        finishes. Closing the iterator early stops the producer at its
+        next item.
+
+        Raises:
+            PoolSaturated: if the request could not be admitted
+            GenerationTimeout: (while iterating) if the deadline passed
+        """
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def deliver(item, error=None):
+            try:
+                loop.call_soon_threadsafe(items.put_nowait, (item, error))
+            except RuntimeError:
+                stop.set()  # Event loop closed
+
+        if self.config.kind == "thread":
+            def pump():
+                try:
+                    for item in fn(*args, **kwargs):
+                        if stop.is_set():
+                            return
+                        deliver(item)
+                    deliver(_END)
+                except BaseException as e:
+                    deliver(_END, e)
+
+            future = self.submit(pump)
+        else:
+            future = self.submit(_collect, fn, args, kwargs)
+
+            def replay(done: Future):
+                if done.cancelled():
+                    return
+                error = done.exception()
+                for item in ([] if error else done.result()):
+                    deliver(item)
+                deliver(_END, error)
+
+            future.add_done_callback(replay)
+
+        return self._drain(items, future, stop, timeout or self.config.timeout)
+
+    @staticmethod
+    async def _drain(items: asyncio.Queue, future: Future, stop: threading.Event, timeout: float):
+        deadline = asyncio.get_running_loop().time() + timeout
+        try:
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    item, error = await asyncio.wait_for(items.get(), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    raise GenerationTimeout(f"Generation exceeded {timeout:.1f}s")
+                if item is _END:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stop.set()
+            future.cancel()
+
+    def _release(self):
+        with self._lock:
+            self._admitted -= 1
+
+    def _mark_running(self, delta: int):
+        with self._lock:
+            self._running += delta
+
+
+# Marks the end of a streamed generator
+_END = object()
+
+
+def _collect(fn: Callable, args, kwargs) -> list:
+    """Process-pool wrapper that materializes a generator"""
+    return list(fn(*args, **kwargs))
+
+
+def _tracked(pool: GenerationPool, fn: Callable, args, kwargs):
+    """Thread-pool wrapper that tracks how many jobs are executing"""
+    pool._mark_running(1)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        pool._mark_running(-1)
@@ -0,0 +1,180 @@
+"""
+PSYCHOSCORE Inference Benchmark
+Measures decoding throughput (tokens/sec) for model runtime profiles.
+
+Usage:
+    python scripts/benchmark_inference.py --model-path checkpoints/psychoscore/final
+    python scripts/benchmark_inference.py --model-path ... --profiles baseline,cpu --batch-size 4
+    python scripts/benchmark_inference.py --model-path ... --profiles cpu --speculative ngram
+
+With --speculative, each prefix is also decoded alone with speculative
+decoding ("ngram", or a draft checkpoint directory) and compared with
+decoding it alone without; latency is per sequence.
+
+Profiles:
+    baseline     The original load path: float16, LoRA kept as adapters
+    cpu          float32, LoRA merged, dynamic int8 Linear layers
+    cpu-fp32     float32, LoRA merged, no quantization
+    cpu-bf16     bfloat16, LoRA merged, no quantization
+    cpu-compile  The cpu profile run through torch.compile
+    cpu-onnx     The cpu profile exported to ONNX Runtime (needs optimum[onnxruntime])
+"""
+
+import sys
+import json
+import time
+import argparse
+import logging
+from pathlib import Path
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+
+from inference.decoding import decode_batch
+from inference.runtime import RuntimeConfig, load_model
+from inference.speculative import ModelDraft, NGramDraft, speculative_decode
+from tokenizer import PsychoscoreTokenizer, PsychometricProfile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PROFILES = {
+    "baseline": RuntimeConfig(device="cpu", dtype="float16", int8=False, merge_lora=False),
+    "cpu": RuntimeConfig(device="cpu", dtype="float32", int8=True, merge_lora=True),
+    "cpu-fp32": RuntimeConfig(device="cpu", dtype="float32", int8=False, merge_lora=True),
+    "cpu-bf16": RuntimeConfig(device="cpu", dtype="bfloat16", int8=False, merge_lora=True),
+    "cpu-compile": RuntimeConfig(device="cpu", dtype="float32", int8=True, merge_lora=True, backend="compile"),
+    "cpu-onnx": RuntimeConfig(device="cpu", dtype="float32", int8=True, merge_lora=True, backend="onnx"),
+}
+
+
+def benchmark(model, prefixes, new_tokens: int, runs: int, warmup: int, pad_id: int) -> dict:
+    """Decode without an EOS stop so every run produces the same token count"""
+    temperatures = [0.8] * len(prefixes)
+    top_ps = [0.9] * len(prefixes)
+
+    for _ in range(warmup):
+        decode_batch(model, prefixes, temperatures, top_ps, max_new_tokens=new_tokens, pad_id=pad_id)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        decode_batch(model, prefixes, temperatures, top_ps, max_new_tokens=new_tokens, pad_id=pad_id)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    tokens = new_tokens * len(prefixes)
+    return {
+        "tokens": tokens,
+        "best_seconds": round(best, 4),
+        "mean_seconds": round(sum(timings) / len(timings), 4),
+        "tokens_per_sec": round(tokens / best, 1),
+    }
+
+
+def benchmark_speculative(model, drafter, prefixes, new_tokens: int, runs: int, warmup: int,
+                          pad_id: int, draft_tokens: int) -> dict:
+    """Per-sequence latency with and without speculative decoding (no EOS stop)"""
+    def plain():
+        for prefix in prefixes:
+            decode_batch(model, [prefix], [0.8], [0.9], max_new_tokens=new_tokens, pad_id=pad_id)
+
+    def speculative():
+        for prefix in prefixes:
+            for _ in speculative_decode(model, prefix, drafter, 0.8, 0.9, new_tokens, pad_id, draft_tokens=draft_tokens):
+                pass
+
+    timings = {}
+    for name, fn in (("plain", plain), ("speculative", speculative)):
+        for _ in range(warmup):
+            fn()
+        runs_seconds = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            runs_seconds.append(time.perf_counter() - start)
+        timings[name] = min(runs_seconds) / len(prefixes)
+    return {
+        "plain_seconds": round(timings["plain"], 4),
+        "speculative_seconds": round(timings["speculative"], 4),
+        "speedup": round(timings["plain"] / timings["speculative"], 2),
+        "acceptance_rate": round(drafter.stats()["acceptance_rate"], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PSYCHOSCORE decoding throughput")
+    parser.add_argument("--model-path", required=True, help="Checkpoint directory")
+    parser.add_argument("--profiles", default="baseline,cpu,cpu-fp32,cpu-bf16",
+                        help=f"Comma-separated profiles: {', '.join(PROFILES)}")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--new-tokens", type=int, default=128)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--speculative", default=None, help="Also time speculative decoding: 'ngram' or a draft checkpoint")
+    parser.add_argument("--ngram-data", default=None, help="Tokenized dataset split for the n-gram drafter")
+    parser.add_argument("--draft-tokens", type=int, default=4)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    tokenizer = PsychoscoreTokenizer.from_pretrained(args.model_path)
+    prefixes = [
+        tokenizer.encode_psychometric_profile(PsychometricProfile(trauma=i / max(args.batch_size, 1)))
+        for i in range(args.batch_size)
+    ]
+
+    results = {}
+    for name in args.profiles.split(","):
+        name = name.strip()
+        if name not in PROFILES:
+            parser.error(f"Unknown profile: {name}")
+        logger.info(f"Loading {name} ({PROFILES[name].resolve().describe()})")
+        try:
+            started = time.perf_counter()
+            model = load_model(args.model_path, PROFILES[name])
+            load_seconds = time.perf_counter() - started
+            results[name] = benchmark(model, prefixes, args.new_tokens, args.runs, args.warmup, tokenizer.pad_token_id)
+            results[name]["load_seconds"] = round(load_seconds, 2)
+            if args.speculative == "ngram":
+                drafter = NGramDraft.from_dataset(args.ngram_data) if args.ngram_data else NGramDraft()
+            elif args.speculative:
+                drafter = ModelDraft(load_model(args.speculative, PROFILES[name]))
+            if args.speculative:
+                results[name]["speculative"] = benchmark_speculative(
+                    model, drafter, prefixes, args.new_tokens, args.runs, args.warmup,
+                    tokenizer.pad_token_id, args.draft_tokens,
+                )
+        except Exception as e:
+            logger.error(f"{name} failed: {e}")
+            results[name] = {"error": str(e)}
+        finally:
+            model = None
+
+    baseline = results.get("baseline", {}).get("tokens_per_sec")
+    print(f"\n{'profile':<14}{'tokens/sec':>12}{'speedup':>10}{'load (s)':>10}")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<14}{'failed':>12}   {result['error']}")
+            continue
+        speedup = f"{result['tokens_per_sec'] / baseline:.2f}x" if baseline else "-"
+        print(f"{name:<14}{result['tokens_per_sec']:>12}{speedup:>10}{result['load_seconds']:>10}")
+
+    speculative = {name: result["speculative"] for name, result in results.items() if "speculative" in result}
+    if speculative:
+        print(f"\n{'profile':<14}{'plain (s)':>12}{'spec (s)':>10}{'speedup':>10}{'accepted':>10}")
+        for name, result in speculative.items():
+            print(f"{name:<14}{result['plain_seconds']:>12}{result['speculative_seconds']:>10}"
+                  f"{result['speedup']:>9}x{result['acceptance_rate']:>10}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"args": vars(args), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -142,7 +142,7 @@ class TrainingPipeline:
         from tokenizer import PsychoscoreTokenizer, PsychometricProfile
         from datasets import Dataset
         import json
-        import random
+        import numpy as np
         
         tokenizer = PsychoscoreTokenizer()
         
@@ -161,12 +161,12 @@ class TrainingPipeline:
                 samples.append(sample)
         
         # Tokenize each sample into input_ids
-        tokenized_samples = []
+        profiles = []
         for sample in samples:
             profile_dict = sample.get("profile", {})
             
             # Create PsychometricProfile using the correct nested dict structure
-            profile = PsychometricProfile(
+            profiles.append(PsychometricProfile(
                 disc={
                     'D': profile_dict.get("disc_d", 0.5),
                     'I': profile_dict.get("disc_i", 0.5),
@@ -192,19 +192,23 @@ class TrainingPipeline:
                     'narcissism': profile_dict.get("dark_narc", 0.1),
                     'psychopathy': profile_dict.get("dark_psych", 0.1),
                 },
-            )
-            
-            # Encode the profile as prefix tokens
-            prefix_tokens = tokenizer.encode_psychometric_profile(profile)
-            
-            # Create a simple sequence of tokens for training
-            # For now, create a synthetic target sequence based on profile
-            # In production, this would be actual MIDI tokens from music files
-            target_length = random.randint(100, 256)
-            target_tokens = [random.randint(0, tokenizer.vocab_size - 1) for _ in range(target_length)]
-            
+            ))
+        
+        # Encode all profiles as prefix tokens at once (right-padded rows)
+        prefixes = tokenizer.encode_profiles_batch(profiles)
+        prefix_lengths = (prefixes != tokenizer.pad_token_id).sum(axis=1)
+        
+        # Create a simple sequence of tokens for training
+        # For now, create a synthetic target sequence based on profile
+        # In production, this would be actual MIDI tokens from music files
+        rng = np.random.default_rng()
+        target_lengths = rng.integers(100, 257, size=len(profiles))
+        targets = rng.integers(0, tokenizer.vocab_size, size=(len(profiles), 256), dtype=np.int32)
+        
+        tokenized_samples = []
+        for prefix, prefix_length, target, target_length in zip(prefixes, prefix_lengths, targets, target_lengths):
             # Combine: prefix + target (causal LM will predict target from prefix)
-            input_ids = prefix_tokens + target_tokens
+            input_ids = np.concatenate([prefix[:prefix_length], target[:target_length]]).tolist()
             
             # For causal LM, labels = input_ids (shifted internally)
             tokenized_samples.append({
@@ -0,0 +1,29 @@
+"""
+PSYCHOSCORE Shared Test Fixtures
+"""
+
+import pytest
+
+# One-layer GPT-2 over the full PSYCHOSCORE vocabulary and special token IDs
+TINY_GPT2 = dict(
+    vocab_size=10803, n_layer=1, n_head=2, n_embd=32, n_positions=512,
+    bos_token_id=1, eos_token_id=2, pad_token_id=0,
+)
+
+
+@pytest.fixture(scope="session")
+def tiny_gpt2():
+    """
+    Factory for randomly initialised GPT-2s, so no checkpoint is required.
+
+    Call as tiny_gpt2(seed=0, **config) where config overrides TINY_GPT2
+    (e.g. vocab_size=8 or n_layer=2); models are returned in eval mode.
+    """
+    def build(seed: int = 0, **config):
+        import torch
+        import transformers
+
+        torch.manual_seed(seed)
+        return transformers.GPT2LMHeadModel(transformers.GPT2Config(**{**TINY_GPT2, **config})).eval()
+
+    return build
@@ -0,0 +1,132 @@
+"""
+PSYCHOSCORE Adapter Registry Tests
+
+Uses a tiny randomly initialised GPT-2 with LoRA adapters saved to a
+temporary directory.
+
+Run with: pytest tests/test_adapters.py -v
+"""
+
+import copy
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+peft = pytest.importorskip("peft")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.adapters import AdapterNotFound, AdapterRegistry
+
+IDS = [[10800, 10001, 10801]]
+
+
+def save_adapters(base, directory: Path, names):
+    """Non-zero LoRA adapters on the attention projection, one per name"""
+    for name in names:
+        config = peft.LoraConfig(r=4, target_modules=["c_attn"], fan_in_fan_out=True, init_lora_weights=False)
+        peft.get_peft_model(copy.deepcopy(base), config).save_pretrained(directory / name)
+
+
+@pytest.fixture
+def adapter_dir(tmp_path, tiny_gpt2):
+    save_adapters(tiny_gpt2(), tmp_path, ["jazz", "folk", "drone"])
+    return tmp_path
+
+
+def logits(model):
+    with torch.no_grad():
+        return model(input_ids=torch.tensor(IDS)).logits
+
+
+class TestAdapterRegistry:
+    """Named adapters over one base, bounded by an LRU"""
+
+    def test_adapters_change_output_and_base_is_restored(self, adapter_dir, tiny_gpt2):
+        base = tiny_gpt2()
+        reference = logits(base)
+        registry = AdapterRegistry(base, adapter_dir, max_resident=4)
+
+        with registry.use("jazz") as model:
+            jazz = logits(model)
+        with registry.use("folk") as model:
+            folk = logits(model)
+        with registry.use(None) as model:
+            assert torch.allclose(logits(model), reference)
+        with registry.use("jazz") as model:
+            assert torch.allclose(logits(model), jazz)
+        assert not torch.allclose(jazz, folk)
+
+    def test_lru_bounds_resident_adapters(self, adapter_dir, tiny_gpt2):
+        unloaded = []
+        registry = AdapterRegistry(tiny_gpt2(), adapter_dir, max_resident=2, on_unload=unloaded.append)
+        for name in ("jazz", "folk", "jazz", "drone"):
+            with registry.use(name):
+                pass
+        assert registry.resident() == ["jazz", "drone"]
+        assert unloaded == ["folk"]
+        assert registry.stats()["evictions"] == 1
+
+    def test_hot_load_and_unload(self, adapter_dir, tiny_gpt2):
+        base = tiny_gpt2()
+        reference = logits(base)
+        registry = AdapterRegistry(base, adapter_dir, max_resident=2)
+
+        assert registry.load("jazz") is True
+        assert registry.load("jazz") is False
+        registry.unload("jazz")
+        assert registry.resident() == []
+        with registry.use(None) as model:
+            assert torch.allclose(logits(model), reference)
+        with pytest.raises(AdapterNotFound):
+            registry.unload("jazz")
+
+    def test_unknown_or_unsafe_names(self, adapter_dir, tiny_gpt2):
+        registry = AdapterRegistry(tiny_gpt2(), adapter_dir)
+        assert registry.available() == ["drone", "folk", "jazz"]
+        for name in ("missing", "../jazz"):
+            with pytest.raises(AdapterNotFound):
+                registry.load(name)
+
+    def test_waiting_switch_holds_back_active_adapter(self, adapter_dir, tiny_gpt2):
+        """Once a switch waits, new requests for the active adapter queue behind it"""
+        registry = AdapterRegistry(tiny_gpt2(), adapter_dir, max_resident=2)
+        order, release, entered = [], threading.Event(), threading.Event()
+
+        def run(name, label, hold=False):
+            with registry.use(name):
+                order.append(label)
+                if hold:
+                    entered.set()
+                    release.wait(5)
+
+        threads = [threading.Thread(target=run, args=("jazz", "jazz", True))]
+        threads[0].start()
+        entered.wait(5)
+        for name, label in (("folk", "folk"), ("jazz", "jazz again")):
+            threads.append(threading.Thread(target=run, args=(name, label)))
+            threads[-1].start()
+            deadline = time.monotonic() + 5
+            while registry.stats()["waiting"] < len(threads) - 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert order == ["jazz"]
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert order == ["jazz", "folk", "jazz again"]
+        assert registry.stats()["waiting"] == 0
+
+    def test_model_follows_registry(self, adapter_dir, tiny_gpt2):
+        """The registry's model is the PEFT wrapper once an adapter is loaded"""
+        registry = AdapterRegistry(tiny_gpt2(), adapter_dir)
+        registry.load("jazz")
+        with registry.use("jazz") as model:
+            assert model is registry.model and hasattr(model, "peft_config")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,148 @@
+"""
+PSYCHOSCORE Batched Decoding Tests
+
+Uses a tiny randomly initialised GPT-2 so no checkpoint is required.
+
+Run with: pytest tests/test_decoding.py -v
+"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.batching import BatchConfig, MicroBatcher
+from inference.decoding import decode_batch, encode_prefix_state, left_pad, sampling_probs
+from inference.prefix_cache import PrefixKVCache
+from inference.worker_pool import GenerationPool, PoolConfig
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tiny_gpt2):
+    """One-layer GPT-2 over the full PSYCHOSCORE vocabulary"""
+    return tiny_gpt2()
+
+
+class TestDecoding:
+    """Left padding, per-row sampling settings and batch equivalence"""
+
+    def test_left_pad(self):
+        """Shorter rows should be padded on the left"""
+        ids, mask = left_pad([[5, 6, 7], [8]], pad_id=0)
+        assert ids.tolist() == [[5, 6, 7], [0, 0, 8]]
+        assert mask.tolist() == [[1, 1, 1], [0, 0, 1]]
+
+    def test_top_p_is_per_row(self):
+        """A tiny top-p keeps only the argmax; top-p of 1 keeps everything"""
+        logits = torch.tensor([[3.0, 2.0, 1.0], [3.0, 2.0, 1.0]])
+        probs = sampling_probs(logits, torch.tensor([1.0, 1.0]), torch.tensor([0.01, 1.0]))
+        assert probs[0].tolist() == [1.0, 0.0, 0.0]
+        assert (probs[1] > 0).all()
+
+    def test_batch_matches_single_rows(self, tiny_model):
+        """Greedy rows decoded in a padded batch should match decoding alone"""
+        prefixes = [[10800, 10001, 10011, 10801], [10800, 10801]]
+        single = [
+            decode_batch(tiny_model, [p], [1.0], [0.0], max_new_tokens=8, pad_id=0)[0]
+            for p in prefixes
+        ]
+        batched = decode_batch(tiny_model, prefixes, [1.0, 1.0], [0.0, 0.0], max_new_tokens=8, pad_id=0)
+        assert batched == single
+        assert all(len(row) == 8 for row in batched)
+
+    def test_seeded_row_ignores_batch_mates(self, tiny_model):
+        """A row with its own generator should sample the same tokens in any batch"""
+        def seeded():
+            return torch.Generator().manual_seed(7)
+
+        prefix = [10800, 10801]
+        alone = decode_batch(tiny_model, [prefix], [1.0], [1.0], 8, pad_id=0, generators=[seeded()])
+        batched = decode_batch(
+            tiny_model, [[10800, 10005, 10801], prefix], [1.5, 1.0], [1.0, 1.0], 8,
+            pad_id=0, generators=[None, seeded()],
+        )
+        assert batched[1] == alone[0]
+
+
+class TestPrefixCache:
+    """Cached prefix KV states are reused and bounded by memory"""
+
+    PREFIXES = [[10800, 10001, 10011, 10801], [10800, 10801], [10800, 10001, 10011, 10801]]
+
+    def test_cached_decode_matches_uncached(self, tiny_model):
+        """Decoding from cached prefix states should equal a full prefill"""
+        cache = PrefixKVCache(max_bytes=1 << 24)
+        args = ([1.0] * 3, [0.0] * 3)
+        expected = decode_batch(tiny_model, self.PREFIXES, *args, max_new_tokens=8, pad_id=0)
+
+        first = decode_batch(tiny_model, self.PREFIXES, *args, max_new_tokens=8, pad_id=0, prefix_cache=cache)
+        second = decode_batch(tiny_model, self.PREFIXES, *args, max_new_tokens=8, pad_id=0, prefix_cache=cache)
+
+        assert first == expected and second == expected
+        stats = cache.stats()
+        assert (stats["entries"], stats["misses"], stats["hits"]) == (2, 2, 2)
+        assert stats["bytes"] > 0
+
+    def test_lru_evicts_by_memory(self, tiny_model):
+        """Inserting past the budget should evict the least recently used prefix"""
+        state = encode_prefix_state(tiny_model, [10800, 10801])
+        cache = PrefixKVCache(max_bytes=2 * state.nbytes)
+        cache.put((1,), state)
+        cache.put((2,), state)
+        cache.get((1,))
+        cache.put((3,), state)
+
+        assert cache.get((2,)) is None
+        assert cache.get((1,)) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_lru_evicts_by_entry_count(self, tiny_model):
+        """With room in the byte budget, max_entries should still bound the cache"""
+        state = encode_prefix_state(tiny_model, [10800, 10801])
+        cache = PrefixKVCache(max_bytes=10 * state.nbytes, max_entries=2)
+        for key in range(3):
+            cache.put((key,), state)
+        assert cache.get((0,)) is None
+        stats = cache.stats()
+        assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 2 * state.nbytes, 1)
+
+
+class TestMicroBatcher:
+    """Concurrent requests are grouped and scattered back in order"""
+
+    def test_concurrent_requests_share_a_batch(self):
+        calls = []
+
+        def batch_fn(prefixes, temperatures, top_ps, max_new_tokens, seeds, adapter):
+            calls.append(len(prefixes))
+            return [(p[0], t, n, s) for p, t, n, s in zip(prefixes, temperatures, max_new_tokens, seeds)]
+
+        pool = GenerationPool(PoolConfig(workers=1, max_queue=0))
+        batcher = MicroBatcher(batch_fn, pool, BatchConfig(max_size=4, max_wait_ms=50))
+
+        async def main():
+            batcher.start()
+            try:
+                return await asyncio.gather(*(
+                    batcher.submit([i], temperature=0.5 + i, top_p=0.9, max_new_tokens=i, seed=i or None)
+                    for i in range(3)
+                ))
+            finally:
+                await batcher.stop()
+
+        try:
+            results = asyncio.run(main())
+        finally:
+            pool.shutdown()
+
+        assert calls == [3]
+        assert results == [(0, 0.5, 0, None), (1, 1.5, 1, 1), (2, 2.5, 2, 2)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
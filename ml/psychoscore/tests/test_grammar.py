@@ -0,0 +1,104 @@
+"""
+PSYCHOSCORE REMI Grammar Tests
+
+Run with: pytest tests/test_grammar.py -v
+"""
+
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("miditok")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tokenizer import PsychoscoreTokenizer, REMIGrammar
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return PsychoscoreTokenizer()
+
+
+@pytest.fixture(scope="module")
+def grammar(tokenizer):
+    return REMIGrammar.from_tokenizer(tokenizer)
+
+
+def kinds(tokenizer, ids):
+    inverse = {v: k for k, v in tokenizer.vocab.items()}
+    return {inverse[i].split("_")[0] for i in ids}
+
+
+class TestTransitions:
+    """Each REMI type is followed only by the types its grammar allows"""
+
+    def test_prefix_end_opens_with_sep_or_bar(self, tokenizer, grammar):
+        assert kinds(tokenizer, grammar.allowed_ids(None)) == {"SEP", "Bar"}
+        assert kinds(tokenizer, grammar.allowed_ids(tokenizer.vocab["SEP"])) == {"Bar"}
+
+    def test_note_chain(self, tokenizer, grammar):
+        vocab = tokenizer.vocab
+        assert kinds(tokenizer, grammar.allowed_ids(vocab["Program_0"])) == {"Pitch", "EOS"}
+        assert kinds(tokenizer, grammar.allowed_ids(vocab["Program_-1"])) == {"PitchDrum", "EOS"}
+        assert kinds(tokenizer, grammar.allowed_ids(vocab["Pitch_60"])) == {"Velocity", "EOS"}
+        duration = next(i for name, i in vocab.items() if name.startswith("Duration_"))
+        assert "Position" in kinds(tokenizer, grammar.allowed_ids(duration))
+
+    def test_drum_program_is_reachable(self, tokenizer, grammar):
+        """Wherever a melodic program may come next, the drum program may too"""
+        vocab = tokenizer.vocab
+        duration = next(i for name, i in vocab.items() if name.startswith("Duration_"))
+        for previous in (vocab["Position_0"], duration):
+            allowed = set(grammar.allowed_ids(previous).tolist())
+            assert vocab["Program_0"] in allowed and vocab["Program_-1"] in allowed
+        drum = next(i for name, i in vocab.items() if name.startswith("PitchDrum_"))
+        velocity = next(i for name, i in vocab.items() if name.startswith("Velocity_"))
+        assert grammar.is_valid([vocab["Bar_None"], vocab["TimeSig_4/4"], vocab["Position_0"],
+                                 vocab["Program_-1"], drum, velocity, duration])
+
+    def test_prefix_tokens_never_follow(self, tokenizer, grammar):
+        for name in ("SEP", "Bar_None", "Position_0", "Pitch_60"):
+            assert (grammar.allowed_ids(tokenizer.vocab[name]) < 10000).all()
+
+    def test_is_valid(self, tokenizer, grammar):
+        vocab = tokenizer.vocab
+        note = [vocab["Position_0"], vocab["Program_0"], vocab["Pitch_60"],
+                next(i for n, i in vocab.items() if n.startswith("Velocity_")),
+                next(i for n, i in vocab.items() if n.startswith("Duration_"))]
+        bar = [vocab["Bar_None"], vocab["TimeSig_4/4"]]
+        assert grammar.is_valid([vocab["SEP"]] + bar + note + bar + note)
+        assert not grammar.is_valid(bar + note[2:])
+        assert not grammar.is_valid(bar + [vocab["TRAUMA:0.5"]])
+
+
+class TestLogitsProcessor:
+    """One vectorized mask per step, per row state"""
+
+    def test_masks_rows_by_last_token(self, tokenizer, grammar):
+        vocab = tokenizer.vocab
+        scores = torch.zeros(3, 10803)
+        generated = torch.tensor([[vocab["Bar_None"], vocab["Pitch_60"]],
+                                  [vocab["Bar_None"], vocab["Program_0"]],
+                                  [vocab["Bar_None"], vocab["PAD_None"]]])
+        masked = grammar(generated, scores)
+        assert set(torch.isfinite(masked[0]).nonzero().flatten().tolist()) == set(grammar.allowed_ids(vocab["Pitch_60"]).tolist())
+        assert torch.isfinite(masked[1, vocab["Pitch_60"]])
+        assert not torch.isfinite(masked[1, vocab["Bar_None"]]) and not torch.isfinite(masked[1, vocab["SEP"]])
+        # Finished (padded) rows stay unconstrained
+        assert torch.isfinite(masked[2]).all()
+
+    def test_empty_history_starts_after_prefix(self, tokenizer, grammar):
+        masked = grammar(torch.empty((2, 0), dtype=torch.long), torch.zeros(2, 10803))
+        allowed = torch.isfinite(masked[0]).nonzero().flatten().tolist()
+        assert sorted(allowed) == sorted([tokenizer.vocab["SEP"], tokenizer.vocab["Bar_None"]])
+
+    def test_wider_model_vocab_masks_padding_ids(self, tokenizer, grammar):
+        masked = grammar(torch.tensor([[tokenizer.vocab["Bar_None"]]]), torch.zeros(1, 11000))
+        assert masked.shape == (1, 11000)
+        assert not torch.isfinite(masked[0, 10900])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
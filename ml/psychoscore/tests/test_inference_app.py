@@ -0,0 +1,621 @@
+"""
+PSYCHOSCORE Inference Server Tests (In-Process)
+
+Exercises the FastAPI app with TestClient, no running server required.
+
+Run with: pytest tests/test_inference_app.py -v
+"""
+
+import base64
+import copy
+import io
+import json
+import os
+import subprocess
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("torch")
+from fastapi.testclient import TestClient
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "inference"))
+import server
+from inference.responses import ENVELOPE, STATUS_ERROR, STATUS_OK, unpack_envelope
+
+
+# === FIXTURES ===
+
+@pytest.fixture
+def client(monkeypatch):
+    """TestClient for the rule-based path; the model is never loaded"""
+    monkeypatch.setattr(server, "LOAD_MODE", "lazy")
+    monkeypatch.setenv("PSYCHOSCORE_POOL_WORKERS", "1")
+    monkeypatch.setenv("PSYCHOSCORE_POOL_MAX_QUEUE", "0")
+    with TestClient(server.app) as c:
+        yield c
+
+
+@pytest.fixture
+def job_client(monkeypatch, tmp_path):
+    """Rule-based client with a job store in tmp_path"""
+    monkeypatch.setattr(server, "LOAD_MODE", "lazy")
+    monkeypatch.setenv("PSYCHOSCORE_POOL_WORKERS", "1")
+    monkeypatch.setenv("PSYCHOSCORE_JOB_DIR", str(tmp_path / "jobs"))
+    with TestClient(server.app) as c:
+        yield c
+
+
+def save_tiny_model(tiny_gpt2, path: Path):
+    """One-layer GPT-2 plus the PSYCHOSCORE tokenizer, saved as a checkpoint"""
+    from tokenizer import PsychoscoreTokenizer
+
+    model = tiny_gpt2(n_positions=4096)
+    model.save_pretrained(path)
+    PsychoscoreTokenizer().save_pretrained(str(path))
+    return model
+
+
+@pytest.fixture
+def model_client(monkeypatch, tmp_path, tiny_gpt2):
+    """TestClient serving a tiny random GPT-2 through the micro-batcher"""
+    save_tiny_model(tiny_gpt2, tmp_path)
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(server, "TOKENS_PER_BAR", 4)
+    monkeypatch.setattr(server, "BACKEND", "model")
+    with TestClient(server.app) as c:
+        yield c
+
+
+@pytest.fixture
+def adapter_client(monkeypatch, tmp_path, tiny_gpt2):
+    """Model client with two named LoRA adapters and room for one resident"""
+    import peft
+
+    base = save_tiny_model(tiny_gpt2, tmp_path / "model")
+    for name in ("jazz", "folk"):
+        config = peft.LoraConfig(r=4, target_modules=["c_attn"], fan_in_fan_out=True, init_lora_weights=False)
+        peft.get_peft_model(copy.deepcopy(base), config).save_pretrained(tmp_path / "adapters" / name)
+
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path / "model"))
+    monkeypatch.setenv("PSYCHOSCORE_ADAPTER_DIR", str(tmp_path / "adapters"))
+    monkeypatch.setenv("PSYCHOSCORE_ADAPTER_MAX_RESIDENT", "1")
+    monkeypatch.setattr(server, "TOKENS_PER_BAR", 4)
+    monkeypatch.setattr(server, "BACKEND", "model")
+    with TestClient(server.app) as c:
+        yield c
+
+
+# === COLD START TESTS ===
+
+class TestColdStart:
+    """Heavy ML imports and model loading stay off the rule-based path"""
+
+    def test_import_skips_ml_stack(self):
+        """Importing the server should not pull in torch, transformers, peft or miditok"""
+        code = (
+            "import sys; sys.path[:0] = [sys.argv[1], sys.argv[2]]; import server; "
+            "print(','.join(m for m in ('torch', 'transformers', 'peft', 'miditok') if m in sys.modules))"
+        )
+        root = Path(__file__).parent.parent
+        result = subprocess.run(
+            [sys.executable, "-c", code, str(root), str(root / "inference")],
+            capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.strip() == ""
+
+    def test_rules_ready_without_model(self, client):
+        """The rule backend should be ready and serve with the model unloaded"""
+        assert client.get("/health/live").json() == {"live": True}
+        assert client.get("/health/ready").status_code == 200
+        assert client.post("/generate", json={"max_bars": 1}).json()["success"] is True
+        data = client.get("/health").json()
+        assert (data["live"], data["ready"], data["model_state"]) == (True, True, "not_loaded")
+
+    def test_model_backend_not_ready_after_failed_load(self, monkeypatch, tmp_path):
+        """A failed model load should fail readiness and model requests, not liveness"""
+        monkeypatch.setenv("MODEL_PATH", str(tmp_path / "missing"))
+        monkeypatch.setattr(server, "BACKEND", "model")
+        monkeypatch.setattr(server, "LOAD_MODE", "lazy")
+        with TestClient(server.app) as c:
+            assert c.get("/health/ready").status_code == 503
+            assert c.post("/generate", json={"max_bars": 1}).status_code == 503
+            data = c.get("/health").json()
+            assert (data["live"], data["ready"], data["model_state"]) == (True, False, "failed")
+
+
+# === WORKER POOL TESTS ===
+
+class TestWorkerPool:
+    """Generation runs on the bounded worker pool"""
+
+    def test_health_reports_pool(self, client):
+        """Health should expose pool occupancy"""
+        data = client.get("/health").json()
+        assert data["pool"]["workers"] == 1
+
+    def test_generate_runs_on_pool(self, client):
+        """Generate should succeed through the pool"""
+        data = client.post("/generate", json={"max_bars": 2}).json()
+        assert data["success"] is True
+
+    def test_saturated_returns_503_with_retry_after(self, client):
+        """A full pool should reject with 503 and Retry-After"""
+        release = threading.Event()
+        server.pool.submit(release.wait, 5)
+        try:
+            response = client.post("/generate", json={"max_bars": 2})
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+        finally:
+            release.set()
+
+
+class TestSeededGeneration:
+    """Seeded requests are reproducible and served from the response cache"""
+
+    def test_same_seed_same_midi(self, client):
+        """Identical seeded requests should return identical MIDI, the second from cache"""
+        first = client.post("/generate", json={"max_bars": 4, "entropy": 0.9, "seed": 11}).json()
+        second = client.post("/generate", json={"max_bars": 4, "entropy": 0.9, "seed": 11}).json()
+        assert first["midi_base64"] == second["midi_base64"]
+        assert (first["parameters"]["cached"], second["parameters"]["cached"]) == (False, True)
+
+    def test_profiles_in_one_bin_are_not_confused(self, client):
+        """The rules generator reads raw values, so a nearby profile must not hit another's entry"""
+        base = {"max_bars": 4, "seed": 1, "temperature": 0.8}
+        first = client.post("/generate", json={**base, "trauma": 0.31, "disc": {"D": 0.26}}).json()
+        second = client.post("/generate", json={**base, "trauma": 0.34, "disc": {"D": 0.34}}).json()
+        assert second["parameters"]["cached"] is False
+        assert first["midi_base64"] != second["midi_base64"]
+
+    def test_checkpoint_change_misses(self, client, monkeypatch):
+        """Entries made with another checkpoint should not be served"""
+        body = {"max_bars": 2, "seed": 5}
+        client.post("/generate", json=body)
+        monkeypatch.setattr(server, "checkpoint_id", "retrained")
+        assert client.post("/generate", json=body).json()["parameters"]["cached"] is False
+
+    def test_seed_is_reproducible_without_cache(self):
+        """The rule-based generator should depend only on its seed"""
+        from tokenizer import PsychometricProfile
+        generator = server.PsychoscoreInference("unused")
+        profile = PsychometricProfile(entropy=0.9)
+        assert generator.generate(profile, max_bars=4, seed=3) == generator.generate(profile, max_bars=4, seed=3)
+        assert generator.generate(profile, max_bars=4, seed=3) != generator.generate(profile, max_bars=4, seed=4)
+
+    def test_unseeded_requests_bypass_cache(self, client):
+        """Requests without a seed should always generate"""
+        for _ in range(2):
+            data = client.post("/generate", json={"max_bars": 2}).json()
+            assert data["parameters"]["cached"] is False
+
+
+class TestCoalescing:
+    """Identical concurrent requests share one in-flight generation"""
+
+    def run_concurrently(self, client, monkeypatch, bodies):
+        calls, count = [], len(bodies)
+        original = server._run_generation
+
+        def slow_generation(*args):
+            calls.append(args)
+            release.wait(5)
+            return original(*args)
+
+        release = threading.Event()
+        monkeypatch.setattr(server, "_run_generation", slow_generation)
+        results = [None] * count
+
+        def post(i):
+            results[i] = client.post("/generate", json=bodies[i])
+
+        threads = [threading.Thread(target=post, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        # Let every other request join the flight or be turned away before it finishes
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            settled = server.flights.stats()["shared"] + sum(r is not None for r in results)
+            if settled >= count - 1:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return calls, results
+
+    def test_identical_seeded_requests_generate_once(self, client, monkeypatch):
+        """With a one-slot pool and no queue, only a shared generation lets all four succeed"""
+        calls, results = self.run_concurrently(client, monkeypatch, [{"max_bars": 2, "seed": 21}] * 4)
+        assert len(calls) == 1
+        data = [r.json() for r in results]
+        assert all(d["success"] for d in data)
+        assert len({d["midi_base64"] for d in data}) == 1
+        assert sorted(d["parameters"]["coalesced"] for d in data) == [False, True, True, True]
+
+    def test_unseeded_requests_generate_separately(self, client, monkeypatch):
+        calls, results = self.run_concurrently(client, monkeypatch, [{"max_bars": 2}] * 2)
+        assert len(calls) == 1
+        assert sorted(r.status_code for r in results) == [200, 503]
+
+    def test_profiles_in_one_bin_do_not_share(self, client, monkeypatch):
+        """Different raw profiles in the same 0.1 bin produce different MIDI, so they must not share a flight"""
+        bodies = [{"max_bars": 2, "seed": 21, "trauma": 0.31}, {"max_bars": 2, "seed": 21, "trauma": 0.34}]
+        calls, results = self.run_concurrently(client, monkeypatch, bodies)
+        assert len(calls) == 1
+        assert sorted(r.status_code for r in results) == [200, 503]
+        assert server.flights.stats()["shared"] == 0
+
+
+class TestBinaryResponses:
+    """MIDI bytes are returned without the base64 round-trip"""
+
+    def test_generate_midi_returns_raw_bytes(self, client):
+        """/generate/midi should return a MIDI file with parameters in a header"""
+        response = client.post("/generate/midi", json={"max_bars": 2, "seed": 1})
+        assert response.headers["content-type"] == "audio/midi"
+        assert response.content.startswith(b"MThd")
+        assert json.loads(response.headers["x-psychoscore-parameters"])["seed"] == 1
+
+    def test_generate_negotiates_binary(self, client):
+        """Accept: audio/midi should get the same bytes JSON would base64-encode"""
+        body = {"max_bars": 2, "seed": 5}
+        encoded = client.post("/generate", json=body).json()["midi_base64"]
+        raw = client.post("/generate", json=body, headers={"Accept": "audio/midi"})
+        assert raw.content == base64.b64decode(encoded)
+
+    def test_generate_negotiates_multipart(self, client):
+        """Accept: multipart/mixed should carry parameters then MIDI"""
+        response = client.post("/generate", json={"max_bars": 2}, headers={"Accept": "multipart/mixed"})
+        content_type = response.headers["content-type"]
+        assert content_type.startswith("multipart/mixed; boundary=")
+        boundary = content_type.split("boundary=")[1].encode()
+        parts = response.content.split(b"--" + boundary)
+        assert b"application/json" in parts[1] and b'"bars": 2' in parts[1]
+        assert b"MThd" in parts[2]
+
+    def test_gzip_when_accepted(self, client):
+        """Large responses should be gzip-encoded for clients that accept it"""
+        response = client.post(
+            "/generate/midi", json={"max_bars": 64},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.headers.get("content-encoding") == "gzip"
+        assert response.content.startswith(b"MThd")
+
+
+class TestBatchEndpoint:
+    """/generate/batch returns every item in order"""
+
+    ITEMS = [{"max_bars": 2, "seed": 1}, {"max_bars": 3, "seed": 2}, {"max_bars": 4, "seed": 3}]
+
+    def test_envelope_in_request_order(self, client):
+        """Envelope items should match the single-request results, in order"""
+        response = client.post("/generate/batch", json={"requests": self.ITEMS})
+        assert response.headers["content-type"] == ENVELOPE
+        items = unpack_envelope(response.content)
+        expected = [client.post("/generate/midi", json=item).content for item in self.ITEMS]
+        assert items == [(STATUS_OK, midi) for midi in expected]
+
+    def test_per_item_errors(self, client, monkeypatch):
+        """A failing item should report its error without failing the batch"""
+        original = server.inference.generate
+
+        def flaky(profile, max_bars, **kwargs):
+            if max_bars == 3:
+                raise ValueError("no three-bar phrases")
+            return original(profile, max_bars, **kwargs)
+
+        monkeypatch.setattr(server.inference, "generate", flaky)
+        items = unpack_envelope(client.post("/generate/batch", json={"requests": self.ITEMS}).content)
+        assert [status for status, _ in items] == [STATUS_OK, STATUS_ERROR, STATUS_OK]
+        assert items[1][1] == b"no three-bar phrases"
+
+    def test_zip_with_manifest(self, client):
+        """Accept: application/zip should return MIDI files plus a manifest"""
+        response = client.post(
+            "/generate/batch", json={"requests": self.ITEMS},
+            headers={"Accept": "application/zip"},
+        )
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        manifest = json.loads(archive.read("manifest.json"))
+        assert [entry["file"] for entry in manifest] == ["000.mid", "001.mid", "002.mid"]
+        assert archive.read("001.mid").startswith(b"MThd")
+
+    def test_empty_batch_rejected(self, client):
+        """An empty request list should fail validation"""
+        assert client.post("/generate/batch", json={"requests": []}).status_code == 422
+
+
+def read_events(response):
+    """Parse a server-sent event stream into (event, data) pairs"""
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestStreaming:
+    """/generate/stream emits bars as server-sent events"""
+
+    def test_stream_matches_generator(self, client):
+        """Streamed bars should be the seeded generator's bars, framed by start and end"""
+        from tokenizer import PsychometricProfile
+        response = client.post("/generate/stream", json={"max_bars": 3, "entropy": 0.5, "seed": 9})
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = read_events(response)
+        assert [name for name, _ in events] == ["start", "bar", "bar", "bar", "end"]
+        assert events[0][1]["bars"] == 3
+
+        expected = list(server.inference.iter_bars(PsychometricProfile(entropy=0.5), 3, seed=9))
+        assert [data["notes"][0][0] for _, data in events[1:4]] == [bar[0][0] for bar in expected]
+        assert events[2][1]["notes"][0][1] == 4.0
+
+
+class TestScoreEndpoint:
+    """/generate/score renders an MPN timeline"""
+
+    SCORE = "BEAT,SPEAKER,TEXT,TRAUMA_R,ENTROPY_H\n1,HAMLET,To be,0.3,0.3\n2,GHOST,Remember me,0.9,0.7\n"
+
+    def test_csv_renders_midi(self, client):
+        response = client.post("/generate/score", json={"csv": self.SCORE, "speakers": {"GHOST": {"trauma": 0.9}}})
+        assert response.headers["content-type"] == "audio/midi"
+        assert response.content.startswith(b"MThd")
+
+    def test_rows_render_like_csv(self, client):
+        """Row dicts (BatchScorer JSON) should render exactly like the same CSV"""
+        rows = [
+            {"BEAT": 1, "SPEAKER": "HAMLET", "TRAUMA_R": 0.3, "ENTROPY_H": 0.3},
+            {"BEAT": 2, "SPEAKER": "GHOST", "TRAUMA_R": 0.9, "ENTROPY_H": 0.7},
+        ]
+        from_rows = client.post("/generate/score", json={"beats": rows, "seed": 2}).content
+        from_csv = client.post("/generate/score", json={"csv": self.SCORE, "seed": 2}).content
+        assert from_rows == from_csv
+
+    def test_bad_score_rejected(self, client):
+        assert client.post("/generate/score", json={"csv": "BEAT,SPEAKER\n1,A\n"}).status_code == 422
+        assert client.post("/generate/score", json={}).status_code == 422
+
+    def test_csv_naming_a_server_file_is_not_read(self, client, tmp_path):
+        """A path-looking csv value should be parsed as CSV text, never opened"""
+        path = tmp_path / "score.csv"
+        path.write_text(self.SCORE)
+        assert client.post("/generate/score", json={"csv": str(path)}).status_code == 422
+
+
+def wait_for_job(client, job_id: str, timeout: float = 10) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    pytest.fail(f"job {job_id} did not finish")
+
+
+class TestJobs:
+    """Long generations run as stored jobs"""
+
+    def test_generate_job_round_trip(self, job_client):
+        submitted = job_client.post("/jobs", json={"kind": "generate", "request": {"max_bars": 2, "seed": 4}})
+        assert submitted.status_code == 202
+        job_id = submitted.json()["id"]
+        assert submitted.headers["Location"] == f"/jobs/{job_id}"
+
+        job = wait_for_job(job_client, job_id)
+        assert job["status"] == "succeeded", job
+        result = job_client.get(job["result_url"])
+        assert result.headers["content-type"] == "audio/midi"
+        direct = job_client.post("/generate/midi", json={"max_bars": 2, "seed": 4}).content
+        assert result.content == direct
+
+        assert job_client.delete(f"/jobs/{job_id}").json() == {"id": job_id, "deleted": True}
+        assert job_client.get(f"/jobs/{job_id}").status_code == 404
+
+    def test_batch_job_returns_zip(self, job_client):
+        body = {"kind": "batch", "request": {"requests": [{"max_bars": 1}, {"max_bars": 2}]}}
+        job = wait_for_job(job_client, job_client.post("/jobs", json=body).json()["id"])
+        archive = zipfile.ZipFile(io.BytesIO(job_client.get(job["result_url"]).content))
+        assert sorted(archive.namelist()) == ["000.mid", "001.mid", "manifest.json"]
+
+    def test_invalid_request_rejected_up_front(self, job_client):
+        response = job_client.post("/jobs", json={"kind": "generate", "request": {"max_bars": 0}})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "request", "max_bars"]
+        assert job_client.post("/jobs", json={"kind": "render"}).status_code == 422
+
+    def test_failed_job_and_unfinished_result(self, job_client):
+        job = wait_for_job(job_client, job_client.post("/jobs", json={"kind": "score", "request": {}}).json()["id"])
+        assert job["status"] == "failed"
+        assert job["error"].startswith("422")
+        assert job_client.get(f"/jobs/{job['id']}/result").status_code == 409
+
+    def test_interrupted_jobs_resume_on_restart(self, monkeypatch, tmp_path):
+        """A job left running by a dead process is queued again at startup"""
+        from inference.jobs import JobStore
+        store = JobStore(str(tmp_path / "jobs"))
+        job = store.submit("generate", {"max_bars": 1})
+        store.claim(worker=2 ** 22 + 1)     # above the default pid_max, so never alive
+        store.close()
+
+        monkeypatch.setattr(server, "LOAD_MODE", "lazy")
+        monkeypatch.setenv("PSYCHOSCORE_JOB_DIR", str(tmp_path / "jobs"))
+        with TestClient(server.app) as c:
+            assert wait_for_job(c, job.id)["status"] == "succeeded"
+
+    def test_jobs_need_a_store(self, client):
+        assert client.post("/jobs", json={"kind": "generate"}).status_code == 503
+
+
+class TestModelBackend:
+    """Model-backed generation runs through the micro-batcher"""
+
+    def test_generate_with_model(self, model_client):
+        """Generate should decode with the model and return MIDI"""
+        data = model_client.post("/generate", json={"max_bars": 2}).json()
+        assert data["success"] is True, data.get("error")
+        assert data["parameters"]["backend"] == "model"
+        health = model_client.get("/health").json()
+        assert health["batcher"]["batches"] == 1
+        assert (health["ready"], health["model_state"]) == (True, "ready")
+        metrics = model_client.get("/metrics").text
+        assert f'psychoscore_prefix_cache_bytes {health["prefix_cache"]["bytes"]}' in metrics
+        assert health["prefix_cache"]["bytes"] > 0
+
+    def test_process_pool_with_model(self, monkeypatch, tmp_path, tiny_gpt2):
+        """Process workers should decode with the model they forked with (nothing unpicklable is sent)"""
+        save_tiny_model(tiny_gpt2, tmp_path)
+        monkeypatch.setenv("MODEL_PATH", str(tmp_path))
+        monkeypatch.setenv("PSYCHOSCORE_POOL_KIND", "process")
+        monkeypatch.setenv("PSYCHOSCORE_POOL_WORKERS", "1")
+        monkeypatch.setattr(server, "TOKENS_PER_BAR", 4)
+        monkeypatch.setattr(server, "BACKEND", "model")
+        with TestClient(server.app) as client:
+            data = client.post("/generate", json={"max_bars": 2, "seed": 1}).json()
+            assert data["success"] is True, data.get("error")
+            assert data["parameters"]["backend"] == "model"
+
+    def test_batch_endpoint_uses_batcher(self, model_client):
+        """Batch items should be decoded together through the micro-batcher"""
+        body = {"requests": [{"max_bars": 1, "seed": i} for i in range(4)]}
+        items = unpack_envelope(model_client.post("/generate/batch", json=body).content)
+        assert [status for status, _ in items] == [STATUS_OK] * 4
+        assert model_client.get("/health").json()["batcher"]["mean_batch_size"] > 1
+
+    def test_stream_with_model(self, model_client):
+        """Model streaming should emit bars and finish with an end event"""
+        events = read_events(model_client.post("/generate/stream", json={"max_bars": 2, "seed": 0}))
+        assert events[0][1]["backend"] == "model"
+        assert events[-1][0] == "end"
+        assert all(name == "bar" for name, _ in events[1:-1])
+
+    def test_score_with_model(self, model_client):
+        """Score rendering should decode all segments with the model"""
+        score = "BEAT,SPEAKER,TRAUMA_R,ENTROPY_H\n1,HAMLET,0.3,0.3\n2,GHOST,0.9,0.7\n"
+        response = model_client.post("/generate/score", json={"csv": score, "seed": 0})
+        assert response.status_code == 200
+        assert response.content.startswith(b"MThd")
+
+    def test_decoding_follows_remi_grammar(self, model_client):
+        """Even an untrained model only samples structurally valid REMI"""
+        from tokenizer import PsychometricProfile
+        inference = server.inference
+        inference.load()
+        prefixes = [inference.encode_prefix(PsychometricProfile(trauma=t)) for t in (0.1, 0.9)]
+        rows = inference.decode_rows(prefixes, [1.5, 1.5], [1.0, 1.0], [64, 64], seeds=[0, 1])
+        assert all(row and inference.grammar.is_valid(row) for row in rows)
+        assert all(token < 10000 for row in rows for token in row[1:])
+
+    def test_speculative_generation(self, model_client):
+        """Speculative requests decode on the pool and report draft acceptance"""
+        body = {"max_bars": 2, "seed": 3, "speculative": "ngram", "draft_tokens": 3}
+        data = model_client.post("/generate", json=body).json()
+        assert data["success"] is True, data.get("error")
+        assert data["parameters"]["speculative"] == "ngram"
+        health = model_client.get("/health").json()
+        assert health["batcher"]["batches"] == 0
+        assert set(health["speculative"]) == {"ngram"}
+        assert model_client.post("/generate", json=body).json()["midi_base64"] == data["midi_base64"]
+        metrics = model_client.get("/metrics").text
+        assert 'psychoscore_draft_acceptance_ratio{drafter="ngram"}' in metrics
+
+    def test_speculative_stream(self, model_client):
+        events = read_events(model_client.post("/generate/stream", json={"max_bars": 2, "speculative": "ngram"}))
+        assert events[-1][0] == "end"
+
+    def test_unconfigured_drafter_is_422(self, model_client):
+        assert model_client.post("/generate", json={"max_bars": 1, "speculative": "draft"}).status_code == 422
+
+    def test_speculative_needs_model_backend(self, client):
+        assert client.post("/generate", json={"max_bars": 1, "speculative": "ngram"}).status_code == 422
+
+
+class TestAdapters:
+    """Named LoRA adapters per request, hot-loaded over one base model"""
+
+    def test_generate_with_adapter(self, adapter_client):
+        data = adapter_client.post("/generate", json={"max_bars": 1, "adapter": "jazz"}).json()
+        assert data["success"] is True, data.get("error")
+        assert data["parameters"]["adapter"] == "jazz"
+        assert adapter_client.get("/health").json()["adapters"]["resident"] == ["jazz"]
+        # The PEFT wrapper replaced the bare base; inference.model must not go stale
+        assert server.inference.model is server.inference.adapters.model
+
+    def test_unknown_adapter_is_404(self, adapter_client):
+        assert adapter_client.post("/generate", json={"max_bars": 1, "adapter": "polka"}).status_code == 404
+        assert adapter_client.post("/adapters/polka").status_code == 404
+
+    def test_adapter_needs_model_backend(self, client):
+        assert client.post("/generate", json={"max_bars": 1, "adapter": "jazz"}).status_code == 422
+
+    def test_hot_load_evicts_and_unload(self, adapter_client):
+        """With one resident slot, loading a second adapter evicts the first"""
+        assert adapter_client.get("/adapters").json()["available"] == ["folk", "jazz"]
+        assert adapter_client.post("/adapters/jazz").json() == {"name": "jazz", "loaded": True, "resident": ["jazz"]}
+        assert adapter_client.post("/adapters/folk").json()["resident"] == ["folk"]
+        assert adapter_client.delete("/adapters/folk").json()["resident"] == []
+        assert adapter_client.delete("/adapters/folk").status_code == 404
+        data = adapter_client.post("/generate", json={"max_bars": 1}).json()
+        assert data["success"] is True, data.get("error")
+
+
+class TestMetrics:
+    """Prometheus text at /metrics, recorded as requests run"""
+
+    def test_requests_bars_and_temperature(self, client):
+        requests_before = server.REQUESTS.value("/generate", "POST", "200")
+        bars_before = server.BARS_GENERATED.value("rules")
+        dynamic_before = server.TEMPERATURE.count("dynamic")
+
+        assert client.post("/generate", json={"max_bars": 3}).json()["success"] is True
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+        assert server.REQUESTS.value("/generate", "POST", "200") == requests_before + 1
+        assert server.BARS_GENERATED.value("rules") == bars_before + 3
+        assert server.TEMPERATURE.count("dynamic") == dynamic_before + 1
+        text = response.text
+        assert 'psychoscore_request_duration_seconds_bucket{endpoint="/generate",le="+Inf"}' in text
+        assert 'psychoscore_queue_depth{queue="pool"} 0' in text
+        assert "psychoscore_model_ready 1" in text
+
+    def test_cache_hits_are_mirrored(self, client):
+        body = {"max_bars": 1, "seed": 99}
+        client.post("/generate", json=body)
+        client.post("/generate", json=body)
+        text = client.get("/metrics").text
+        hits = client.get("/health").json()["response_cache"]["hits"]
+        assert f'psychoscore_cache_lookups_total{{cache="response",result="hit"}} {hits}' in text
+
+    def test_shared_directory_merges_workers(self, monkeypatch, tmp_path):
+        """With PSYCHOSCORE_METRICS_DIR, a scrape adds other workers' totals and labels gauges by pid"""
+        other = server.Registry()
+        other.counter("psychoscore_bars_generated", "Bars", ("backend",)).inc("rules", amount=1000)
+        dead_pid = 2 ** 22 + 1
+        (tmp_path / f"{dead_pid}-x.json").write_text(json.dumps({"pid": dead_pid, "metrics": other.snapshot()}))
+        monkeypatch.setenv("PSYCHOSCORE_METRICS_DIR", str(tmp_path))
+        monkeypatch.setattr(server, "LOAD_MODE", "lazy")
+        with TestClient(server.app) as client:
+            own = server.BARS_GENERATED.value("rules")
+            text = client.get("/metrics").text
+        assert f'psychoscore_bars_generated_total{{backend="rules"}} {int(own) + 1000}' in text
+        assert f'psychoscore_model_ready{{pid="{os.getpid()}"}} 1' in text
+
+    def test_unmatched_routes_share_a_label(self, client):
+        before = server.REQUESTS.value("unmatched", "GET", "404")
+        client.get("/no/such/path")
+        assert server.REQUESTS.value("unmatched", "GET", "404") == before + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
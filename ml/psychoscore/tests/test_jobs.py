@@ -0,0 +1,125 @@
+"""
+PSYCHOSCORE Job Store Tests
+
+Run with: pytest tests/test_jobs.py -v
+"""
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.jobs import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobRunner, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path))
+    yield store
+    store.close()
+
+
+class TestJobStore:
+    """Jobs move queued -> running -> finished, once"""
+
+    def test_claims_oldest_first_and_only_once(self, store):
+        first = store.submit("generate", {"max_bars": 1})
+        second = store.submit("generate", {"max_bars": 2})
+        assert store.claim(worker=1).id == first.id
+        assert store.claim(worker=1).id == second.id
+        assert store.claim(worker=1) is None
+        assert store.request(second.id) == {"max_bars": 2}
+
+    def test_finish_writes_result(self, store):
+        job = store.submit("generate", {})
+        store.claim(worker=1)
+        assert store.finish(job.id, b"MThd", "audio/midi")
+        job = store.get(job.id)
+        assert (job.status, job.bytes) == (SUCCEEDED, 4)
+        assert store.result_path(job).read_bytes() == b"MThd"
+        assert store.delete(job.id)
+        assert store.get(job.id) is None and not store.result_path(job).exists()
+
+    def test_cancelled_job_keeps_no_result(self, store):
+        job = store.submit("generate", {})
+        store.claim(worker=1)
+        assert store.cancel(job.id)
+        assert not store.finish(job.id, b"MThd", "audio/midi")
+        assert store.get(job.id).status == CANCELLED
+        assert list(store.results.iterdir()) == []
+        assert not store.cancel(job.id)
+
+    def test_requeue_only_orphans(self, store):
+        live = store.submit("generate", {})
+        dead = store.submit("generate", {})
+        store.claim(worker=os.getppid())
+        store.claim(worker=2 ** 22 + 1)
+        assert store.requeue_orphans() == 1
+        assert store.get(live.id).status == RUNNING
+        assert store.get(dead.id).status == QUEUED
+        assert store.stats()[QUEUED] == 1
+
+    def test_jobs_survive_reopening(self, tmp_path):
+        first = JobStore(str(tmp_path))
+        job = first.submit("score", {"csv": "x"})
+        first.close()
+        reopened = JobStore(str(tmp_path))
+        assert reopened.get(job.id).status == QUEUED
+        reopened.close()
+
+
+class TestJobRunner:
+    """Runners execute claimed jobs and notice cancellation from other processes"""
+
+    def test_cancel_through_store_stops_running_job(self, store):
+        """A cancel made by another worker (store only, no runner.cancel) should stop the job"""
+        async def scenario():
+            started, stopped = asyncio.Event(), asyncio.Event()
+
+            async def execute(kind, request):
+                started.set()
+                try:
+                    await asyncio.sleep(30)
+                finally:
+                    stopped.set()
+                return b"MThd", "audio/midi"
+
+            runner = JobRunner(store, execute, poll_interval=0.05)
+            runner.start()
+            job = store.submit("generate", {})
+            runner.notify()
+            await asyncio.wait_for(started.wait(), 5)
+            assert store.cancel(job.id)
+            await asyncio.wait_for(stopped.wait(), 5)
+            await runner.stop()
+            return job
+
+        job = asyncio.run(scenario())
+        assert store.get(job.id).status == CANCELLED
+        assert list(store.results.iterdir()) == []
+
+    def test_failure_is_recorded(self, store):
+        async def scenario():
+            async def execute(kind, request):
+                raise ValueError("bad request")
+
+            runner = JobRunner(store, execute, poll_interval=0.05)
+            runner.start()
+            job = store.submit("generate", {})
+            runner.notify()
+            for _ in range(100):
+                if store.get(job.id).status not in (QUEUED, RUNNING):
+                    break
+                await asyncio.sleep(0.05)
+            await runner.stop()
+            return store.get(job.id)
+
+        job = asyncio.run(scenario())
+        assert (job.status, job.error) == (FAILED, "bad request")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,107 @@
+"""
+PSYCHOSCORE Metrics Tests
+
+Run with: pytest tests/test_metrics.py -v
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.metrics import MultiprocessMetrics, Registry, clear_metrics_dir
+
+
+class TestExposition:
+    """Families render in the Prometheus text format"""
+
+    def test_counter_and_gauge(self):
+        registry = Registry()
+        counter = registry.counter("jobs", "Jobs run", ("kind",))
+        gauge = registry.gauge("depth", "Queue depth")
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        counter.inc('b"c')
+        gauge.set(value=1.5)
+        lines = registry.render().splitlines()
+        assert lines[:2] == ["# HELP jobs Jobs run", "# TYPE jobs counter"]
+        assert 'jobs_total{kind="a"} 3' in lines
+        assert 'jobs_total{kind="b\\"c"} 1' in lines
+        assert "depth 1.5" in lines
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram("latency", "Latency", [0.1, 1.0], ("route",))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "/x")
+        lines = registry.render().splitlines()
+        assert 'latency_bucket{route="/x",le="0.1"} 2' in lines
+        assert 'latency_bucket{route="/x",le="1"} 3' in lines
+        assert 'latency_bucket{route="/x",le="+Inf"} 4' in lines
+        assert 'latency_sum{route="/x"} 3.65' in lines
+        assert 'latency_count{route="/x"} 4' in lines
+        assert histogram.count("/x") == 4
+
+    def test_duplicate_names_rejected(self):
+        registry = Registry()
+        registry.gauge("x", "first")
+        with pytest.raises(ValueError):
+            registry.counter("x", "second")
+
+
+def worker_registry():
+    """(registry, bars counter, depth gauge, latency histogram) as one worker would have them"""
+    registry = Registry()
+    return (
+        registry,
+        registry.counter("bars", "Bars", ("backend",)),
+        registry.gauge("depth", "Queue depth"),
+        registry.histogram("latency", "Latency", [0.1, 1.0]),
+    )
+
+
+class TestMultiprocess:
+    """Pre-forked workers merge their values through a shared directory"""
+
+    def test_scrapes_merge_all_workers(self, tmp_path):
+        """Counters and histograms sum over workers, exited ones too; gauges only for live pids"""
+        dead_pid = 2 ** 22 + 1
+        other, bars, depth, latency = worker_registry()
+        bars.inc("rules", amount=5)
+        depth.set(value=7)
+        latency.observe(0.5)
+        (tmp_path / f"{dead_pid}-old.json").write_text(json.dumps({"pid": dead_pid, "metrics": other.snapshot()}))
+
+        registry, bars, depth, latency = worker_registry()
+        bars.inc("rules", amount=2)
+        depth.set(value=1)
+        latency.observe(0.05)
+        lines = MultiprocessMetrics(registry, str(tmp_path)).render().splitlines()
+
+        assert 'bars_total{backend="rules"} 7' in lines
+        assert 'latency_bucket{le="0.1"} 1' in lines and 'latency_count 2' in lines
+        assert f'depth{{pid="{os.getpid()}"}} 1' in lines
+        assert not any(line.startswith("depth") and str(dead_pid) in line for line in lines)
+
+    def test_totals_never_go_backwards(self, tmp_path):
+        """Whichever worker answers, the merged total is the same and only grows"""
+        first, first_bars, _, _ = worker_registry()
+        second, second_bars, _, _ = worker_registry()
+        a = MultiprocessMetrics(first, str(tmp_path))
+        b = MultiprocessMetrics(second, str(tmp_path))
+        first_bars.inc("model", amount=3)
+        a.write()
+        second_bars.inc("model", amount=1)
+        b.write()
+        totals = [a.render(), b.render()]
+        assert all('bars_total{backend="model"} 4' in text.splitlines() for text in totals)
+
+        clear_metrics_dir(str(tmp_path))
+        assert list(tmp_path.glob("*.json")) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
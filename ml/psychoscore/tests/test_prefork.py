@@ -0,0 +1,90 @@
+"""
+PSYCHOSCORE Pre-Fork Serving Tests
+
+Starts the server with several forked workers in a subprocess.
+
+Run with: pytest tests/test_prefork.py -v
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+
+if not hasattr(os, "fork"):
+    pytest.skip("pre-fork serving needs os.fork", allow_module_level=True)
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.prefork import worker_threads
+
+ROOT = Path(__file__).parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def prefork_server():
+    """Rule-backend server with two workers; yields its base URL"""
+    port = free_port()
+    env = dict(os.environ, PSYCHOSCORE_WORKERS="2", PSYCHOSCORE_HOST="127.0.0.1", PSYCHOSCORE_PORT=str(port))
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "inference" / "server.py")],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                if requests.get(f"{url}/health/ready", timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        else:
+            pytest.fail("pre-fork server did not start")
+        yield url, process
+    finally:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+class TestPrefork:
+    """Workers share one listening socket and shut down with the parent"""
+
+    def test_worker_threads_split_cores(self):
+        assert worker_threads(1) == (os.cpu_count() or 1)
+        assert worker_threads(10 ** 6) == 1
+
+    def test_workers_serve_and_stop(self, prefork_server):
+        url, process = prefork_server
+        pids = set()
+        for _ in range(10):
+            response = requests.post(f"{url}/generate", json={"max_bars": 1}, headers={"Connection": "close"})
+            assert response.json()["success"] is True
+            pids.add(requests.get(f"{url}/health", headers={"Connection": "close"}).json()["pid"])
+        # Requests are answered by forked workers, never the supervising parent
+        assert process.pid not in pids
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
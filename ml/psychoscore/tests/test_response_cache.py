@@ -0,0 +1,85 @@
+"""
+PSYCHOSCORE Response Cache Tests
+
+Run with: pytest tests/test_response_cache.py -v
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("miditok")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference import response_cache
+from inference.response_cache import ResponseCache, checkpoint_fingerprint, response_key
+from tokenizer import PsychometricProfile
+
+
+class TestResponseCache:
+    """Exact keys, LRU bound and disk persistence"""
+
+    def test_key_uses_exact_profile(self):
+        """Profiles in the same 0.1 bin should get different keys; equal ones share a key"""
+        a = response_key(PsychometricProfile(trauma=0.31), seed=1, bars=8)
+        b = response_key(PsychometricProfile(trauma=0.29), seed=1, bars=8)
+        c = response_key(PsychometricProfile(trauma=0.29), seed=2, bars=8)
+        assert len({a, b, c}) == 3
+        assert b == response_key(PsychometricProfile(trauma=0.29), bars=8, seed=1)
+
+    def test_key_covers_model_and_generator_version(self, tmp_path, monkeypatch):
+        """A different checkpoint or generator version should miss"""
+        (tmp_path / "model.safetensors").write_bytes(b"v1")
+        before = checkpoint_fingerprint(str(tmp_path))
+        (tmp_path / "model.safetensors").write_bytes(b"v2-longer")
+        after = checkpoint_fingerprint(str(tmp_path))
+        assert before != after
+        assert response_key(PsychometricProfile(), model=before) != response_key(PsychometricProfile(), model=after)
+
+        key = response_key(PsychometricProfile(), seed=1)
+        monkeypatch.setattr(response_cache, "GENERATOR_VERSION", response_cache.GENERATOR_VERSION + 1)
+        assert response_key(PsychometricProfile(), seed=1) != key
+
+    def test_memory_lru_is_bounded(self):
+        """Only the most recent entries should stay in memory"""
+        cache = ResponseCache(max_entries=2)
+        for key in "abc":
+            cache.put(key, key.encode())
+        assert cache.get("a") is None
+        assert cache.get("c") == b"c"
+        assert cache.stats()["entries"] == 2
+
+    def test_disk_survives_restart(self, tmp_path):
+        """A new cache over the same directory should serve stored bytes"""
+        ResponseCache(max_entries=0, directory=str(tmp_path)).put("k", b"MThd")
+        restarted = ResponseCache(max_entries=4, directory=str(tmp_path))
+        assert restarted.get("k") == b"MThd"
+        assert restarted.stats()["hits"] == 1
+
+    def test_disk_is_bounded_by_bytes(self, tmp_path):
+        """Least recently used files should be evicted past the byte budget"""
+        cache = ResponseCache(max_entries=0, directory=str(tmp_path), max_disk_bytes=250)
+        for i, key in enumerate("abc"):
+            cache.put(key, bytes(100))
+            os.utime(next(tmp_path.glob(f"*-{key}.mid")), (i, i))
+            if key == "b":
+                assert cache.get("a") is not None  # Refreshes a's mtime
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats()["disk_bytes"] == 200
+        assert sum(p.stat().st_size for p in tmp_path.iterdir()) == 200
+
+    def test_stale_versions_removed_at_startup(self, tmp_path, monkeypatch):
+        """Entries from other generator versions should be deleted when the cache opens"""
+        ResponseCache(max_entries=0, directory=str(tmp_path)).put("old", b"MThd")
+        (tmp_path / "legacy.mid").write_bytes(b"MThd")
+        monkeypatch.setattr(response_cache, "GENERATOR_VERSION", response_cache.GENERATOR_VERSION + 1)
+        cache = ResponseCache(max_entries=0, directory=str(tmp_path))
+        cache.put("new", b"MThd")
+        assert [p.name for p in tmp_path.iterdir()] == [f"v{response_cache.GENERATOR_VERSION}-new.mid"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,75 @@
+"""
+PSYCHOSCORE Binary Response Helper Tests
+
+Run with: pytest tests/test_responses.py -v
+"""
+
+from pathlib import Path
+
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.responses import (
+    JSON,
+    MIDI,
+    MULTIPART,
+    STATUS_ERROR,
+    STATUS_OK,
+    negotiate,
+    pack_envelope,
+    unpack_envelope,
+)
+
+
+OFFERED = (JSON, MIDI, MULTIPART)
+
+
+class TestNegotiation:
+    """Accept header parsing"""
+
+    @pytest.mark.parametrize("accept,expected", [
+        (None, JSON),
+        ("*/*", JSON),
+        ("audio/midi", MIDI),
+        ("audio/*", MIDI),
+        ("application/json;q=0.5, audio/midi", MIDI),
+        ("audio/midi;q=0.2, multipart/mixed;q=0.9", MULTIPART),
+        ("text/html", JSON),
+        ("audio/midi;q=0, */*;q=1", JSON),
+        ("audio/*;q=0, */*", JSON),
+        ("*/*;q=0.1, audio/*;q=0.8", MIDI),
+        ("application/json;q=0, text/html", MIDI),
+    ])
+    def test_negotiate(self, accept, expected):
+        assert negotiate(accept, OFFERED) == expected
+
+    @pytest.mark.parametrize("accept,expected", [
+        ("audio/midi;q=0, */*;q=1", JSON),
+        ("audio/midi;q=0.2, */*;q=0.5", JSON),
+        ("audio/midi;q=0, application/json;q=0", MULTIPART),
+    ])
+    def test_most_specific_range_wins(self, accept, expected):
+        """A wildcard must not lift the q of an explicitly listed type"""
+        assert negotiate(accept, (MIDI, JSON, MULTIPART)) == expected
+
+
+class TestEnvelope:
+    """Length-prefixed multi-MIDI envelope"""
+
+    def test_round_trip_keeps_order_and_errors(self):
+        data = pack_envelope([b"MThd-one", ValueError("bad profile"), b""])
+        assert unpack_envelope(data) == [
+            (STATUS_OK, b"MThd-one"),
+            (STATUS_ERROR, b"bad profile"),
+            (STATUS_OK, b""),
+        ]
+
+    def test_truncated_envelope_rejected(self):
+        data = pack_envelope([b"MThd-one"])
+        with pytest.raises(ValueError):
+            unpack_envelope(data[:-1])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,102 @@
+"""
+PSYCHOSCORE Rule-Based Generator Tests
+
+Run with: pytest tests/test_rule_generator.py -v
+"""
+
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.midi_writer import write_midi
+from inference.rule_generator import rule_notes
+
+MAJOR = [0, 2, 4, 5, 7, 9, 11]
+
+
+class TestRuleNotes:
+    """Vectorized notes are seeded and respect the profile mapping"""
+
+    def test_same_seed_same_notes(self):
+        a = rule_notes(MAJOR, 80, entropy=0.7, max_bars=16, seed=5)
+        b = rule_notes(MAJOR, 80, entropy=0.7, max_bars=16, seed=5)
+        c = rule_notes(MAJOR, 80, entropy=0.7, max_bars=16, seed=6)
+        for field in ("pitch", "start", "duration", "velocity"):
+            assert np.array_equal(getattr(a, field), getattr(b, field))
+        assert not np.array_equal(a.pitch, c.pitch) or not np.array_equal(a.velocity, c.velocity)
+
+    def test_shape_and_ranges(self):
+        notes = rule_notes(MAJOR, 125, entropy=1.0, max_bars=3, seed=0)
+        assert notes.notes_per_bar == 8
+        assert len(notes.pitch) == 24
+        assert set((notes.pitch % 12).tolist()) <= set(MAJOR)
+        assert notes.velocity.min() >= 40 and notes.velocity.max() <= 127
+        assert notes.start[8] == 4.0
+
+    def test_zero_entropy_walks_the_scale(self):
+        """Without entropy every note is the next scale degree, octave up on odd bars"""
+        notes = rule_notes(MAJOR, 80, entropy=0.0, max_bars=2, seed=0)
+        assert notes.pitch.tolist() == [60, 62, 72, 74]
+
+    def test_bars_group_notes(self):
+        bars = list(rule_notes(MAJOR, 80, entropy=0.5, max_bars=4, seed=1).bars())
+        assert len(bars) == 4 and all(len(bar) == 5 for bar in bars)
+        assert bars[1][0][1] == 4.0
+
+
+class TestMidiWriter:
+    """Bulk-written files parse back to the same notes"""
+
+    def test_round_trip(self):
+        symusic = pytest.importorskip("symusic")
+        notes = rule_notes(MAJOR, 80, entropy=0.8, max_bars=8, seed=3)
+        midi = write_midi(notes.pitch, notes.start, notes.duration, notes.velocity, tempo=90)
+        score = symusic.Score.from_midi(midi)
+        parsed = sorted((n.time, n.pitch, n.velocity) for n in score.tracks[0].notes)
+        expected = sorted(zip(
+            np.rint(notes.start * score.ticks_per_quarter).astype(int).tolist(),
+            notes.pitch.tolist(),
+            notes.velocity.tolist(),
+        ))
+        assert parsed == expected
+        assert round(score.tempos[0].qpm) == 90
+
+    def test_long_deltas_use_multibyte_lengths(self):
+        """Gaps beyond one and two VLQ bytes should still decode"""
+        symusic = pytest.importorskip("symusic")
+        starts = [0.0, 1.0, 100.0, 3000.0]
+        midi = write_midi([60, 62, 64, 65], starts, [0.5] * 4, [90] * 4)
+        score = symusic.Score.from_midi(midi)
+        assert [n.time for n in score.tracks[0].notes] == [int(s * 960) for s in starts]
+
+    def test_repeated_pitch_is_not_cut_short(self):
+        """A held note should end where the same pitch starts again, not after it"""
+        symusic = pytest.importorskip("symusic")
+        notes = rule_notes(MAJOR, 80, entropy=0.9, max_bars=64, seed=3)
+        midi = write_midi(notes.pitch, notes.start, notes.duration, notes.velocity)
+        parsed = symusic.Score.from_midi(midi).tracks[0].notes
+        assert len(parsed) == len(notes.pitch)
+        expected = {}
+        for pitch, start, duration in zip(notes.pitch.tolist(), notes.start.tolist(), notes.duration.tolist()):
+            expected.setdefault(pitch, []).append([round(start * 960), round((start + duration) * 960)])
+        for onsets in expected.values():
+            onsets.sort()
+            for current, following in zip(onsets, onsets[1:]):
+                current[1] = min(current[1], following[0])
+        assert sorted((n.pitch, n.time, n.end) for n in parsed) == sorted(
+            (pitch, on, off) for pitch, onsets in expected.items() for on, off in onsets
+        )
+
+    def test_overlapping_same_pitch_notes(self):
+        symusic = pytest.importorskip("symusic")
+        midi = write_midi([60, 60, 64], [0.0, 0.5, 0.25], [1.0, 1.0, 1.0], [90] * 3)
+        parsed = sorted((n.pitch, n.time, n.end) for n in symusic.Score.from_midi(midi).tracks[0].notes)
+        assert parsed == [(60, 0, 480), (60, 480, 1440), (64, 240, 1200)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,82 @@
+"""
+PSYCHOSCORE Model Runtime Tests
+
+Uses a tiny randomly initialised GPT-2 saved to a temporary checkpoint.
+
+Run with: pytest tests/test_runtime.py -v
+"""
+
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.decoding import decode_batch
+from inference.runtime import RuntimeConfig, conv1d_to_linear, load_model
+
+
+@pytest.fixture(scope="module")
+def checkpoint(tmp_path_factory, tiny_gpt2):
+    """Directory holding a two-layer GPT-2 over the full vocabulary"""
+    path = tmp_path_factory.mktemp("checkpoint")
+    tiny_gpt2(n_layer=2).save_pretrained(path)
+    return path
+
+
+class TestRuntimeConfig:
+    """Profile defaults per device and rejected combinations"""
+
+    def test_cpu_defaults(self):
+        """CPU should default to fp32 with int8 Linear layers and merged LoRA"""
+        config = RuntimeConfig(device="cpu").resolve()
+        assert (config.dtype, config.int8, config.merge_lora) == ("float32", True, True)
+
+    def test_bf16_disables_int8_by_default(self):
+        """Dynamic int8 needs fp32 activations, so bf16 leaves it off"""
+        assert RuntimeConfig(device="cpu", dtype="bfloat16").resolve().int8 is False
+
+    def test_invalid_combinations(self):
+        with pytest.raises(ValueError):
+            RuntimeConfig(device="cpu", dtype="bfloat16", int8=True).resolve()
+        with pytest.raises(ValueError):
+            RuntimeConfig(backend="tensorrt").resolve()
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("PSYCHOSCORE_INT8", "0")
+        monkeypatch.setenv("PSYCHOSCORE_RUNTIME", "compile")
+        config = RuntimeConfig.from_env()
+        assert (config.int8, config.merge_lora, config.backend) == (False, None, "compile")
+
+
+class TestCPUProfile:
+    """Conv1D conversion and int8 quantization keep the model usable"""
+
+    def test_conv1d_to_linear_is_exact(self, checkpoint):
+        """Swapping GPT-2 Conv1D for Linear should not change the logits"""
+        model = load_model(checkpoint, RuntimeConfig(device="cpu", int8=False))
+        ids = torch.tensor([[10800, 10001, 10801]])
+        before = model(input_ids=ids).logits
+        conv1d_to_linear(model)
+        assert isinstance(model.transformer.h[0].attn.c_attn, torch.nn.Linear)
+        assert torch.allclose(model(input_ids=ids).logits, before, atol=1e-5)
+
+    def test_int8_model_decodes(self, checkpoint):
+        """The quantized model should decode and stay close to fp32"""
+        fp32 = load_model(checkpoint, RuntimeConfig(device="cpu", int8=False))
+        int8 = load_model(checkpoint, RuntimeConfig(device="cpu"))
+        assert "Quantized" in type(int8.lm_head).__name__ or "quantized" in type(int8.lm_head).__module__
+
+        ids = torch.tensor([[10800, 10001, 10801]])
+        diff = (int8(input_ids=ids).logits - fp32(input_ids=ids).logits).abs().max()
+        assert diff < 0.1
+
+        rows = decode_batch(int8, [[10800, 10801]] * 2, [1.0, 1.0], [0.9, 0.9], max_new_tokens=6, pad_id=0)
+        assert [len(row) for row in rows] == [6, 6]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,90 @@
+"""
+PSYCHOSCORE Score-Conditioned Generation Tests
+
+Run with: pytest tests/test_score_conditioning.py -v
+"""
+
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("miditok")
+pytest.importorskip("torch")
+symusic = pytest.importorskip("symusic")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "inference"))
+import server
+from inference.score_conditioning import generate_piece, parse_timeline_csv, plan_segments, read_timeline_csv
+from tokenizer import PsychometricProfile
+
+
+HAMLET_SCORE = Path(__file__).parents[3] / "mpn_engine" / "examples" / "hamlet_excerpt_score.csv"
+
+SCORE = """BEAT,SPEAKER,TEXT,TRAUMA_R,ENTROPY_H
+1,SCENE,ACT I,0.0,0.3
+2,HAMLET,To be,0.31,0.3
+3,HAMLET,or not,0.29,0.32
+4,HAMLET,to be,0.8,0.3
+5,GHOST,Remember me,0.9,0.7
+"""
+
+
+class TestTimeline:
+    """Reading MPN scores and planning segments"""
+
+    def test_reads_mpn_engine_export(self):
+        """The mpn_engine example score should parse into one beat per row"""
+        timeline = read_timeline_csv(str(HAMLET_SCORE))
+        assert len(timeline) == 49
+        assert timeline[0].speaker == "NARRATOR"
+
+    def test_missing_columns_rejected(self):
+        with pytest.raises(ValueError, match="TRAUMA_R"):
+            parse_timeline_csv("BEAT,SPEAKER\n1,HAMLET\n")
+
+    def test_text_is_never_read_as_a_path(self):
+        """A CSV string naming an existing file should be parsed as CSV, not opened"""
+        assert parse_timeline_csv(str(HAMLET_SCORE)) == []
+
+    def test_segments_merge_equal_conditioning(self):
+        """Consecutive beats in the same 0.1 bin should share a segment"""
+        segments = plan_segments(parse_timeline_csv(SCORE))
+        assert [(s.speaker, s.start, s.beats, s.trauma) for s in segments] == [
+            ("SCENE", 0, 1, 0.0),
+            ("HAMLET", 1, 2, 0.3),
+            ("HAMLET", 3, 1, 0.8),
+            ("GHOST", 4, 1, 0.9),
+        ]
+
+
+class TestGeneratePiece:
+    """One multi-track MIDI for the whole timeline"""
+
+    def test_tracks_and_tempo_follow_the_score(self):
+        """Each speaker should get a track placed at its beats; tempo should change with trauma"""
+        inference = server.PsychoscoreInference("unused")
+        midi = generate_piece(
+            inference,
+            parse_timeline_csv(SCORE),
+            {"GHOST": PsychometricProfile(rsi={'real': 0.8, 'symbolic': 0.1, 'imaginary': 0.1})},
+            seed=1,
+        )
+        score = symusic.Score.from_midi(midi)
+        tracks = {t.name: t for t in score.tracks}
+        assert set(tracks) == {"HAMLET", "GHOST"}
+
+        tpq = score.ticks_per_quarter
+        assert min(n.time for n in tracks["HAMLET"].notes) == 4 * tpq
+        assert min(n.time for n in tracks["GHOST"].notes) == 16 * tpq
+        assert len({t.qpm for t in score.tempos}) == 3
+
+    def test_seeded_piece_is_reproducible(self):
+        inference = server.PsychoscoreInference("unused")
+        timeline = parse_timeline_csv(SCORE)
+        assert generate_piece(inference, timeline, seed=3) == generate_piece(inference, timeline, seed=3)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
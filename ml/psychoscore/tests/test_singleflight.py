@@ -0,0 +1,114 @@
+"""
+PSYCHOSCORE Request Coalescing Tests
+
+Run with: pytest tests/test_singleflight.py -v
+"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.singleflight import SingleFlight
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestSingleFlight:
+    """Concurrent callers with one key share a single computation"""
+
+    def test_waiters_share_one_call(self):
+        async def scenario():
+            flights = SingleFlight()
+            calls = []
+
+            async def work():
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return "midi"
+
+            results = await asyncio.gather(*(flights.run("k", work) for _ in range(5)))
+            return flights, calls, results
+
+        flights, calls, results = run(scenario())
+        assert len(calls) == 1
+        assert [r[0] for r in results] == ["midi"] * 5
+        assert [r[1] for r in results] == [False, True, True, True, True]
+        assert flights.stats() == {"in_flight": 0, "leaders": 1, "shared": 4}
+
+    def test_distinct_keys_and_later_calls_run_again(self):
+        async def scenario():
+            flights = SingleFlight()
+            calls = []
+
+            async def work():
+                calls.append(1)
+                await asyncio.sleep(0)
+                return len(calls)
+
+            await asyncio.gather(flights.run("a", work), flights.run("b", work))
+            await flights.run("a", work)
+            return calls
+
+        assert len(run(scenario())) == 3
+
+    def test_errors_reach_every_waiter(self):
+        async def scenario():
+            flights = SingleFlight()
+
+            async def work():
+                await asyncio.sleep(0.01)
+                raise RuntimeError("boom")
+
+            return await asyncio.gather(*(flights.run("k", work) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in run(scenario()))
+
+    def test_cancelled_leader_leaves_work_to_others(self):
+        async def scenario():
+            flights = SingleFlight()
+
+            async def work():
+                await asyncio.sleep(0.02)
+                return "done"
+
+            leader = asyncio.ensure_future(flights.run("k", work))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flights.run("k", work))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert run(scenario()) == ("done", True)
+
+    def test_last_waiter_leaving_cancels_work(self):
+        async def scenario():
+            flights = SingleFlight()
+            started = asyncio.Event()
+            cancelled = []
+
+            async def work():
+                started.set()
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+
+            waiter = asyncio.ensure_future(flights.run("k", work))
+            await started.wait()
+            waiter.cancel()
+            await asyncio.sleep(0.01)
+            return flights, cancelled
+
+        flights, cancelled = run(scenario())
+        assert cancelled == [True]
+        assert len(flights) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
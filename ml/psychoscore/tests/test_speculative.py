@@ -0,0 +1,150 @@
+"""
+PSYCHOSCORE Speculative Decoding Tests
+
+Uses tiny randomly initialised GPT-2s so no checkpoint is required.
+
+Run with: pytest tests/test_speculative.py -v
+"""
+
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.decoding import decode_batch
+from inference.prefix_cache import PrefixKVCache
+from inference.speculative import ModelDraft, NGramDraft, crop_cache, speculative_decode
+
+
+SMALL = dict(n_embd=16, n_positions=128)
+
+
+@pytest.fixture(scope="module")
+def small_vocab(tiny_gpt2):
+    """(model, draft model) over 8 tokens, small enough to enumerate"""
+    return tiny_gpt2(0, vocab_size=8, **SMALL), tiny_gpt2(1, vocab_size=8, **SMALL)
+
+
+@pytest.fixture(scope="module")
+def full_vocab(tiny_gpt2):
+    """(model, draft model) over the full PSYCHOSCORE vocabulary"""
+    return tiny_gpt2(0, **SMALL), tiny_gpt2(1, **SMALL)
+
+
+@torch.no_grad()
+def exact_marginals(model, prefix, steps):
+    """Distribution of each sampled position (temperature 1, no top-p), by enumeration"""
+    marginals = []
+    frontier = {tuple(prefix): 1.0}
+    for _ in range(steps):
+        marginal = torch.zeros(model.config.vocab_size, dtype=torch.float64)
+        grown = {}
+        for sequence, weight in frontier.items():
+            probs = torch.softmax(model(torch.tensor([sequence])).logits[0, -1].double(), -1)
+            marginal += weight * probs
+            for token, p in enumerate(probs.tolist()):
+                grown[sequence + (token,)] = weight * p
+        marginals.append(marginal)
+        frontier = grown
+    return marginals
+
+
+class TestExactness:
+    """Speculative decoding samples from the model's own distribution"""
+
+    @pytest.mark.parametrize("drafter", ["ngram", "draft"])
+    def test_marginals_match_plain_sampling(self, small_vocab, drafter):
+        """Empirical marginals should match the enumerated ones (eos disabled)"""
+        model, draft = small_vocab
+        drafter = NGramDraft.from_sequences([[i % 8 for i in range(50)]]) if drafter == "ngram" else ModelDraft(draft)
+        prefix, samples = [1, 2, 3], 1500
+        exact = exact_marginals(model, prefix, 3)
+        generator = torch.Generator().manual_seed(0)
+        counts = torch.zeros(3, 8, dtype=torch.float64)
+        for _ in range(samples):
+            tokens = list(speculative_decode(model, prefix, drafter, 1.0, 1.0, 3, pad_id=0,
+                                             draft_tokens=2, generator=generator))
+            for position, token in enumerate(tokens):
+                counts[position, token] += 1
+        for position in range(3):
+            total_variation = 0.5 * (counts[position] / samples - exact[position]).abs().sum()
+            assert total_variation < 0.07
+        assert drafter.stats()["proposed"] > 0
+
+    @pytest.mark.parametrize("drafter", ["ngram", "draft"])
+    def test_greedy_matches_batched_decoding(self, full_vocab, drafter):
+        """With top-p keeping only the argmax, output should equal decode_batch's"""
+        model, draft = full_vocab
+        drafter = NGramDraft() if drafter == "ngram" else ModelDraft(draft)
+        prefix = [10800, 10001, 10011, 10801]
+        expected = decode_batch(model, [prefix], [1.0], [0.0], max_new_tokens=24, pad_id=0)[0]
+        tokens = list(speculative_decode(model, prefix, drafter, 1.0, 0.0, 24, pad_id=0, draft_tokens=4))
+        assert tokens == expected
+
+    def test_prefix_cache_gives_same_tokens(self, full_vocab):
+        """Prefill from the prefix KV cache should not change greedy output"""
+        model, draft = full_vocab
+        prefix = [10800, 10002, 10012, 10801]
+        plain = list(speculative_decode(model, prefix, ModelDraft(draft), 1.0, 0.0, 16, pad_id=0))
+        cache = PrefixKVCache(max_bytes=1 << 26)
+        for _ in range(2):
+            cached = list(speculative_decode(model, prefix, ModelDraft(draft), 1.0, 0.0, 16, pad_id=0,
+                                             prefix_cache=cache))
+            assert cached == plain
+        assert cache.stats()["hits"] == 1
+
+    def test_self_draft_is_always_accepted(self, small_vocab):
+        """A draft model identical to the model should have every draft accepted"""
+        model, _ = small_vocab
+        drafter = ModelDraft(model)
+        generator = torch.Generator().manual_seed(0)
+        tokens = list(speculative_decode(model, [1, 2], drafter, 1.0, 1.0, 20, pad_id=0,
+                                         draft_tokens=4, generator=generator))
+        assert len(tokens) == 20
+        assert drafter.stats()["acceptance_rate"] == pytest.approx(1.0)
+
+    def test_budget_and_eos(self, full_vocab):
+        """Output should stop at max_new_tokens, and before EOS"""
+        model, _ = full_vocab
+        prefix = [10800, 10801]
+        greedy = list(speculative_decode(model, prefix, NGramDraft(), 1.0, 0.0, 10, pad_id=0))
+        assert len(greedy) == 10
+        cut = list(speculative_decode(model, prefix, NGramDraft(), 1.0, 0.0, 10, pad_id=0, eos_id=greedy[3]))
+        assert cut == greedy[:greedy.index(greedy[3])]
+
+
+class TestDrafters:
+    """N-gram proposals and cache cropping"""
+
+    def test_ngram_table_prefers_longest_context(self):
+        """The longest context seen in the corpus should decide the next token"""
+        drafter = NGramDraft.from_sequences([[10800, 10801, 4, 5, 6, 4, 5, 7, 9, 5, 7]], order=3)
+        assert drafter.table[(4, 5)] in (6, 7)
+        assert drafter.table[(9, 5)] == 7
+        assert not any(token >= 10000 for context in drafter.table for token in context)
+        drafts, probs = drafter.propose([9, 5], 2, probs_fn=None)
+        assert drafts[0] == 7 and probs is None
+
+    def test_ngram_falls_back_to_sequence(self):
+        """Unknown contexts should be continued from earlier in the sequence"""
+        drafter = NGramDraft()
+        drafts, _ = drafter.propose([4, 20, 30, 40, 4, 20], 3, probs_fn=None)
+        assert drafts == [30, 40, 4]
+        assert drafter.propose([4, 20, 30], 3, probs_fn=None)[0] == []
+
+    def test_crop_cache(self, full_vocab):
+        """Cropping should keep exactly the first positions"""
+        model, _ = full_vocab
+        with torch.no_grad():
+            past = model(torch.tensor([[1, 5, 6, 7, 8]]), use_cache=True).past_key_values
+        past = crop_cache(past, 3)
+        assert past.get_seq_length() == 3
+        assert crop_cache(past, 5).get_seq_length() == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,184 @@
+"""
+PSYCHOSCORE Tokenizer Prefix Tests
+
+Run with: pytest tests/test_tokenizer.py -v
+"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("miditok")
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tokenizer import PsychoscoreTokenizer, PsychometricProfile, quantize
+from tokenizer.psychoscore_tokenizer import FIELD_TARGETS
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return PsychoscoreTokenizer()
+
+
+def string_prefix(tokenizer, profile):
+    """Prefix built by formatting each token name and looking it up"""
+    names = ["PSYCH_START"]
+    names += [f"DISC_{d}:{quantize(profile.disc[d]):.1f}" for d in "DISC"]
+    names += [f"OCEAN_{d}:{quantize(profile.ocean[d]):.1f}" for d in "OCEAN"]
+    names.append(f"RSI_{profile.get_rsi_dominant().upper()}_DOM")
+    names += [f"RSI_{p}:{quantize(profile.rsi[r]):.1f}" for r, p in (("real", "R"), ("symbolic", "S"), ("imaginary", "I"))]
+    names += [f"TRAUMA:{quantize(profile.trauma):.1f}", f"ENTROPY:{quantize(profile.entropy):.1f}"]
+    names += [f"DARK_{p}:{quantize(profile.dark_triad[t]):.1f}"
+              for t, p in (("machiavellianism", "MACH"), ("narcissism", "NARC"), ("psychopathy", "PSYCH"))]
+    names += [f"BIAS_{b.upper()}" for b in profile.cognitive_biases[:5] if f"BIAS_{b.upper()}" in tokenizer.vocab]
+    names.append(f"HAMILTONIAN:{quantize(profile.physics['hamiltonian_energy']):.1f}")
+    names.append("ISING_SPIN_UP" if profile.physics["ising_spin"] == "+" else "ISING_SPIN_DOWN")
+    names.append(f"GRANOVETTER:{quantize(profile.physics['granovetter_threshold']):.1f}")
+    names.append(f"LYAPUNOV:{quantize(profile.physics['lyapunov_exponent'] + 0.5):.1f}")
+    if profile.key:
+        names.append(f"KEY_{profile.key}")
+    if profile.mode:
+        names.append(f"MODE_{profile.mode}")
+    if profile.tempo:
+        names.append(f"TEMPO_{min([40, 60, 80, 100, 120, 140, 160, 180, 200], key=lambda t: abs(t - profile.tempo))}")
+    names.append("PSYCH_END")
+    return [tokenizer.vocab[name] for name in names]
+
+
+def random_profiles(n, seed=0):
+    rng = random.Random(seed)
+    biases = PsychoscoreTokenizer.BIAS_NAMES + ["not_a_bias"]
+    profiles = []
+    for _ in range(n):
+        rsi = [rng.random() for _ in range(3)]
+        profiles.append(PsychometricProfile(
+            # Bin edges (0.05, 0.25, ...) exercise round-half-to-even
+            disc={d: rng.choice([rng.random(), 0.05, 0.25, 0.35, 1.0]) for d in "DISC"},
+            ocean={d: rng.random() for d in "OCEAN"},
+            rsi=dict(zip(("real", "symbolic", "imaginary"), rsi)),
+            trauma=rng.random(),
+            entropy=rng.random(),
+            dark_triad={t: rng.random() for t in ("machiavellianism", "narcissism", "psychopathy")},
+            cognitive_biases=rng.sample(biases, rng.randint(0, 7)),
+            physics={
+                "hamiltonian_energy": rng.random(),
+                "ising_spin": rng.choice("+-"),
+                "granovetter_threshold": rng.random(),
+                "lyapunov_exponent": rng.uniform(-0.5, 0.5),
+            },
+            key=rng.choice([None, "C", "Eb"]),
+            mode=rng.choice([None, "Dorian"]),
+            tempo=rng.choice([None, 50, 117, 130, 250]),
+        ))
+    return profiles
+
+
+class TestPrefixEncoding:
+    """Arithmetic prefix IDs match the token-name lookups"""
+
+    def test_matches_string_lookup(self, tokenizer):
+        for profile in random_profiles(500):
+            assert tokenizer.encode_psychometric_profile(profile) == string_prefix(tokenizer, profile)
+
+    def test_batch_rows_match_single(self, tokenizer):
+        """Batch rows are the single-profile prefixes, right-padded"""
+        profiles = random_profiles(200, seed=1)
+        batch = tokenizer.encode_profiles_batch(profiles)
+        rows = [tokenizer.encode_psychometric_profile(p) for p in profiles]
+        assert batch.dtype == np.int32
+        assert batch.shape == (200, max(len(row) for row in rows))
+        for encoded, row in zip(batch, rows):
+            assert encoded[:len(row)].tolist() == row
+            assert (encoded[len(row):] == tokenizer.pad_token_id).all()
+
+    def test_default_profile_has_no_padding(self, tokenizer):
+        batch = tokenizer.encode_profiles_batch([PsychometricProfile()] * 3)
+        assert batch.shape == (3, 24)
+        assert (batch != tokenizer.pad_token_id).all()
+        assert tokenizer.encode_profiles_batch([]).shape == (0, 0)
+
+    def test_out_of_range_value_raises(self, tokenizer):
+        profile = PsychometricProfile(trauma=1.3)
+        with pytest.raises(KeyError, match="TRAUMA:1.3"):
+            tokenizer.encode_psychometric_profile(profile)
+        with pytest.raises(KeyError, match="TRAUMA:1.3"):
+            tokenizer.encode_profiles_batch([PsychometricProfile(), profile])
+
+
+def noisy_sequences(tokenizer, n, seed=0):
+    """Prefixes followed by music, plus prefix-token soup, missing ends and repeats"""
+    rng = np.random.default_rng(seed)
+    end = tokenizer.vocab["PSYCH_END"]
+    sequences = []
+    for i, profile in enumerate(random_profiles(n, seed)):
+        sequence = tokenizer.encode_psychometric_profile(profile) + rng.integers(4, 541, size=rng.integers(0, 20)).tolist()
+        if i % 5 == 0:
+            sequence = rng.integers(10000, 10803, size=30).tolist()
+        if i % 7 == 0:
+            sequence = [t for t in sequence if t != end]
+        if i % 11 == 0:
+            sequence = [5, 6] + sequence + [end] + sequence
+        if i % 13 == 0:
+            sequence += [99999, -3]
+        sequences.append(sequence)
+    return sequences
+
+
+def profile_column(profile, name):
+    """A decoded profile's value in decode_prefixes_batch() column form"""
+    attr, _, key = name.partition(".")
+    value = getattr(profile, attr)
+    return value[key] if key else value
+
+
+class TestPrefixDecoding:
+    """Table-driven decoding, single and columnar"""
+
+    def test_round_trip(self, tokenizer):
+        """Decoding an encoded prefix gives the quantized profile back"""
+        for profile in random_profiles(100):
+            tokens = tokenizer.encode_psychometric_profile(profile)
+            decoded, end = tokenizer.decode_psychometric_prefix(tokens + [4, 5])
+            assert end == len(tokens)
+            assert decoded.trauma == quantize(profile.trauma)
+            assert decoded.disc == {d: quantize(v) for d, v in profile.disc.items()}
+            assert decoded.physics["lyapunov_exponent"] == quantize(profile.physics["lyapunov_exponent"] + 0.5) - 0.5
+            assert decoded.physics["ising_spin"] == profile.physics["ising_spin"]
+            assert decoded.cognitive_biases == [b for b in profile.cognitive_biases[:5] if b in tokenizer.BIAS_NAMES]
+            assert (decoded.key, decoded.mode) == (profile.key, profile.mode)
+
+    def test_batch_matches_single(self, tokenizer):
+        sequences = noisy_sequences(tokenizer, 400)
+        tokens = np.zeros((len(sequences), max(map(len, sequences))), dtype=np.int64)
+        for row, sequence in enumerate(sequences):
+            tokens[row, :len(sequence)] = sequence
+        columns = tokenizer.decode_prefixes_batch(tokens)
+
+        for row, sequence in enumerate(sequences):
+            profile, end = tokenizer.decode_psychometric_prefix(sequence)
+            assert columns["end_index"][row] == end
+            for attr, key in FIELD_TARGETS:
+                name = f"{attr}.{key}" if key else attr
+                assert columns[name][row] == profile_column(profile, name)
+            assert columns["physics.ising_spin"][row] == (1 if profile.physics["ising_spin"] == "+" else -1)
+            assert [tokenizer.BIAS_NAMES[b] for b in columns["cognitive_biases"][row] if b >= 0] == profile.cognitive_biases
+            assert (tokenizer.KEYS[columns["key"][row]] if columns["key"][row] >= 0 else None) == profile.key
+            assert (tokenizer.MODES[columns["mode"][row]] if columns["mode"][row] >= 0 else None) == profile.mode
+            assert (int(columns["tempo"][row]) if columns["tempo"][row] >= 0 else None) == profile.tempo
+
+    def test_batch_of_encoded_prefixes(self, tokenizer):
+        """Padding after PSYCH_END is ignored; empty input gives empty columns"""
+        profiles = random_profiles(50, seed=2)
+        columns = tokenizer.decode_prefixes_batch(tokenizer.encode_profiles_batch(profiles))
+        assert columns["trauma"].tolist() == [quantize(p.trauma) for p in profiles]
+        empty = tokenizer.decode_prefixes_batch(np.zeros((3, 0), dtype=np.int32))
+        assert empty["trauma"].tolist() == [PsychometricProfile().trauma] * 3
+        assert empty["end_index"].tolist() == [0, 0, 0]
+        assert empty["cognitive_biases"].shape == (3, 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
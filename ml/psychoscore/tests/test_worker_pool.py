@@ -0,0 +1,160 @@
+"""
+PSYCHOSCORE Generation Worker Pool Tests
+
+Run with: pytest tests/test_worker_pool.py -v
+"""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inference.worker_pool import (
+    GenerationPool,
+    PoolConfig,
+    PoolSaturated,
+    GenerationTimeout,
+    ClientDisconnected,
+)
+
+
+def blocking_work(event: threading.Event, value):
+    """Block until released, then return value"""
+    event.wait(5)
+    return value
+
+
+class TestGenerationPool:
+    """Admission control, timeouts and cancellation"""
+
+    def test_run_returns_result_off_loop(self):
+        """Work should run on a pool thread and return its value"""
+        pool = GenerationPool(PoolConfig(workers=1, max_queue=0))
+
+        async def main():
+            return await pool.run(lambda: threading.current_thread().name)
+
+        try:
+            assert asyncio.run(main()).startswith("psychoscore-gen")
+        finally:
+            pool.shutdown()
+
+    def test_saturated_pool_rejects(self):
+        """Requests beyond workers + max_queue should be rejected"""
+        pool = GenerationPool(PoolConfig(workers=1, max_queue=1, retry_after=3))
+        release = threading.Event()
+        try:
+            pool.submit(blocking_work, release, 1)
+            pool.submit(blocking_work, release, 2)
+            assert pool.stats()["queued"] == 1
+
+            with pytest.raises(PoolSaturated) as exc:
+                pool.submit(blocking_work, release, 3)
+            assert exc.value.retry_after == 3
+        finally:
+            release.set()
+            pool.shutdown()
+
+    def test_timeout_cancels_queued_work(self):
+        """Timed-out queued work should never start"""
+        pool = GenerationPool(PoolConfig(workers=1, max_queue=4))
+        release = threading.Event()
+        started = []
+
+        async def main():
+            pool.submit(blocking_work, release, None)
+            with pytest.raises(GenerationTimeout):
+                await pool.run(started.append, "ran", timeout=0.05)
+
+        try:
+            asyncio.run(main())
+            release.set()
+            time.sleep(0.1)
+            assert started == []
+            assert pool.stats()["queued"] == 0
+        finally:
+            release.set()
+            pool.shutdown()
+
+    def test_disconnect_cancels(self):
+        """A disconnected client should abandon its request"""
+        pool = GenerationPool(PoolConfig(workers=1, max_queue=4))
+        release = threading.Event()
+
+        async def gone():
+            return True
+
+        async def main():
+            with pytest.raises(ClientDisconnected):
+                await pool.run(blocking_work, release, 1, is_disconnected=gone, poll_interval=0.01)
+
+        try:
+            asyncio.run(main())
+        finally:
+            release.set()
+            pool.shutdown()
+
+    def test_event_loop_stays_responsive(self):
+        """Loop latency should stay low while workers are busy"""
+        pool = GenerationPool(PoolConfig(workers=2, max_queue=4))
+
+        async def main():
+            jobs = [asyncio.ensure_future(pool.run(time.sleep, 0.3)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            start = time.perf_counter()
+            await asyncio.sleep(0)
+            lag = time.perf_counter() - start
+            await asyncio.gather(*jobs)
+            return lag
+
+        try:
+            assert asyncio.run(main()) < 0.05
+        finally:
+            pool.shutdown()
+
+    def test_stream_delivers_items_incrementally(self):
+        """Streamed items should reach the loop before the generator finishes"""
+        pool = GenerationPool(PoolConfig(workers=1, max_queue=0))
+        release = threading.Event()
+
+        def produce():
+            yield 1
+            release.wait(5)
+            yield 2
+
+        async def main():
+            stream = pool.stream(produce)
+            first = await stream.__anext__()
+            release.set()
+            rest = [item async for item in stream]
+            return first, rest
+
+        try:
+            assert asyncio.run(main()) == (1, [2])
+        finally:
+            release.set()
+            pool.shutdown()
+
+    def test_stream_admission_is_immediate(self):
+        """A full pool should reject a stream when it is requested"""
+        pool = GenerationPool(PoolConfig(workers=1, max_queue=0))
+        release = threading.Event()
+
+        async def main():
+            pool.submit(blocking_work, release, None)
+            with pytest.raises(PoolSaturated):
+                pool.stream(iter, [1])
+
+        try:
+            asyncio.run(main())
+        finally:
+            release.set()
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
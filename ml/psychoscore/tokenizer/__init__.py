@@ -1,8 +1,22 @@
 """
 PSYCHOSCORE Tokenizer Package
 Extended REMI tokenizer with psychometric prefix vocabulary
+
+PsychoscoreTokenizer and REMIGrammar are imported on first access:
+they pull in torch, which profile-only users (e.g. the rule-based
+server path) skip.
 """
 
-from .psychoscore_tokenizer import PsychoscoreTokenizer, PsychometricProfile
+from .profile import PsychometricProfile, quantize
+
+__all__ = ['PsychoscoreTokenizer', 'PsychometricProfile', 'REMIGrammar', 'quantize']
+
 
-__all__ = ['PsychoscoreTokenizer', 'PsychometricProfile']
+def __getattr__(name):
+    if name == 'PsychoscoreTokenizer':
+        from .psychoscore_tokenizer import PsychoscoreTokenizer
+        return PsychoscoreTokenizer
+    if name == 'REMIGrammar':
+        from .grammar import REMIGrammar
+        return REMIGrammar
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,154 @@
+"""
+PSYCHOSCORE REMI Grammar
+
+Constrained decoding for PsychoscoreTokenizer vocabularies. Every token
+ID belongs to a class (its REMI type, e.g. Bar, Position, Pitch), and
+the class of the last token decides which IDs may come next:
+
+    (prefix end) -> [SEP] -> Bar -> TimeSig -> Position -> [Tempo]
+        -> Program -> Pitch -> Velocity -> Duration -> Position | Program | Rest | Bar ...
+
+Transitions between REMI types come from MidiTok's token type graph for
+the tokenizer's configuration; drum programs lead to drum pitches. After
+the psychometric prefix, prefix tokens (IDs 10000-10802) are never
+allowed again, except one optional SEP right after PSYCH_END.
+
+Allowed-ID masks are precomputed per class, so a decoding step is one
+gather of (batch, vocab) mask rows plus one masked_fill.
+"""
+
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple
+
+import numpy as np
+import torch
+
+PSYCH_ID_START = 10000
+
+# Classes outside the REMI types
+START = "Start"             # End of the conditioning prefix (PSYCH_END)
+SEP = "SEP"
+PSYCH = "Psych"             # Any other prefix token
+PROGRAM_DRUM = "ProgramDrum"
+UNKNOWN = "Unknown"         # IDs the tokenizer does not define (model vocab padding)
+FREE = "Free"               # Finished or padded rows: anything goes
+
+# REMI types that may be generated
+MUSIC_TYPES = ("Bar", "Position", "Pitch", "PitchDrum", "Velocity", "Duration",
+               "Rest", "Tempo", "Program", "TimeSig", "Chord", "Pedal", "PedalOff",
+               "PitchBend", "PitchIntervalTime", "PitchIntervalChord", "TimeShift")
+
+
+def _token_class(name: str, token_id: int) -> str:
+    if name == "PSYCH_END":
+        return START
+    if name == "SEP":
+        return SEP
+    if token_id >= PSYCH_ID_START:
+        return PSYCH
+    if name == "Program_-1":
+        return PROGRAM_DRUM
+    kind = name.split("_")[0]
+    return kind if kind in MUSIC_TYPES or kind == "EOS" else FREE
+
+
+class REMIGrammar:
+    """
+    Logits processor masking tokens that would break REMI structure.
+
+    Callable as (input_ids, scores) -> scores, so it works both as a
+    decoding.py logits hook (input_ids are the generated tokens only; an
+    empty sequence means decoding starts right after the prefix) and as
+    a transformers LogitsProcessor (input_ids include the prefix).
+    """
+
+    def __init__(self, vocab: Mapping[str, int], transitions: Mapping[str, Iterable[str]]):
+        """
+        Args:
+            vocab: Token name -> ID (REMI plus psychometric tokens)
+            transitions: REMI type -> types that may follow it
+        """
+        size = max(vocab.values()) + 1
+        classes = [START, SEP, PSYCH, PROGRAM_DRUM, UNKNOWN, FREE, "EOS"] + list(MUSIC_TYPES)
+        self.classes = {name: i for i, name in enumerate(dict.fromkeys(classes))}
+
+        token_class = np.full(size, self.classes[UNKNOWN], dtype=np.int64)
+        ids_of: Dict[str, list] = {name: [] for name in self.classes}
+        for name, token_id in vocab.items():
+            kind = _token_class(name, token_id)
+            token_class[token_id] = self.classes[kind]
+            ids_of[kind].append(token_id)
+        self.token_class = token_class
+
+        follows: Dict[str, Set[str]] = {}
+        for kind, nexts in transitions.items():
+            if kind not in MUSIC_TYPES:
+                continue
+            nexts = set(nexts) & (set(MUSIC_TYPES) | {"EOS"})
+            if kind == "Program":
+                # Melodic programs take pitches; the drum program takes drum pitches
+                follows[PROGRAM_DRUM] = nexts - {"Pitch"} if "PitchDrum" in nexts else nexts
+                nexts = nexts - {"PitchDrum"}
+            follows[kind] = nexts
+        for nexts in follows.values():
+            # The drum program is a Program token in its own class
+            if "Program" in nexts:
+                nexts.add(PROGRAM_DRUM)
+        follows[START] = {SEP, "Bar"}
+        follows[SEP] = {"Bar"}
+
+        allowed = np.zeros((len(self.classes), size), dtype=bool)
+        for kind, nexts in follows.items():
+            for next_kind in nexts:
+                allowed[self.classes[kind], ids_of[next_kind]] = True
+        # Rows that can't be continued by the grammar (finished, padding,
+        # or a prefix ending elsewhere) are left unconstrained
+        for kind in self.classes:
+            if not allowed[self.classes[kind]].any():
+                allowed[self.classes[kind]] = True
+        self.allowed = allowed
+        self._tables: Dict[Tuple[torch.device, int], Tuple[torch.Tensor, torch.Tensor]] = {}
+
+    @classmethod
+    def from_tokenizer(cls, tokenizer) -> 'REMIGrammar':
+        """Grammar for a PsychoscoreTokenizer's vocabulary and REMI configuration"""
+        return cls(tokenizer.vocab, tokenizer.tokens_types_graph)
+
+    def allowed_ids(self, token_id: Optional[int]) -> np.ndarray:
+        """IDs that may follow `token_id` (None: right after the prefix)"""
+        index = self.classes[START] if token_id is None else self.token_class[token_id]
+        return np.flatnonzero(self.allowed[index])
+
+    def is_valid(self, tokens: Iterable[int]) -> bool:
+        """Whether a generated sequence (prefix excluded) follows the grammar"""
+        previous = self.classes[START]
+        for token in tokens:
+            if token >= len(self.token_class) or not self.allowed[previous, token]:
+                return False
+            previous = self.token_class[token]
+        return True
+
+    def _device_tables(self, device: torch.device, vocab_size: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """(allowed, token_class) on `device`, widened to the model's vocabulary"""
+        key = (device, vocab_size)
+        tables = self._tables.get(key)
+        if tables is None:
+            width = self.allowed.shape[1]
+            allowed = np.zeros((len(self.classes), max(vocab_size, width)), dtype=bool)
+            allowed[:, :width] = self.allowed
+            allowed[self.classes[FREE]] = True
+            token_class = np.full(max(vocab_size, width), self.classes[UNKNOWN], dtype=np.int64)
+            token_class[:width] = self.token_class
+            tables = (
+                torch.from_numpy(allowed[:, :vocab_size]).to(device),
+                torch.from_numpy(token_class).to(device),
+            )
+            self._tables[key] = tables
+        return tables
+
+    def __call__(self, input_ids: torch.Tensor, scores: torch.Tensor) -> torch.Tensor:
+        allowed, token_class = self._device_tables(scores.device, scores.shape[-1])
+        if input_ids.shape[1] == 0:
+            state = torch.full((scores.shape[0],), self.classes[START], dtype=torch.long, device=scores.device)
+        else:
+            state = token_class[input_ids[:, -1]]
+        return scores.masked_fill(~allowed[state], float("-inf"))
@@ -0,0 +1,81 @@
+"""
+PSYCHOSCORE Psychometric Profile
+
+Conditioning profile shared by the tokenizer, training scripts and the
+inference server. Kept free of MidiTok (and therefore torch) so that
+profile handling is cheap to import.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+
+
+def quantize(value: float, bins: int = 10) -> float:
+    """Quantize a 0-1 value to discrete bins"""
+    return round(value * bins) / bins
+
+
+@dataclass
+class PsychometricProfile:
+    """Full psychometric profile for PSYCHOSCORE conditioning"""
+    
+    # DISC Profile (0-1 each)
+    disc: Dict[str, float] = field(default_factory=lambda: {
+        'D': 0.5, 'I': 0.5, 'S': 0.5, 'C': 0.5
+    })
+    
+    # OCEAN/Big Five (0-1 each)
+    ocean: Dict[str, float] = field(default_factory=lambda: {
+        'O': 0.5, 'C': 0.5, 'E': 0.5, 'A': 0.5, 'N': 0.5
+    })
+    
+    # Lacanian RSI (must sum to 1.0)
+    rsi: Dict[str, float] = field(default_factory=lambda: {
+        'real': 0.33, 'symbolic': 0.34, 'imaginary': 0.33
+    })
+    
+    # McKenney-Lacan extensions
+    trauma: float = 0.3
+    entropy: float = 0.3
+    
+    # Dark Triad (0-1 each, typically low)
+    dark_triad: Dict[str, float] = field(default_factory=lambda: {
+        'machiavellianism': 0.1, 'narcissism': 0.1, 'psychopathy': 0.1
+    })
+    
+    # Active cognitive biases (list of bias names)
+    cognitive_biases: List[str] = field(default_factory=list)
+    
+    # Physics framework state
+    physics: Dict[str, Any] = field(default_factory=lambda: {
+        'hamiltonian_energy': 0.5,
+        'ising_spin': '+',
+        'granovetter_threshold': 0.5,
+        'lyapunov_exponent': 0.0,
+    })
+    
+    # Optional musical context
+    key: Optional[str] = None
+    mode: Optional[str] = None
+    tempo: Optional[int] = None
+    
+    def validate(self) -> bool:
+        """Validate profile constraints"""
+        # RSI must sum to ~1.0
+        rsi_sum = sum(self.rsi.values())
+        if not (0.99 <= rsi_sum <= 1.01):
+            return False
+        
+        # All values in range
+        for v in self.disc.values():
+            if not (0 <= v <= 1):
+                return False
+        for v in self.ocean.values():
+            if not (0 <= v <= 1):
+                return False
+        
+        return True
+    
+    def get_rsi_dominant(self) -> str:
+        """Get dominant RSI register"""
+        return max(self.rsi, key=self.rsi.get)
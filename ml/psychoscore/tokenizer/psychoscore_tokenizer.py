@@ -6,8 +6,7 @@ mapping DISC/OCEAN/RSI/Dark Triad/Physics to MIDI generation.
 Based on MidiTok REMI implementation with custom prefix tokens.
 """
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from pathlib import Path
 import json
 
@@ -15,71 +14,39 @@ from miditok import REMI, TokenizerConfig
 from miditok.constants import MIDI_INSTRUMENTS
 import numpy as np
 
+from .profile import PsychometricProfile, quantize
 
-@dataclass
-class PsychometricProfile:
-    """Full psychometric profile for PSYCHOSCORE conditioning"""
-    
-    # DISC Profile (0-1 each)
-    disc: Dict[str, float] = field(default_factory=lambda: {
-        'D': 0.5, 'I': 0.5, 'S': 0.5, 'C': 0.5
-    })
-    
-    # OCEAN/Big Five (0-1 each)
-    ocean: Dict[str, float] = field(default_factory=lambda: {
-        'O': 0.5, 'C': 0.5, 'E': 0.5, 'A': 0.5, 'N': 0.5
-    })
-    
-    # Lacanian RSI (must sum to 1.0)
-    rsi: Dict[str, float] = field(default_factory=lambda: {
-        'real': 0.33, 'symbolic': 0.34, 'imaginary': 0.33
-    })
-    
-    # McKenney-Lacan extensions
-    trauma: float = 0.3
-    entropy: float = 0.3
-    
-    # Dark Triad (0-1 each, typically low)
-    dark_triad: Dict[str, float] = field(default_factory=lambda: {
-        'machiavellianism': 0.1, 'narcissism': 0.1, 'psychopathy': 0.1
-    })
-    
-    # Active cognitive biases (list of bias names)
-    cognitive_biases: List[str] = field(default_factory=list)
-    
-    # Physics framework state
-    physics: Dict[str, Any] = field(default_factory=lambda: {
-        'hamiltonian_energy': 0.5,
-        'ising_spin': '+',
-        'granovetter_threshold': 0.5,
-        'lyapunov_exponent': 0.0,
-    })
-    
-    # Optional musical context
-    key: Optional[str] = None
-    mode: Optional[str] = None
-    tempo: Optional[int] = None
-    
-    def validate(self) -> bool:
-        """Validate profile constraints"""
-        # RSI must sum to ~1.0
-        rsi_sum = sum(self.rsi.values())
-        if not (0.99 <= rsi_sum <= 1.01):
-            return False
-        
-        # All values in range
-        for v in self.disc.values():
-            if not (0 <= v <= 1):
-                return False
-        for v in self.ocean.values():
-            if not (0 <= v <= 1):
-                return False
-        
-        return True
-    
-    def get_rsi_dominant(self) -> str:
-        """Get dominant RSI register"""
-        return max(self.rsi, key=self.rsi.get)
+# Quantized prefix fields in encoding order, before and after the bias
+# tokens. Each takes 11 consecutive IDs: bin i is the ID of "<field>:0.0" + i
+HEAD_FIELDS = (
+    "DISC_D", "DISC_I", "DISC_S", "DISC_C",
+    "OCEAN_O", "OCEAN_C", "OCEAN_E", "OCEAN_A", "OCEAN_N",
+    "RSI_R", "RSI_S", "RSI_I",
+    "TRAUMA", "ENTROPY",
+    "DARK_MACH", "DARK_NARC", "DARK_PSYCH",
+)
+TAIL_FIELDS = ("HAMILTONIAN", "GRANOVETTER", "LYAPUNOV")
+QUANTIZE_BINS = 10
+MAX_BIASES = 5
+
+# Where each quantized field is decoded to: (profile attribute, dict key or None)
+FIELD_TARGETS = (
+    ('disc', 'D'), ('disc', 'I'), ('disc', 'S'), ('disc', 'C'),
+    ('ocean', 'O'), ('ocean', 'C'), ('ocean', 'E'), ('ocean', 'A'), ('ocean', 'N'),
+    ('rsi', 'real'), ('rsi', 'symbolic'), ('rsi', 'imaginary'),
+    ('trauma', None), ('entropy', None),
+    ('dark_triad', 'machiavellianism'), ('dark_triad', 'narcissism'), ('dark_triad', 'psychopathy'),
+    ('physics', 'hamiltonian_energy'), ('physics', 'granovetter_threshold'), ('physics', 'lyapunov_exponent'),
+)
+
+# Decoding field codes after the quantized fields (whose codes are their index)
+_SPIN, _BIAS, _KEY, _MODE, _TEMPO, _END = range(len(FIELD_TARGETS), len(FIELD_TARGETS) + 6)
+
+# Batch encoding columns before rows are compacted (absent tokens leave gaps)
+_BIAS_SLOT = 19                         # After PSYCH_START, DISC, OCEAN, RSI, McKenney-Lacan, Dark Triad
+_PHYSICS_SLOT = _BIAS_SLOT + MAX_BIASES  # HAMILTONIAN, spin, GRANOVETTER, LYAPUNOV
+_CONTEXT_SLOT = _PHYSICS_SLOT + 4        # Key, mode, tempo
+_SLOT_WIDTH = _CONTEXT_SLOT + 3 + 1      # PSYCH_END last
 
 
 class PsychoscoreTokenizer(REMI):
@@ -226,11 +193,108 @@ class PsychoscoreTokenizer(REMI):
         
         # Update inverse vocab
         self._vocab_inv = {v: k for k, v in self.vocab.items()}
+        self._build_prefix_tables()
+    
+    def _build_prefix_tables(self):
+        """ID tables for encoding and decoding prefixes without token strings"""
+        vocab = self.vocab
+        self._field_bases = np.array(
+            [vocab[f"{name}:0.0"] for name in HEAD_FIELDS + TAIL_FIELDS], dtype=np.int64
+        )
+        self._field_base_list = self._field_bases.tolist()
+        self._rsi_dominant_ids = {reg: vocab[f"RSI_{reg.upper()}_DOM"] for reg in ('real', 'symbolic', 'imaginary')}
+        self._bias_ids = {name[5:]: idx for name, idx in vocab.items() if name.startswith("BIAS_")}
+        self._spin_ids = (vocab["ISING_SPIN_UP"], vocab["ISING_SPIN_DOWN"])
+        self._tempo_ids = [(int(t), vocab[f"TEMPO_{t}"]) for t in self.TEMPOS]
+        
+        # Decoding: field code and value per token ID (-1: not a prefix field)
+        field = np.full(max(vocab.values()) + 1, -1, dtype=np.int16)
+        value = np.zeros(len(field), dtype=np.float64)
+        bins = np.arange(QUANTIZE_BINS + 1)
+        for code, base in enumerate(self._field_base_list):
+            field[base + bins] = code
+            # Same floats as parsing the "0.3"-style token suffix
+            value[base + bins] = bins / QUANTIZE_BINS
+        value[self._field_bases[-1] + bins] -= 0.5  # LYAPUNOV back to [-0.5, 0.5]
+        field[list(self._spin_ids)] = _SPIN
+        value[list(self._spin_ids)] = (1, -1)
+        for name, idx in self._bias_ids.items():
+            if name.lower() in self.BIAS_NAMES:
+                field[idx], value[idx] = _BIAS, self.BIAS_NAMES.index(name.lower())
+        for code, kind, names in ((_KEY, "KEY", self.KEYS), (_MODE, "MODE", self.MODES), (_TEMPO, "TEMPO", self.TEMPOS)):
+            for i, name in enumerate(names):
+                idx = vocab[f"{kind}_{name}"]
+                field[idx], value[idx] = code, int(name) if code == _TEMPO else i
+        field[vocab["PSYCH_END"]] = _END
+        self._decode_field = field
+        self._decode_value = value
+        
+        # The same as (profile attribute, dict key, value) per ID, for single prefixes
+        targets = FIELD_TARGETS + (('physics', 'ising_spin'), ('cognitive_biases', None),
+                                   ('key', None), ('mode', None), ('tempo', None), (None, None))
+        self._decode_entries = {}
+        for idx in np.flatnonzero(field >= 0).tolist():
+            code, v = int(field[idx]), float(value[idx])
+            if code == _SPIN:
+                v = '+' if v > 0 else '-'
+            elif code == _BIAS:
+                v = self.BIAS_NAMES[int(v)]
+            elif code == _KEY:
+                v = self.KEYS[int(v)]
+            elif code == _MODE:
+                v = self.MODES[int(v)]
+            elif code == _TEMPO:
+                v = int(v)
+            self._decode_entries[idx] = targets[code] + (v,)
+    
+    quantize = staticmethod(quantize)
+    
+    def _profile_fields(self, profile: PsychometricProfile) -> Tuple[List[float], int, List[int], int, List[int]]:
+        """
+        A profile's prefix content before quantization.
+        
+        Returns:
+            (values of HEAD_FIELDS + TAIL_FIELDS, RSI marker ID, bias IDs,
+            spin ID, key/mode/tempo IDs)
+        """
+        disc, ocean, rsi, dark, physics = profile.disc, profile.ocean, profile.rsi, profile.dark_triad, profile.physics
+        values = [
+            disc['D'], disc['I'], disc['S'], disc['C'],
+            ocean['O'], ocean['C'], ocean['E'], ocean['A'], ocean['N'],
+            rsi['real'], rsi['symbolic'], rsi['imaginary'],
+            profile.trauma, profile.entropy,
+            dark['machiavellianism'], dark['narcissism'], dark['psychopathy'],
+            physics.get('hamiltonian_energy', 0.5),
+            physics.get('granovetter_threshold', 0.5),
+            # Normalize from [-0.5, 0.5] to [0, 1]
+            physics.get('lyapunov_exponent', 0.0) + 0.5,
+        ]
+        dominant = profile.get_rsi_dominant()
+        if dominant not in self._rsi_dominant_ids:
+            raise KeyError(f"RSI_{dominant.upper()}_DOM")
+        
+        biases = []
+        for name in profile.cognitive_biases[:MAX_BIASES]:
+            bias = self._bias_ids.get(name.upper())
+            if bias is not None:
+                biases.append(bias)
+        spin = self._spin_ids[0] if physics.get('ising_spin', '+') == '+' else self._spin_ids[1]
+        
+        context = []
+        if profile.key:
+            context.append(self.vocab[f"KEY_{profile.key}"])
+        if profile.mode:
+            context.append(self.vocab[f"MODE_{profile.mode}"])
+        if profile.tempo:
+            # Closest tempo bin (the lower one on ties)
+            context.append(min(self._tempo_ids, key=lambda bin: abs(bin[0] - profile.tempo))[1])
+        return values, self._rsi_dominant_ids[dominant], biases, spin, context
     
     @staticmethod
-    def quantize(value: float, bins: int = 10) -> float:
-        """Quantize a 0-1 value to discrete bins"""
-        return round(value * bins) / bins
+    def _bin_error(index: int, values) -> KeyError:
+        """The KeyError a string lookup would raise for an out-of-range field value"""
+        name = (HEAD_FIELDS + TAIL_FIELDS)[index]
+        return KeyError(f"{name}:{quantize(float(values[index])):.1f}")
     
     def encode_psychometric_profile(
         self, 
@@ -241,78 +305,81 @@ class PsychoscoreTokenizer(REMI):
         
         Returns list of token IDs forming the psychometric prefix.
         """
-        tokens = []
-        
-        # Start marker
-        tokens.append(self.vocab["PSYCH_START"])
-        
-        # === DISC ===
-        for dim in ['D', 'I', 'S', 'C']:
-            q_val = self.quantize(profile.disc[dim])
-            token = f"DISC_{dim}:{q_val:.1f}"
-            tokens.append(self.vocab[token])
-        
-        # === OCEAN ===
-        for dim in 'OCEAN':
-            q_val = self.quantize(profile.ocean[dim])
-            token = f"OCEAN_{dim}:{q_val:.1f}"
-            tokens.append(self.vocab[token])
-        
-        # === RSI ===
-        # Add dominant register marker
-        dominant = profile.get_rsi_dominant()
-        tokens.append(self.vocab[f"RSI_{dominant.upper()}_DOM"])
-        
-        # Add continuous RSI values
-        for reg, prefix in [('real', 'R'), ('symbolic', 'S'), ('imaginary', 'I')]:
-            q_val = self.quantize(profile.rsi[reg])
-            token = f"RSI_{prefix}:{q_val:.1f}"
-            tokens.append(self.vocab[token])
+        values, dominant, biases, spin, context = self._profile_fields(profile)
+        ids = []
+        for i, (base, value) in enumerate(zip(self._field_base_list, values)):
+            index = round(value * QUANTIZE_BINS)
+            if not 0 <= index <= QUANTIZE_BINS:
+                raise self._bin_error(i, values)
+            ids.append(base + index)
         
-        # === McKenney-Lacan ===
-        tokens.append(self.vocab[f"TRAUMA:{self.quantize(profile.trauma):.1f}"])
-        tokens.append(self.vocab[f"ENTROPY:{self.quantize(profile.entropy):.1f}"])
-        
-        # === Dark Triad ===
-        tokens.append(self.vocab[f"DARK_MACH:{self.quantize(profile.dark_triad['machiavellianism']):.1f}"])
-        tokens.append(self.vocab[f"DARK_NARC:{self.quantize(profile.dark_triad['narcissism']):.1f}"])
-        tokens.append(self.vocab[f"DARK_PSYCH:{self.quantize(profile.dark_triad['psychopathy']):.1f}"])
-        
-        # === Cognitive Biases (up to 5) ===
-        for bias in profile.cognitive_biases[:5]:
-            token = f"BIAS_{bias.upper()}"
-            if token in self.vocab:
-                tokens.append(self.vocab[token])
-        
-        # === Physics State ===
-        h_energy = profile.physics.get('hamiltonian_energy', 0.5)
-        tokens.append(self.vocab[f"HAMILTONIAN:{self.quantize(h_energy):.1f}"])
-        
-        spin = profile.physics.get('ising_spin', '+')
-        tokens.append(self.vocab["ISING_SPIN_UP" if spin == '+' else "ISING_SPIN_DOWN"])
+        return [
+            self.vocab["PSYCH_START"],
+            *ids[:9],           # DISC, OCEAN
+            dominant,           # Dominant RSI register
+            *ids[9:17],         # RSI values, McKenney-Lacan, Dark Triad
+            *biases,            # Up to 5 cognitive biases
+            ids[17],            # HAMILTONIAN
+            spin,
+            ids[18], ids[19],   # GRANOVETTER, LYAPUNOV
+            *context,           # Optional key, mode, tempo
+            self.vocab["PSYCH_END"],
+        ]
+    
+    def encode_profiles_batch(self, profiles: Sequence[PsychometricProfile]) -> np.ndarray:
+        """
+        Encode many profiles at once.
         
-        granov = profile.physics.get('granovetter_threshold', 0.5)
-        tokens.append(self.vocab[f"GRANOVETTER:{self.quantize(granov):.1f}"])
+        Same tokens per row as encode_psychometric_profile(), quantized
+        for all rows together.
         
-        lyap = profile.physics.get('lyapunov_exponent', 0.0)
-        lyap_norm = (lyap + 0.5)  # Normalize from [-0.5, 0.5] to [0, 1]
-        tokens.append(self.vocab[f"LYAPUNOV:{self.quantize(lyap_norm):.1f}"])
+        Returns:
+            (N, L) int32 array of prefixes, right-padded with the pad token
+            to the longest prefix
+        """
+        n = len(profiles)
+        flat: List[float] = []
+        dominant = np.empty(n, dtype=np.int64)
+        spin = np.empty(n, dtype=np.int64)
+        ragged = []   # (row, bias IDs, key/mode/tempo IDs) for rows that have any
+        for row, profile in enumerate(profiles):
+            values, dominant[row], biases, spin[row], context = self._profile_fields(profile)
+            flat.extend(values)
+            if biases or context:
+                ragged.append((row, biases, context))
+        values = np.array(flat, dtype=np.float64).reshape(n, len(self._field_bases))
         
-        # === Musical Context (optional) ===
-        if profile.key:
-            tokens.append(self.vocab[f"KEY_{profile.key}"])
-        if profile.mode:
-            tokens.append(self.vocab[f"MODE_{profile.mode}"])
-        if profile.tempo:
-            # Find closest tempo bin
-            tempo_bins = [40, 60, 80, 100, 120, 140, 160, 180, 200]
-            closest = min(tempo_bins, key=lambda x: abs(x - profile.tempo))
-            tokens.append(self.vocab[f"TEMPO_{closest}"])
+        # np.rint rounds half to even, like round() in quantize()
+        index = np.rint(values * QUANTIZE_BINS)
+        bad = ~((index >= 0) & (index <= QUANTIZE_BINS))
+        if bad.any():
+            row, column = np.argwhere(bad)[0]
+            raise self._bin_error(column, values[row])
+        ids = self._field_bases + index.astype(np.int64)
         
-        # End marker
-        tokens.append(self.vocab["PSYCH_END"])
+        # Fixed slots, -1 where a row has no token; rows are then compacted left
+        slots = np.full((n, _SLOT_WIDTH), -1, dtype=np.int64)
+        slots[:, 0] = self.vocab["PSYCH_START"]
+        slots[:, 1:10] = ids[:, :9]
+        slots[:, 10] = dominant
+        slots[:, 11:19] = ids[:, 9:17]
+        slots[:, _PHYSICS_SLOT] = ids[:, 17]
+        slots[:, _PHYSICS_SLOT + 1] = spin
+        slots[:, _PHYSICS_SLOT + 2:_CONTEXT_SLOT] = ids[:, 18:20]
+        slots[:, -1] = self.vocab["PSYCH_END"]
+        for row, biases, context in ragged:
+            if biases:
+                slots[row, _BIAS_SLOT:_BIAS_SLOT + len(biases)] = biases
+            if context:
+                slots[row, _CONTEXT_SLOT:_CONTEXT_SLOT + len(context)] = context
         
-        return tokens
+        present = slots >= 0
+        order = np.argsort(~present, axis=1, kind='stable')
+        slots = np.take_along_axis(slots, order, axis=1)
+        width = int(present.sum(axis=1).max()) if n else 0
+        batch = slots[:, :width]
+        batch[batch < 0] = self.pad_token_id
+        return batch.astype(np.int32)
     
     def decode_psychometric_prefix(
         self, 
@@ -321,77 +388,108 @@ class PsychoscoreTokenizer(REMI):
         """
         Decode psychometric prefix from token sequence.
         
-        Returns (profile, end_index) where end_index is position after SEP.
+        Returns (profile, end_index) where end_index is the position after
+        PSYCH_END (0 if there is none). Fields missing from the prefix keep
+        their defaults; a field repeated before PSYCH_END keeps its last value.
         """
         profile = PsychometricProfile()
+        entries = self._decode_entries
         
         end_idx = 0
         for i, tok_id in enumerate(tokens):
-            tok = self._vocab_inv.get(tok_id, "")
-            
-            if tok == "PSYCH_END":
+            entry = entries.get(tok_id)
+            if entry is None:
+                continue
+            target, key, value = entry
+            if target is None:
                 end_idx = i + 1
                 break
-            
-            # Parse DISC
-            if tok.startswith("DISC_"):
-                dim, val = tok[5], float(tok.split(":")[1])
-                profile.disc[dim] = val
-            
-            # Parse OCEAN
-            elif tok.startswith("OCEAN_"):
-                dim, val = tok[6], float(tok.split(":")[1])
-                profile.ocean[dim] = val
-            
-            # Parse RSI
-            elif tok.startswith("RSI_R:"):
-                profile.rsi['real'] = float(tok.split(":")[1])
-            elif tok.startswith("RSI_S:"):
-                profile.rsi['symbolic'] = float(tok.split(":")[1])
-            elif tok.startswith("RSI_I:"):
-                profile.rsi['imaginary'] = float(tok.split(":")[1])
-            
-            # Parse McKenney-Lacan
-            elif tok.startswith("TRAUMA:"):
-                profile.trauma = float(tok.split(":")[1])
-            elif tok.startswith("ENTROPY:"):
-                profile.entropy = float(tok.split(":")[1])
-            
-            # Parse Dark Triad
-            elif tok.startswith("DARK_MACH:"):
-                profile.dark_triad['machiavellianism'] = float(tok.split(":")[1])
-            elif tok.startswith("DARK_NARC:"):
-                profile.dark_triad['narcissism'] = float(tok.split(":")[1])
-            elif tok.startswith("DARK_PSYCH:"):
-                profile.dark_triad['psychopathy'] = float(tok.split(":")[1])
-            
-            # Parse biases
-            elif tok.startswith("BIAS_"):
-                bias_name = tok[5:].lower()
-                profile.cognitive_biases.append(bias_name)
-            
-            # Parse physics
-            elif tok.startswith("HAMILTONIAN:"):
-                profile.physics['hamiltonian_energy'] = float(tok.split(":")[1])
-            elif tok == "ISING_SPIN_UP":
-                profile.physics['ising_spin'] = '+'
-            elif tok == "ISING_SPIN_DOWN":
-                profile.physics['ising_spin'] = '-'
-            elif tok.startswith("GRANOVETTER:"):
-                profile.physics['granovetter_threshold'] = float(tok.split(":")[1])
-            elif tok.startswith("LYAPUNOV:"):
-                profile.physics['lyapunov_exponent'] = float(tok.split(":")[1]) - 0.5
-            
-            # Parse musical context
-            elif tok.startswith("KEY_"):
-                profile.key = tok[4:]
-            elif tok.startswith("MODE_"):
-                profile.mode = tok[5:]
-            elif tok.startswith("TEMPO_"):
-                profile.tempo = int(tok[6:])
+            if target == 'cognitive_biases':
+                profile.cognitive_biases.append(value)
+            elif key is None:
+                setattr(profile, target, value)
+            else:
+                getattr(profile, target)[key] = value
         
         return profile, end_idx
     
+    def decode_prefixes_batch(self, tokens) -> Dict[str, np.ndarray]:
+        """
+        Decode the prefixes of many sequences into columns.
+        
+        Args:
+            tokens: (N, L) token IDs, e.g. generated sequences or
+                encode_profiles_batch() output (padding is ignored)
+        
+        Returns:
+            Columns of N values, as decode_psychometric_prefix() would
+            decode each row:
+                "disc.D", "ocean.O", "rsi.real", "trauma", ... "physics.lyapunov_exponent"
+                                      float64, one per FIELD_TARGETS entry
+                "physics.ising_spin"  int8, +1 or -1
+                "cognitive_biases"    (N, B) int16 indices into BIAS_NAMES in
+                                      prefix order, -1 padded
+                "key", "mode"         int8 indices into KEYS / MODES, -1 if absent
+                "tempo"               int32 BPM, -1 if absent
+                "end_index"           int64 position after PSYCH_END, 0 if absent
+        """
+        tokens = np.asarray(tokens)
+        n, length = tokens.shape
+        table = self._decode_field
+        known = (tokens >= 0) & (tokens < len(table))
+        ids = np.where(known, tokens, 0)
+        field = np.where(known, table[ids], -1)
+        
+        # Only tokens before the first PSYCH_END count
+        is_end = field == _END
+        has_end = is_end.any(axis=1)
+        first_end = np.where(has_end, is_end.argmax(axis=1) if length else 0, length)
+        field[np.arange(length) >= first_end[:, None]] = -1
+        
+        # Prefix tokens in row-major order (ascending position within a row)
+        rows, cols = np.nonzero(field >= 0)
+        codes = field[rows, cols].astype(np.int64)
+        values = self._decode_value[ids[rows, cols]]
+        
+        # Single-valued columns by field code, holding the defaults of an empty prefix
+        default = PsychometricProfile()
+        columns: Dict[str, np.ndarray] = {}
+        column_of: Dict[int, str] = {}
+        for code, (attr, key) in enumerate(FIELD_TARGETS):
+            name = column_of[code] = f"{attr}.{key}" if key else attr
+            base = getattr(default, attr)
+            columns[name] = np.full(n, base[key] if key else base, dtype=np.float64)
+        for code, name, fill, dtype in (
+            (_SPIN, "physics.ising_spin", 1 if default.physics['ising_spin'] == '+' else -1, np.int8),
+            (_KEY, "key", -1, np.int8),
+            (_MODE, "mode", -1, np.int8),
+            (_TEMPO, "tempo", -1, np.int32),
+        ):
+            column_of[code] = name
+            columns[name] = np.full(n, fill, dtype=dtype)
+        
+        # Single-valued fields: the last occurrence per (row, field) wins
+        single = codes != _BIAS
+        s_rows, s_codes, s_values = rows[single], codes[single], values[single]
+        _, reverse_first = np.unique((s_rows * (_END + 1) + s_codes)[::-1], return_index=True)
+        last = len(s_rows) - 1 - reverse_first
+        s_rows, s_codes, s_values = s_rows[last], s_codes[last], s_values[last]
+        for code, name in column_of.items():
+            selected = s_codes == code
+            column = columns[name]
+            column[s_rows[selected]] = s_values[selected].astype(column.dtype)
+        
+        # Biases: every occurrence, in order
+        b_rows, b_values = rows[~single], values[~single]
+        counts = np.bincount(b_rows, minlength=n)
+        biases = np.full((n, int(counts.max()) if n else 0), -1, dtype=np.int16)
+        starts = np.cumsum(counts) - counts
+        biases[b_rows, np.arange(len(b_rows)) - starts[b_rows]] = b_values
+        columns["cognitive_biases"] = biases
+        
+        columns["end_index"] = np.where(has_end, first_end + 1, 0)
+        return columns
+    
     def save_pretrained(self, save_directory: str):
         """Save tokenizer to directory"""
         save_path = Path(save_directory)
@@ -421,6 +519,7 @@ class PsychoscoreTokenizer(REMI):
                 for token, idx in psych_vocab.items():
                     tokenizer.vocab[token] = idx
                 tokenizer._vocab_inv = {v: k for k, v in tokenizer.vocab.items()}
+                tokenizer._build_prefix_tables()
         
         return tokenizer
 
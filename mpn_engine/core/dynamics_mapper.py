@@ -12,9 +12,11 @@ N (Neuroticism) → Vibrato/tremolo expression
 """
 
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Set
 from enum import Enum
 
+import numpy as np
+
 
 class OceanDimension(Enum):
     """The Big Five personality dimensions"""
@@ -91,6 +93,33 @@ class MusicalDynamics:
     dynamic_marking: str     # ppp, pp, p, mp, mf, f, ff, fff
 
 
+@dataclass
+class MusicalDynamicsBatch:
+    """Columnar musical dynamics for a sequence of beats (one row per beat)"""
+    tempo_style: np.ndarray      # str
+    tempo_bpm: np.ndarray        # int
+    articulation: np.ndarray     # str
+    velocity: np.ndarray         # int
+    pitch_bend: np.ndarray       # int
+    modulation: np.ndarray       # int
+    dynamic_marking: np.ndarray  # str
+    
+    def __len__(self) -> int:
+        return len(self.velocity)
+    
+    def __getitem__(self, i: int) -> MusicalDynamics:
+        """Materialize a single row as a MusicalDynamics"""
+        return MusicalDynamics(
+            tempo_style=str(self.tempo_style[i]),
+            tempo_bpm=int(self.tempo_bpm[i]),
+            articulation=str(self.articulation[i]),
+            velocity=int(self.velocity[i]),
+            pitch_bend=int(self.pitch_bend[i]),
+            modulation=int(self.modulation[i]),
+            dynamic_marking=str(self.dynamic_marking[i])
+        )
+
+
 class DynamicsMapper:
     """
     Maps OCEAN profiles to musical dynamics.
@@ -185,6 +214,107 @@ class DynamicsMapper:
             dynamic_marking=dynamic_marking
         )
     
+    # Columnar views of DYNAMIC_MARKINGS for get_dynamics_batch
+    _MARKING_THRESHOLDS = np.array([t for t, _ in DYNAMIC_MARKINGS])
+    _MARKING_NAMES = np.array(["mf"] + [m for _, m in DYNAMIC_MARKINGS])
+    
+    def get_dynamics_batch(self,
+                           O: np.ndarray,
+                           C: np.ndarray,
+                           E: np.ndarray,
+                           A: np.ndarray,
+                           N: np.ndarray,
+                           trauma_R=0.5,
+                           entropy_H=0.5) -> MusicalDynamicsBatch:
+        """
+        Vectorized get_dynamics over whole beat arrays.
+        
+        Every argument is an array (or scalar, broadcast) with one entry
+        per beat. Row i of the result equals
+        get_dynamics(OceanProfile(O[i], C[i], E[i], A[i], N[i]),
+        trauma_R[i], entropy_H[i]).
+        
+        Args:
+            O, C, E, A, N: OCEAN dimensions per beat
+            trauma_R: Trauma level per beat
+            entropy_H: Entropy level per beat
+            
+        Returns:
+            Columnar dynamics specification
+        """
+        O, C, E, A, N, trauma_R, entropy_H = np.broadcast_arrays(
+            *(np.asarray(x, dtype=np.float64)
+              for x in (O, C, E, A, N, trauma_R, entropy_H))
+        )
+        
+        # Tempo: Openness affects style, Entropy affects variation
+        rubato = O > 0.5
+        tempo_style = np.where(rubato, "rubato", "strict")
+        tempo_variation = np.trunc(entropy_H * 20).astype(np.int64)
+        tempo_bpm = self.base_bpm + np.where(rubato, tempo_variation, 0)
+        
+        # Articulation: Conscientiousness
+        articulation = np.select(
+            [C > 0.7, C > 0.5, C > 0.3],
+            ["staccato", "tenuto", "legato"],
+            default="slur"
+        )
+        
+        # Velocity: Extraversion → Volume, trauma increases intensity
+        base_velocity = np.trunc(E * 100 + 27).astype(np.int64)
+        trauma_boost = np.trunc(trauma_R * 20).astype(np.int64)
+        velocity = np.minimum(127, base_velocity + trauma_boost)
+        
+        # Pitch bend: Low Agreeableness and trauma → Dissonance
+        dissonance_factor = (1 - A) * 0.5 + trauma_R * 0.5
+        pitch_bend = np.trunc(dissonance_factor * 100).astype(np.int64)
+        
+        # Modulation: Neuroticism → Vibrato/Tremolo
+        modulation = np.trunc(N * 127).astype(np.int64)
+        
+        # Dynamic marking: last threshold <= E ("mf" below the first one)
+        marking_idx = np.searchsorted(self._MARKING_THRESHOLDS, E, side='right')
+        dynamic_marking = self._MARKING_NAMES[marking_idx]
+        
+        return MusicalDynamicsBatch(
+            tempo_style=tempo_style,
+            tempo_bpm=tempo_bpm,
+            articulation=articulation,
+            velocity=velocity,
+            pitch_bend=pitch_bend,
+            modulation=modulation,
+            dynamic_marking=dynamic_marking
+        )
+    
+    def get_speaker_dynamics_batch(self,
+                                   speakers,
+                                   trauma_R,
+                                   entropy_H) -> MusicalDynamicsBatch:
+        """
+        Vectorized dynamics for a beat sequence using registered speaker profiles.
+        
+        Speakers without a profile use the neutral OceanProfile().
+        
+        Args:
+            speakers: Speaker name per beat
+            trauma_R: Trauma level per beat
+            entropy_H: Entropy level per beat
+        """
+        default = OceanProfile()
+        profiles = [self.speaker_profiles.get(s, default) for s in speakers]
+        columns = np.array(
+            [(p.O, p.C, p.E, p.A, p.N) for p in profiles], dtype=np.float64
+        ).reshape(-1, 5)
+        return self.get_dynamics_batch(*columns.T, trauma_R=trauma_R, entropy_H=entropy_H)
+    
+    # Keyword markers for each OCEAN dimension (substring matches)
+    O_WORDS = ('imagine', 'create', 'perhaps', 'wonder', 'dream', 'art')
+    C_WORDS = ('therefore', 'because', 'should', 'must', 'plan', 'careful')
+    E_WORDS = ('party', 'friend', 'together', 'exciting', 'fun')
+    A_WORDS = ('love', 'kind', 'help', 'please', 'thank', 'sorry', 'care')
+    N_WORDS = ('fear', 'worry', 'afraid', 'anxious', 'nervous', 'hate', 'angry')
+    KEYWORDS = frozenset(O_WORDS + C_WORDS + E_WORDS + A_WORDS + N_WORDS)
+    
     def infer_profile_from_text(self, texts: list[str]) -> OceanProfile:
         """
         Infer OCEAN profile from text patterns.
@@ -198,28 +328,42 @@ class DynamicsMapper:
         """
         all_text = " ".join(texts).lower()
         
+        return self.profile_from_counts(
+            matched={w for w in self.KEYWORDS if w in all_text},
+            exclamations=all_text.count('!'),
+            questions=all_text.count('?')
+        )
+    
+    @classmethod
+    def profile_from_counts(cls,
+                            matched: Set[str],
+                            exclamations: int,
+                            questions: int) -> OceanProfile:
+        """
+        Build an OCEAN profile from pre-aggregated text features.
+        
+        Args:
+            matched: Keywords from KEYWORDS present in the speaker's text
+            exclamations: Number of '!' characters
+            questions: Number of '?' characters
+        """
         # Openness: vocabulary diversity and creativity markers
-        o_words = ['imagine', 'create', 'perhaps', 'wonder', 'dream', 'art']
-        o_score = 0.5 + sum(0.05 for w in o_words if w in all_text)
+        o_score = 0.5 + sum(0.05 for w in cls.O_WORDS if w in matched)
         
         # Conscientiousness: structure and precision
-        c_words = ['therefore', 'because', 'should', 'must', 'plan', 'careful']
-        c_score = 0.5 + sum(0.05 for w in c_words if w in all_text)
+        c_score = 0.5 + sum(0.05 for w in cls.C_WORDS if w in matched)
         
         # Extraversion: energy and social engagement
         e_score = 0.5
-        e_score += all_text.count('!') * 0.02
-        e_words = ['party', 'friend', 'together', 'exciting', 'fun']
-        e_score += sum(0.05 for w in e_words if w in all_text)
+        e_score += exclamations * 0.02
+        e_score += sum(0.05 for w in cls.E_WORDS if w in matched)
         
         # Agreeableness: warmth and cooperation
-        a_words = ['love', 'kind', 'help', 'please', 'thank', 'sorry', 'care']
-        a_score = 0.5 + sum(0.05 for w in a_words if w in all_text)
+        a_score = 0.5 + sum(0.05 for w in cls.A_WORDS if w in matched)
         
         # Neuroticism: negative affect and anxiety
-        n_words = ['fear', 'worry', 'afraid', 'anxious', 'nervous', 'hate', 'angry']
-        n_score = 0.5 + sum(0.05 for w in n_words if w in all_text)
-        n_score += all_text.count('?') * 0.01  # Uncertainty
+        n_score = 0.5 + sum(0.05 for w in cls.N_WORDS if w in matched)
+        n_score += questions * 0.01  # Uncertainty
         
         return OceanProfile(
             O=min(1.0, o_score),
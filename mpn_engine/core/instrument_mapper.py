@@ -11,7 +11,7 @@ C (Conscientiousness) → Percussion (precise, methodical)
 """
 
 from dataclasses import dataclass
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Set
 from enum import Enum
 
 
@@ -126,6 +126,13 @@ class InstrumentMapper:
         """Assign a DISC profile to a speaker"""
         self.speaker_profiles[speaker] = profile
     
+    # Keyword markers for each DISC dimension (substring matches)
+    D_WORDS = ('must', 'will', 'demand', 'order', 'command', 'now', 'immediately')
+    I_WORDS = ('love', 'friend', 'together', 'wonderful', 'exciting', 'great')
+    S_WORDS = ('perhaps', 'maybe', 'we', 'help', 'support', 'together', 'gentle')
+    C_WORDS = ('therefore', 'because', 'however', 'precisely', 'exactly', 'analyze')
+    KEYWORDS = frozenset(D_WORDS + I_WORDS + S_WORDS + C_WORDS)
+    
     def infer_profile_from_text(self, speaker: str, texts: List[str]) -> DISCProfile:
         """
         Infer DISC profile from dialogue patterns.
@@ -137,41 +144,61 @@ class InstrumentMapper:
         - C: Precise language, conditionals, data references
         """
         all_text = " ".join(texts).lower()
-        word_count = len(all_text.split())
         
+        profile = self.profile_from_counts(
+            matched={w for w in self.KEYWORDS if w in all_text},
+            exclamations=all_text.count('!'),
+            questions=all_text.count('?'),
+            word_count=len(all_text.split()),
+            line_count=len(texts)
+        )
+        
+        self.speaker_profiles[speaker] = profile
+        return profile
+    
+    @classmethod
+    def profile_from_counts(cls,
+                            matched: Set[str],
+                            exclamations: int,
+                            questions: int,
+                            word_count: int,
+                            line_count: int) -> DISCProfile:
+        """
+        Build a DISC profile from pre-aggregated text features.
+        
+        Args:
+            matched: Keywords from KEYWORDS present in the speaker's text
+            exclamations: Number of '!' characters
+            questions: Number of '?' characters
+            word_count: Total whitespace-separated words
+            line_count: Number of dialogue lines
+        """
         # D indicators: commands, short declarative statements
         d_score = 0.5
-        d_words = ['must', 'will', 'demand', 'order', 'command', 'now', 'immediately']
-        d_score += sum(0.05 for w in d_words if w in all_text)
-        if word_count > 0 and word_count / len(texts) < 10:  # Short sentences
+        d_score += sum(0.05 for w in cls.D_WORDS if w in matched)
+        if word_count > 0 and word_count / line_count < 10:  # Short sentences
             d_score += 0.1
         
         # I indicators: social, enthusiastic
         i_score = 0.5
-        i_words = ['love', 'friend', 'together', 'wonderful', 'exciting', 'great']
-        i_score += sum(0.05 for w in i_words if w in all_text)
-        i_score += all_text.count('!') * 0.02  # Exclamations
+        i_score += sum(0.05 for w in cls.I_WORDS if w in matched)
+        i_score += exclamations * 0.02  # Exclamations
         
         # S indicators: calm, supportive
         s_score = 0.5
-        s_words = ['perhaps', 'maybe', 'we', 'help', 'support', 'together', 'gentle']
-        s_score += sum(0.05 for w in s_words if w in all_text)
+        s_score += sum(0.05 for w in cls.S_WORDS if w in matched)
         
         # C indicators: analytical, precise
         c_score = 0.5
-        c_words = ['therefore', 'because', 'however', 'precisely', 'exactly', 'analyze']
-        c_score += sum(0.05 for w in c_words if w in all_text)
-        c_score += all_text.count('?') * 0.01  # Questions (seeking info)
+        c_score += sum(0.05 for w in cls.C_WORDS if w in matched)
+        c_score += questions * 0.01  # Questions (seeking info)
         
-        profile = DISCProfile(
+        return DISCProfile(
             D=min(1.0, d_score),
             I=min(1.0, i_score),
             S=min(1.0, s_score),
             C=min(1.0, c_score)
         )
-        
-        self.speaker_profiles[speaker] = profile
-        return profile
     
     def get_instrument(self, speaker: str) -> InstrumentProfile:
         """
@@ -8,30 +8,56 @@ Core implementation of the Symphonic Calculus metrics:
 - Arrhythmia (α): Rhythm Disruption
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 import re
-from .ner_client import NerClient
+import sys
+from .ner_client import NerClient, Entity
+from .records import TextRecord
 
 
-@dataclass
-class MPNMetrics:
-    """Container for all MPN calculus metrics for a single beat"""
-    beat: int
-    speaker: str
-    text: str
-    trauma_R: float
-    entropy_H: float
-    baseline_B: float
-    arrhythmia_alpha: float
-    neo_riemannian_op: str
-    clinical_health_score: str
+class MPNMetrics(TextRecord):
+    """
+    Container for all MPN calculus metrics for a single beat.
+    
+    Slotted record: the speaker is stored as an interned ID and the
+    text as a span into the source buffer (see core.records).
+    """
+    
+    __slots__ = (
+        'beat', 'trauma_R', 'entropy_H', 'baseline_B',
+        'arrhythmia_alpha', 'neo_riemannian_op', 'clinical_health_score'
+    )
+    
+    FIELDS = (
+        'beat', 'speaker', 'text', 'trauma_R', 'entropy_H', 'baseline_B',
+        'arrhythmia_alpha', 'neo_riemannian_op', 'clinical_health_score'
+    )
+    
+    def __init__(self,
+                 beat: int,
+                 speaker: str,
+                 text: str,
+                 trauma_R: float,
+                 entropy_H: float,
+                 baseline_B: float,
+                 arrhythmia_alpha: float,
+                 neo_riemannian_op: str,
+                 clinical_health_score: str):
+        self.beat = beat
+        self.speaker = speaker
+        self.text = text
+        self.trauma_R = trauma_R
+        self.entropy_H = entropy_H
+        self.baseline_B = baseline_B
+        self.arrhythmia_alpha = arrhythmia_alpha
+        self.neo_riemannian_op = neo_riemannian_op
+        self.clinical_health_score = clinical_health_score
     
     def to_dict(self) -> dict:
         return {
             'BEAT': self.beat,
             'SPEAKER': self.speaker,
-            'TEXT': self.text[:200],  # Truncate for CSV
+            'TEXT': self.text_prefix(200),  # Truncate for CSV
             'TRAUMA_R': round(self.trauma_R, 2),
             'ENTROPY_H': round(self.entropy_H, 2),
             'BASELINE_B': round(self.baseline_B, 2),
@@ -95,7 +121,11 @@ class MPNCalculus:
         self.trauma_keyword_weight = trauma_keyword_weight
         self.ner_client = NerClient()
     
-    def calculate_trauma_R(self, beat: int, total_beats: int, text: str) -> float:
+    def calculate_trauma_R(self,
+                           beat: int,
+                           total_beats: int,
+                           text: str,
+                           ner_entities: Optional[List[Entity]] = None) -> float:
         """
         Riemann Curvature - Measures psychological "warping" from trauma.
         
@@ -106,14 +136,30 @@ class MPNCalculus:
             beat: Current beat number (1-indexed)
             total_beats: Total beats in the work
             text: Dialogue text for this beat
+            ner_entities: Pre-fetched NER entities (None = query NER service)
             
         Returns:
             Trauma score 0.0-1.0+ (can exceed 1.0 in extreme cases)
         """
-        # Progress through narrative (tragedy builds toward climax)
-        progress = beat / max(total_beats, 1)
-        base_R = self.base_trauma + (progress * self.trauma_progress_weight)
+        trauma_score = self.calculate_trauma_score(text, ner_entities)
+        return self.narrative_trauma_R(beat, total_beats, trauma_score)
+    
+    def calculate_trauma_score(self,
+                               text: str,
+                               ner_entities: Optional[List[Entity]] = None) -> float:
+        """
+        Text-dependent part of the trauma score (keywords + NER).
         
+        Independent of the beat position, so it can be computed before
+        the total beat count is known.
+        
+        Args:
+            text: Dialogue text for this beat
+            ner_entities: Pre-fetched NER entities (None = query NER service)
+            
+        Returns:
+            Unclamped keyword/NER trauma contribution
+        """
         # Detect trauma keywords with weighted scoring
         text_lower = text.lower()
         trauma_score = 0.0
@@ -123,12 +169,31 @@ class MPNCalculus:
             trauma_score += count * weight * self.trauma_keyword_weight
             
         # Add NER-based psychometric impact
-        ner_entities = self.ner_client.analyze_text(text)
+        if ner_entities is None:
+            ner_entities = self.ner_client.analyze_text(text)
         for entity in ner_entities:
             if entity.label in self.NER_TRAUMA_WEIGHTS:
                 # Add weight directly for each found entity
                 trauma_score += self.NER_TRAUMA_WEIGHTS[entity.label]
         
+        return trauma_score
+    
+    def narrative_trauma_R(self, beat: int, total_beats: int, trauma_score: float) -> float:
+        """
+        Combine the narrative-arc baseline with a text trauma score.
+        
+        Args:
+            beat: Current beat number (1-indexed)
+            total_beats: Total beats in the work
+            trauma_score: Result of calculate_trauma_score()
+            
+        Returns:
+            Trauma score clamped to [0, 1]
+        """
+        # Progress through narrative (tragedy builds toward climax)
+        progress = beat / max(total_beats, 1)
+        base_R = self.base_trauma + (progress * self.trauma_progress_weight)
+        
         R = base_R + trauma_score
         return min(1.0, max(0.0, R))  # Clamp to [0, 1]
     
@@ -244,14 +309,15 @@ class MPNCalculus:
             Health string like "8/10"
         """
         health = int((1.0 - min(1.0, trauma_R)) * 10)
-        return f"{health}/10"
+        return sys.intern(f"{health}/10")  # Shared across beats
     
     def score_beat(self, 
                    beat: int, 
                    total_beats: int,
                    speaker: str,
                    text: str,
-                   prev_speaker: Optional[str] = None) -> MPNMetrics:
+                   prev_speaker: Optional[str] = None,
+                   ner_entities: Optional[List[Entity]] = None) -> MPNMetrics:
         """
         Calculate all MPN metrics for a single dialogue beat.
         
@@ -261,14 +327,46 @@ class MPNCalculus:
             speaker: Speaker name
             text: Dialogue text
             prev_speaker: Previous speaker for arrhythmia calculation
+            ner_entities: Pre-fetched NER entities (None = query NER service)
             
         Returns:
             MPNMetrics dataclass with all calculated values
         """
-        trauma_R = self.calculate_trauma_R(beat, total_beats, text)
-        entropy_H = self.calculate_entropy_H(text)
+        return self.build_metrics(
+            beat=beat,
+            total_beats=total_beats,
+            speaker=speaker,
+            text=text,
+            trauma_score=self.calculate_trauma_score(text, ner_entities),
+            entropy_H=self.calculate_entropy_H(text),
+            arrhythmia_alpha=self.calculate_arrhythmia_alpha(speaker, prev_speaker)
+        )
+    
+    def build_metrics(self,
+                      beat: int,
+                      total_beats: int,
+                      speaker: str,
+                      text: str,
+                      trauma_score: float,
+                      entropy_H: float,
+                      arrhythmia_alpha: float) -> MPNMetrics:
+        """
+        Finish scoring a beat from its position-independent parts.
+        
+        Used by score_beat() and by streaming scorers that compute the
+        text metrics before the total beat count is known.
+        
+        Args:
+            beat: Current beat number (1-indexed)
+            total_beats: Total beats in work
+            speaker: Speaker name
+            text: Dialogue text
+            trauma_score: Result of calculate_trauma_score()
+            entropy_H: Result of calculate_entropy_H()
+            arrhythmia_alpha: Result of calculate_arrhythmia_alpha()
+        """
+        trauma_R = self.narrative_trauma_R(beat, total_beats, trauma_score)
         baseline_B = self.calculate_baseline_B(beat, total_beats)
-        arrhythmia_alpha = self.calculate_arrhythmia_alpha(speaker, prev_speaker)
         neo_op = self.get_neo_riemannian_op(trauma_R)
         health = self.calculate_clinical_health(trauma_R)
         
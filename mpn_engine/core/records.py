@@ -0,0 +1,164 @@
+"""
+Compact Record Storage
+
+Memory-lean building blocks for per-beat records (DialogueBeat,
+MPNMetrics). A full play can produce millions of beats, so records:
+
+- use __slots__ instead of a per-instance __dict__
+- store speakers as integer IDs into an intern table (one per parse,
+  see speaker_scope, so the tables don't grow across files)
+- reference their text as a (start, end) span into the original
+  source buffer (str, bytes or mmap) instead of holding a copy
+
+Attribute access (record.speaker, record.text) is unchanged.
+"""
+
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class SpeakerTable:
+    """Intern table mapping speaker names to small integer IDs"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, name: str) -> int:
+        """Return the ID for a speaker name, registering it if new"""
+        speaker_id = self._ids.get(name)
+        if speaker_id is None:
+            with self._lock:
+                speaker_id = self._ids.get(name)
+                if speaker_id is None:
+                    speaker_id = len(self._names)
+                    self._names.append(sys.intern(name))
+                    self._ids[name] = speaker_id
+        return speaker_id
+
+    def name(self, speaker_id: int) -> str:
+        """Return the speaker name for an ID"""
+        return self._names[speaker_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+
+# Default speaker table, for records built outside any speaker_scope()
+SPEAKERS = SpeakerTable()
+
+_scope = threading.local()
+
+
+@contextmanager
+def speaker_scope(table: Optional[SpeakerTable] = None) -> Iterator[SpeakerTable]:
+    """
+    Intern the speakers of records built in this block (on this thread)
+    into `table`, a fresh one by default, instead of SPEAKERS. The table
+    lives as long as its records do.
+    """
+    table = SpeakerTable() if table is None else table
+    previous = getattr(_scope, 'table', None)
+    _scope.table = table
+    try:
+        yield table
+    finally:
+        _scope.table = previous
+
+
+def current_speakers() -> SpeakerTable:
+    """Table new records intern their speakers into"""
+    table = getattr(_scope, 'table', None)
+    return SPEAKERS if table is None else table
+
+
+def span_text(source, start: int, end: int) -> str:
+    """Materialize a text span; byte buffers (bytes, mmap) are decoded as UTF-8"""
+    chunk = source[start:end]
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        return bytes(chunk).decode('utf-8', errors='ignore')
+    return chunk
+
+
+class TextRecord:
+    """
+    Slotted base class for records carrying a speaker and a text span.
+
+    Subclasses declare their own __slots__ and list their public fields
+    (in constructor order) in FIELDS; repr, equality and pickling are
+    driven by that list. Pickled records carry the speaker name and the
+    materialized text, so they are portable across processes with
+    different intern tables.
+    """
+
+    __slots__ = ('speaker_id', '_speakers', '_source', '_start', '_end')
+
+    FIELDS: Tuple[str, ...] = ('speaker', 'text')
+
+    @property
+    def speaker(self) -> str:
+        return self._speakers.name(self.speaker_id)
+
+    @speaker.setter
+    def speaker(self, name: str):
+        self.set_speaker(name, current_speakers())
+
+    @property
+    def speakers(self) -> SpeakerTable:
+        """Intern table this record's speaker_id belongs to"""
+        return self._speakers
+
+    def set_speaker(self, name: str, speakers: SpeakerTable):
+        """Set the speaker, interned into a given table"""
+        self._speakers = speakers
+        self.speaker_id = speakers.intern(name)
+
+    @property
+    def text(self) -> str:
+        return span_text(self._source, self._start, self._end)
+
+    @text.setter
+    def text(self, text: str):
+        self._source = text
+        self._start = 0
+        self._end = len(text)
+
+    def set_span(self, source, start: int, end: int):
+        """Point the record's text at source[start:end] without copying"""
+        self._source = source
+        self._start = start
+        self._end = end
+
+    def share_text(self, other: 'TextRecord'):
+        """Reference the same text span as another record"""
+        self.set_span(other._source, other._start, other._end)
+
+    def text_prefix(self, length: int) -> str:
+        """First `length` characters of the text, copying only that much"""
+        if isinstance(self._source, str):
+            return self._source[self._start:min(self._end, self._start + length)]
+        return self.text[:length]
+
+    def __getstate__(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __setstate__(self, state: dict):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{f}={getattr(self, f)!r}" for f in self.FIELDS)
+        return f"{self.__class__.__name__}({fields})"
@@ -35,7 +35,7 @@ def metrics_to_csv_row(metrics: MPNMetrics) -> dict:
     return {
         'BEAT': metrics.beat,
         'SPEAKER': metrics.speaker,
-        'TEXT': metrics.text[:200],  # Truncate long text
+        'TEXT': metrics.text_prefix(200),  # Truncate long text
         'TRAUMA_R': round(metrics.trauma_R, 2),
         'ENTROPY_H': round(metrics.entropy_H, 2),
         'BASELINE_B': round(metrics.baseline_B, 2),
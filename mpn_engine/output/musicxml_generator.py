@@ -169,7 +169,8 @@ class MusicXMLGenerator:
         if note is not None:
             lyric = SubElement(note, 'lyric', number='1')
             SubElement(lyric, 'syllabic').text = 'single'
-            text = metrics.text[:30] + '...' if len(metrics.text) > 30 else metrics.text
+            excerpt = metrics.text_prefix(31)
+            text = excerpt[:30] + '...' if len(excerpt) > 30 else excerpt
             SubElement(lyric, 'text').text = f"{metrics.speaker}: {text}"
         
         self.current_chord = new_chord
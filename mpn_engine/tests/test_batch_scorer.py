@@ -0,0 +1,62 @@
+"""
+Tests for Batch Scorer
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from text.batch_scorer import BatchScorer
+
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestParallelScoring:
+    """Parallel scoring must be identical to serial scoring"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.scorer = BatchScorer()
+        self.beats = self.scorer.parser.parse_file(str(EXAMPLES / "oedipus_sample.txt"))
+
+    def test_parallel_matches_serial(self):
+        """Chunk boundaries should carry prev_speaker across chunks"""
+        serial = self.scorer.score_beats(self.beats)
+        parallel = self.scorer.score_beats_parallel(self.beats, workers=2, chunk_size=7)
+
+        assert len(parallel) == len(serial)
+        assert parallel == serial
+        assert [m.arrhythmia_alpha for m in parallel] == [m.arrhythmia_alpha for m in serial]
+
+    def test_single_worker_falls_back_to_serial(self):
+        """workers=1 should score in-process"""
+        serial = self.scorer.score_beats(self.beats)
+        assert self.scorer.score_beats_parallel(self.beats, workers=1) == serial
+
+
+class TestPipelinedScoring:
+    """Pipelined scoring must be identical to serial scoring"""
+
+    def test_pipeline_matches_score_file(self):
+        """Overlapped stages should produce the same metrics"""
+        scorer = BatchScorer()
+        path = str(EXAMPLES / "hamlet_excerpt.txt")
+
+        serial = scorer.score_file(path)
+        pipelined = BatchScorer().score_file_pipelined(path, ner_workers=4, queue_size=4)
+
+        assert pipelined == serial
+
+    def test_pipeline_propagates_parser_errors(self):
+        """Errors in the parser stage should surface to the caller"""
+        scorer = BatchScorer()
+        with pytest.raises(FileNotFoundError):
+            scorer.score_file_pipelined(str(EXAMPLES / "missing.txt"))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,64 @@
+"""
+Tests for OCEAN-to-Dynamics mapping
+"""
+
+import pytest
+import random
+import sys
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.dynamics_mapper import DynamicsMapper, OceanProfile
+
+
+class TestDynamicsBatch:
+    """get_dynamics_batch must agree with get_dynamics row by row"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.mapper = DynamicsMapper(base_bpm=100)
+
+    def test_batch_matches_scalar(self):
+        """Random profiles plus exact threshold values"""
+        rng = random.Random(7)
+        edges = [0.0, 0.15, 0.3, 0.45, 0.5, 0.55, 0.7, 0.85, 0.95, 1.0]
+        rows = [
+            [rng.choice(edges) if rng.random() < 0.3 else rng.random() for _ in range(7)]
+            for _ in range(500)
+        ]
+        columns = list(zip(*rows))
+
+        batch = self.mapper.get_dynamics_batch(
+            *columns[:5], trauma_R=columns[5], entropy_H=columns[6]
+        )
+
+        assert len(batch) == len(rows)
+        for i, (o, c, e, a, n, r, h) in enumerate(rows):
+            expected = self.mapper.get_dynamics(OceanProfile(o, c, e, a, n), r, h)
+            assert batch[i] == expected
+
+    def test_scalar_metrics_broadcast(self):
+        """Scalar trauma/entropy should broadcast across all beats"""
+        batch = self.mapper.get_dynamics_batch(
+            [0.9, 0.1], [0.5, 0.5], [1.0, 0.0], [0.5, 0.5], [0.5, 0.5]
+        )
+        assert list(batch.dynamic_marking) == ["fff", "ppp"]
+        assert list(batch.tempo_style) == ["rubato", "strict"]
+        assert list(batch.tempo_bpm) == [110, 100]
+
+    def test_speaker_dynamics_batch(self):
+        """Registered speaker profiles should drive per-beat dynamics"""
+        loud = OceanProfile(E=1.0)
+        self.mapper.set_speaker_profile("HAMLET", loud)
+
+        batch = self.mapper.get_speaker_dynamics_batch(
+            ["HAMLET", "GHOST"], trauma_R=[0.2, 0.8], entropy_H=[0.3, 0.3]
+        )
+        assert batch[0] == self.mapper.get_dynamics(loud, 0.2, 0.3)
+        assert batch[1] == self.mapper.get_dynamics(OceanProfile(), 0.8, 0.3)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
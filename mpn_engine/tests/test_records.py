@@ -0,0 +1,120 @@
+"""
+Tests for compact beat and metrics records
+"""
+
+import pickle
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.mpn_calculus import MPNMetrics
+from core.records import SPEAKERS
+from text.dialogue_parser import DialogueBeat, DialogueParser
+
+
+PLAY = """ACT I
+SCENE I. A room.
+Enter HAMLET.
+HAMLET. To be, or not to be — that is the question.
+  Ophelia: Good my lörd,
+How does your honour?
+"""
+
+
+class TestRecords:
+    """Slotted records keep the dataclass-style interface"""
+
+    def test_records_have_no_instance_dict(self):
+        """Records should be slotted"""
+        beat = DialogueBeat("HAMLET", "Words, words, words.")
+        metrics = MPNMetrics(1, "HAMLET", "Words.", 0.1, 0.3, 1.0, 0.5, "R", "9/10")
+        assert not hasattr(beat, '__dict__')
+        assert not hasattr(metrics, '__dict__')
+
+    def test_speakers_are_interned(self):
+        """Equal speaker names should share one intern-table ID"""
+        a = DialogueBeat("GHOST", "Remember me.")
+        b = DialogueBeat("GHOST", "Adieu, adieu!")
+        assert a.speaker_id == b.speaker_id
+        assert SPEAKERS.name(a.speaker_id) == "GHOST"
+
+    def test_parsed_text_references_source(self):
+        """Parsed beats should be spans into the original buffer"""
+        beats = DialogueParser().parse_text(PLAY)
+        assert [b.to_tuple() for b in beats] == [
+            ("SCENE", "ACT I"),
+            ("SCENE", "SCENE I. A room."),
+            ("STAGE", "Enter HAMLET."),
+            ("HAMLET", "To be, or not to be — that is the question."),
+            ("Ophelia", "Good my lörd,"),
+            ("Ophelia", "How does your honour?"),
+        ]
+        assert all(b._source is PLAY for b in beats)
+
+    def test_mmap_parse_matches_text_parse(self, tmp_path):
+        """Memory-mapped parsing should yield the same beats"""
+        path = tmp_path / "play.txt"
+        path.write_text(PLAY, encoding='utf-8')
+
+        parser = DialogueParser()
+        expected = parser.parse_text(PLAY)
+        with DialogueParser().parse_file(str(path), use_mmap=True) as mapped:
+            assert mapped == expected
+
+    def test_mmap_parse_splits_like_text_mode(self, tmp_path):
+        """Lone CR and CRLF endings should split as in text mode"""
+        path = tmp_path / "play.txt"
+        path.write_bytes(PLAY.replace("\n", "\r").encode('utf-8')
+                         + "HAMLET. Ay.\r\nOPHELIA. No.".encode('utf-8'))
+
+        expected = DialogueParser().parse_file(str(path))
+        assert len(expected) == 8
+        with DialogueParser().parse_file(str(path), use_mmap=True) as mapped:
+            assert mapped == expected
+
+    def test_mmap_parse_closes_mapping(self, tmp_path):
+        """The mapping should be closed with its beats"""
+        path = tmp_path / "play.txt"
+        path.write_text(PLAY, encoding='utf-8')
+
+        with DialogueParser().parse_file(str(path), use_mmap=True) as mapped:
+            assert not mapped.closed
+        assert mapped.closed
+
+    def test_parse_keeps_speakers_out_of_shared_table(self, tmp_path):
+        """Each parse should intern into its own table"""
+        path = tmp_path / "play.txt"
+        path.write_text(PLAY.replace("HAMLET", "YORICK"), encoding='utf-8')
+
+        before = len(SPEAKERS)
+        parser = DialogueParser()
+        beats = parser.parse_text(PLAY.replace("Ophelia", "Osric"))
+        with parser.parse_file(str(path), use_mmap=True) as mapped:
+            assert [b.speaker for b in mapped][3] == "YORICK"
+        assert list(parser.iter_file(str(path)))[3].speaker == "YORICK"
+        assert beats[4].speaker == "Osric"
+        assert "Osric" not in SPEAKERS and "YORICK" not in SPEAKERS
+        assert len(SPEAKERS) == before
+
+    def test_pickle_round_trip(self):
+        """Pickled records should carry speaker names, not IDs"""
+        beat = DialogueParser().parse_text(PLAY)[3]
+        metrics = MPNMetrics(4, beat.speaker, "", 0.4, 0.3, 0.5, 0.7, "L", "6/10")
+        metrics.share_text(beat)
+
+        restored = pickle.loads(pickle.dumps(metrics))
+        assert restored == metrics
+        assert restored.text == "To be, or not to be — that is the question."
+        assert restored.to_dict()['TEXT'] == metrics.to_dict()['TEXT']
+
+    def test_text_prefix_truncates(self):
+        """to_dict should truncate long text to 200 characters"""
+        metrics = MPNMetrics(1, "A", "x" * 500, 0.1, 0.3, 1.0, 0.5, "R", "9/10")
+        assert metrics.to_dict()['TEXT'] == "x" * 200
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,74 @@
+"""
+Tests for one-pass speaker profile inference
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.instrument_mapper import InstrumentMapper
+from core.dynamics_mapper import DynamicsMapper
+from text.dialogue_parser import DialogueParser
+from text.speaker_profiler import SpeakerProfiler
+
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestSpeakerProfiler:
+    """One-pass profiles must match the per-speaker heuristics"""
+
+    def setup_method(self):
+        """Parse the Hamlet excerpt and group lines per speaker"""
+        parser = DialogueParser()
+        self.beats = parser.parse_file(str(EXAMPLES / "hamlet_excerpt.txt"))
+        self.lines = {}
+        for beat in self.beats:
+            if beat.speaker not in SpeakerProfiler.EXCLUDED_SPEAKERS:
+                self.lines.setdefault(beat.speaker, []).append(beat.text)
+
+    def test_disc_profiles_match_per_speaker_inference(self):
+        """DISC profiles should equal InstrumentMapper.infer_profile_from_text"""
+        profiler = SpeakerProfiler().feed(self.beats)
+        mapper = InstrumentMapper()
+
+        disc = profiler.disc_profiles()
+        assert set(disc) == set(self.lines)
+        for speaker, texts in self.lines.items():
+            assert disc[speaker] == mapper.infer_profile_from_text(speaker, texts)
+
+    def test_ocean_profiles_match_per_speaker_inference(self):
+        """OCEAN profiles should equal DynamicsMapper.infer_profile_from_text"""
+        profiler = SpeakerProfiler().feed(self.beats)
+        mapper = DynamicsMapper()
+
+        ocean = profiler.ocean_profiles()
+        for speaker, texts in self.lines.items():
+            assert ocean[speaker] == mapper.infer_profile_from_text(texts)
+
+    def test_keywords_and_punctuation_accumulate(self):
+        """Counters should accumulate across lines of the same speaker"""
+        profiler = SpeakerProfiler()
+        profiler.add_line("ALICE", "We must go now!")
+        profiler.add_line("ALICE", "Perhaps later?")
+        profiler.add_line("STAGE", "Exit ALICE")
+
+        assert profiler.speakers() == ["ALICE"]
+        counters = profiler.counters["ALICE"]
+        assert counters.exclamations == 1
+        assert counters.questions == 1
+        assert counters.line_count == 2
+        assert {'we', 'must', 'now', 'perhaps'} <= counters.matched
+
+        disc = profiler.disc_profiles()["ALICE"]
+        expected = InstrumentMapper().infer_profile_from_text(
+            "ALICE", ["We must go now!", "Perhaps later?"]
+        )
+        assert disc == expected
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -7,18 +7,50 @@ Main entry point for text-to-music conversion.
 
 import csv
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
-from dataclasses import asdict
+from typing import List, Dict, Optional, Tuple
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.mpn_calculus import MPNCalculus, MPNMetrics
+from core.records import speaker_scope
 from core.tonnetz import Chord, ChordQuality, Tonnetz
 from core.instrument_mapper import InstrumentMapper, DISCProfile
 from core.dynamics_mapper import DynamicsMapper, OceanProfile
 from text.dialogue_parser import DialogueParser, DialogueBeat, parse_dialogue
+from text.speaker_profiler import SpeakerProfiler
+from text.scoring_pipeline import ScoringPipeline
+
+
+def _score_chunk(calculus: MPNCalculus,
+                 start: int,
+                 total: int,
+                 lines: List[Tuple[str, str]],
+                 prev_speaker: Optional[str]) -> List[MPNMetrics]:
+    """
+    Score a contiguous run of beats (process-pool worker).
+    
+    Args:
+        calculus: Calculus engine to score with
+        start: 1-indexed beat number of the first line
+        total: Total beats in the whole work
+        lines: (speaker, text) pairs for this chunk
+        prev_speaker: Speaker of the beat preceding the chunk
+    """
+    results: List[MPNMetrics] = []
+    for i, (speaker, text) in enumerate(lines, start):
+        results.append(calculus.score_beat(
+            beat=i,
+            total_beats=total,
+            speaker=speaker,
+            text=text,
+            prev_speaker=prev_speaker
+        ))
+        prev_speaker = speaker
+    return results
 
 
 class BatchScorer:
@@ -48,6 +80,31 @@ class BatchScorer:
         beats = self.parser.parse_file(filepath)
         return self.score_beats(beats)
     
+    def score_file_pipelined(self,
+                             filepath: str,
+                             ner_workers: int = 8,
+                             queue_size: int = 256) -> List[MPNMetrics]:
+        """
+        Score a file with parsing, NER requests and scoring overlapped.
+        
+        Produces the same metrics as score_file(); see ScoringPipeline.
+        
+        Args:
+            filepath: Path to the text file
+            ner_workers: Threads issuing NER HTTP requests
+            queue_size: Parsed beats buffered ahead of the scorer
+            
+        Returns:
+            List of MPNMetrics for each beat
+        """
+        pipeline = ScoringPipeline(
+            self.calculus,
+            self.parser,
+            ner_workers=ner_workers,
+            queue_size=queue_size
+        )
+        return pipeline.score_file(filepath)
+    
     def score_text(self, text: str) -> List[MPNMetrics]:
         """
         Score raw text.
@@ -76,18 +133,91 @@ class BatchScorer:
         prev_speaker: Optional[str] = None
         
         for i, beat in enumerate(beats, 1):
-            metrics = self.calculus.score_beat(
-                beat=i,
-                total_beats=total,
-                speaker=beat.speaker,
-                text=beat.text,
-                prev_speaker=prev_speaker
-            )
+            with speaker_scope(beat.speakers):  # Intern alongside the beat
+                metrics = self.calculus.score_beat(
+                    beat=i,
+                    total_beats=total,
+                    speaker=beat.speaker,
+                    text=beat.text,
+                    prev_speaker=prev_speaker
+                )
+            metrics.share_text(beat)  # Drop the copy, reference the source span
             results.append(metrics)
             prev_speaker = beat.speaker
         
         return results
     
+    def score_beats_parallel(self,
+                             beats: List[DialogueBeat],
+                             workers: Optional[int] = None,
+                             chunk_size: Optional[int] = None) -> List[MPNMetrics]:
+        """
+        Score a list of beats on a process pool.
+        
+        Each beat depends only on its index, the total beat count, its
+        text and the previous speaker, so the list is split into
+        contiguous chunks that carry their boundary prev_speaker. The
+        result is identical to score_beats().
+        
+        Args:
+            beats: List of parsed dialogue beats
+            workers: Number of worker processes (default: CPU count)
+            chunk_size: Beats per chunk (default: ~4 chunks per worker)
+            
+        Returns:
+            List of MPNMetrics for each beat, in order
+        """
+        total = len(beats)
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or total < 2:
+            return self.score_beats(beats)
+        
+        if chunk_size is None:
+            chunk_size = max(1, -(-total // (workers * 4)))
+        
+        results: List[MPNMetrics] = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for start in range(0, total, chunk_size):
+                chunk = beats[start:start + chunk_size]
+                prev_speaker = beats[start - 1].speaker if start > 0 else None
+                futures.append(pool.submit(
+                    _score_chunk,
+                    self.calculus,
+                    start + 1,
+                    total,
+                    [b.to_tuple() for b in chunk],
+                    prev_speaker
+                ))
+            
+            offset = 0
+            for future in futures:
+                with speaker_scope(beats[offset].speakers):
+                    chunk = future.result()
+                for metrics in chunk:
+                    metrics.share_text(beats[offset])
+                    results.append(metrics)
+                    offset += 1
+        
+        return results
+    
+    def infer_speaker_profiles(self, beats: List[DialogueBeat]) -> SpeakerProfiler:
+        """
+        Infer DISC and OCEAN profiles for all speakers in one pass.
+        
+        Profiles are registered on the scorer's instrument and dynamics
+        mappers, ready for get_ensemble() and get_dynamics().
+        
+        Args:
+            beats: List of parsed dialogue beats
+            
+        Returns:
+            The populated SpeakerProfiler
+        """
+        profiler = SpeakerProfiler().feed(beats)
+        profiler.apply(self.instrument_mapper, self.dynamics_mapper)
+        return profiler
+    
     def export_csv(self, metrics: List[MPNMetrics], output_path: str):
         """
         Export scored metrics to CSV file.
@@ -227,13 +357,23 @@ def main():
                         default='csv', help='Output format')
     parser.add_argument('--stats', action='store_true', 
                         help='Print statistics')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='Score on N worker processes')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Overlap parsing, NER requests and scoring')
     
     args = parser.parse_args()
     
     # Score the file
     scorer = BatchScorer()
     print(f"Scoring {args.input}...")
-    metrics = scorer.score_file(args.input)
+    if args.pipeline:
+        metrics = scorer.score_file_pipelined(args.input)
+    elif args.workers > 1:
+        beats = scorer.parser.parse_file(args.input)
+        metrics = scorer.score_beats_parallel(beats, workers=args.workers)
+    else:
+        metrics = scorer.score_file(args.input)
     
     # Determine output path
     input_path = Path(args.input)
@@ -6,22 +6,100 @@ Supports multiple formats including Project Gutenberg plays.
 """
 
 import re
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
+import mmap
+from typing import Iterator, List, Tuple, Optional
 from pathlib import Path
 
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-@dataclass
-class DialogueBeat:
-    """A single unit of dialogue or stage direction"""
-    speaker: str
-    text: str
-    beat_type: str = "dialogue"  # "dialogue", "stage", "scene"
+from core.records import SpeakerTable, TextRecord, speaker_scope
+
+# Line endings the text path's universal newlines translate to '\n'
+_NEWLINE = re.compile(r'\r\n?|\n')
+_NEWLINE_BYTES = re.compile(rb'\r\n?|\n')
+
+
+class DialogueBeat(TextRecord):
+    """
+    A single unit of dialogue or stage direction.
+    
+    Slotted record: the speaker is stored as an interned ID and the
+    text as a span into the parsed source (see core.records).
+    """
+    
+    __slots__ = ('beat_type',)
+    
+    FIELDS = ('speaker', 'text', 'beat_type')
+    
+    def __init__(self, speaker: str, text: str, beat_type: str = "dialogue"):
+        self.speaker = speaker
+        self.text = text
+        self.beat_type = beat_type  # "dialogue", "stage", "scene"
+    
+    @classmethod
+    def from_span(cls,
+                  speaker: str,
+                  source,
+                  start: int,
+                  end: int,
+                  beat_type: str = "dialogue",
+                  speakers: Optional[SpeakerTable] = None) -> 'DialogueBeat':
+        """
+        Create a beat whose text is source[start:end], without copying.
+        
+        The speaker is interned into `speakers` when given.
+        """
+        beat = cls.__new__(cls)
+        if speakers is None:
+            beat.speaker = speaker
+        else:
+            beat.set_speaker(speaker, speakers)
+        beat.set_span(source, start, end)
+        beat.beat_type = beat_type
+        return beat
     
     def to_tuple(self) -> Tuple[str, str]:
         return (self.speaker, self.text)
 
 
+class MappedBeats(list):
+    """
+    Beats whose texts are byte spans into a memory-mapped file.
+    
+    Owns the mapping: close() it, or use the list as a context manager,
+    once the beats (and any records sharing their text) are done with.
+    Beat texts can no longer be read after that.
+    """
+    
+    def __init__(self, beats=(), mapping: Optional[mmap.mmap] = None):
+        super().__init__(beats)
+        self.mapping = mapping
+    
+    @property
+    def closed(self) -> bool:
+        return self.mapping is None or self.mapping.closed
+    
+    def close(self):
+        if self.mapping is not None:
+            self.mapping.close()
+    
+    def __enter__(self) -> 'MappedBeats':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _iter_lines(buffer, newline: re.Pattern) -> Iterator[Tuple[int, object]]:
+    """Yield (offset, line) pairs without splitting the whole buffer at once"""
+    start = 0
+    for match in newline.finditer(buffer):
+        yield start, buffer[start:match.start()]
+        start = match.end()
+    yield start, buffer[start:]
+
+
 class DialogueParser:
     """
     Parses play texts into structured dialogue beats.
@@ -61,16 +139,22 @@ class DialogueParser:
     def __init__(self):
         self.current_speaker = "NARRATOR"
     
-    def parse_file(self, filepath: str) -> List[DialogueBeat]:
+    def parse_file(self, filepath: str, use_mmap: bool = False) -> List[DialogueBeat]:
         """
         Parse a text file into dialogue beats.
         
         Args:
             filepath: Path to the text file
+            use_mmap: Memory-map the file and reference beat text as byte
+                spans into the mapping instead of reading it into memory
             
         Returns:
-            List of DialogueBeat objects
+            List of DialogueBeat objects; with use_mmap, a MappedBeats
+            that must be closed (or used in a with block)
         """
+        if use_mmap:
+            return self._parse_mmap(filepath)
+        
         with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
             text = f.read()
         return self.parse_text(text)
@@ -79,75 +163,153 @@ class DialogueParser:
         """
         Parse raw text into dialogue beats.
         
+        Beat texts are spans into `text`; no per-beat copies are kept.
+        Speakers are interned into a table private to this parse.
+        
         Args:
             text: The complete play/script text
             
         Returns:
             List of DialogueBeat objects
         """
-        lines = text.split('\n')
         beats: List[DialogueBeat] = []
+        speakers = SpeakerTable()
         
-        for line in lines:
-            line = line.strip()
+        for line_start, raw in _iter_lines(text, _NEWLINE):
+            line = raw.strip()
             if not line:
                 continue
             
-            beat = self._parse_line(line)
-            if beat:
-                beats.append(beat)
+            parsed = self._classify_line(line)
+            if parsed:
+                speaker, start, end, beat_type = parsed
+                offset = line_start + len(raw) - len(raw.lstrip())
+                beats.append(DialogueBeat.from_span(
+                    speaker, text, offset + start, offset + end, beat_type, speakers
+                ))
         
         return beats
     
-    def _parse_line(self, line: str) -> Optional[DialogueBeat]:
+    def iter_file(self, filepath: str) -> Iterator[DialogueBeat]:
+        """
+        Lazily parse a text file, yielding beats as lines are read.
+        
+        Memory stays proportional to one line, which suits streaming
+        consumers such as the scoring pipeline.
+        
+        Args:
+            filepath: Path to the text file
+            
+        Yields:
+            DialogueBeat objects in file order
+        """
+        speakers = SpeakerTable()
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            for raw in f:
+                line = raw.strip()
+                if not line:
+                    continue
+                
+                parsed = self._classify_line(line)
+                if parsed:
+                    speaker, start, end, beat_type = parsed
+                    yield DialogueBeat.from_span(speaker, line, start, end, beat_type, speakers)
+    
+    def _parse_mmap(self, filepath: str) -> MappedBeats:
+        """Parse a memory-mapped UTF-8 file into byte-span beats"""
+        with open(filepath, 'rb') as f:
+            if Path(filepath).stat().st_size == 0:
+                return MappedBeats()
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        beats = MappedBeats(mapping=mapped)
+        speakers = SpeakerTable()
+        
+        for line_start, raw_bytes in _iter_lines(mapped, _NEWLINE_BYTES):
+            try:
+                raw = raw_bytes.decode('utf-8')
+            except UnicodeDecodeError:
+                # Undecodable line: keep a cleaned copy rather than a span
+                line = raw_bytes.decode('utf-8', errors='ignore').strip()
+                beat = self._parse_line(line, speakers)
+                if beat:
+                    beats.append(beat)
+                continue
+            
+            line = raw.strip()
+            if not line:
+                continue
+            
+            parsed = self._classify_line(line)
+            if parsed:
+                speaker, start, end, beat_type = parsed
+                lead = len(raw) - len(raw.lstrip())
+                if raw.isascii():
+                    offset = line_start + lead
+                else:
+                    # Convert character offsets to byte offsets
+                    offset = line_start + len(raw[:lead].encode('utf-8'))
+                    end = len(line[:end].encode('utf-8'))
+                    start = len(line[:start].encode('utf-8'))
+                beats.append(DialogueBeat.from_span(
+                    speaker, mapped, offset + start, offset + end, beat_type, speakers
+                ))
+        
+        return beats
+    
+    def _parse_line(self,
+                    line: str,
+                    speakers: Optional[SpeakerTable] = None) -> Optional[DialogueBeat]:
         """Parse a single line into a DialogueBeat"""
+        parsed = self._classify_line(line)
+        if parsed is None:
+            return None
+        speaker, start, end, beat_type = parsed
+        return DialogueBeat.from_span(speaker, line[start:end], 0, end - start, beat_type, speakers)
+    
+    def _classify_line(self, line: str) -> Optional[Tuple[str, int, int, str]]:
+        """
+        Classify a single stripped line.
+        
+        Returns:
+            (speaker, start, end, beat_type) where the beat text is
+            line[start:end], or None if the line yields no beat
+        """
         
         # Check for scene markers
         for pattern in self.SCENE_PATTERNS:
             if pattern.match(line):
-                return DialogueBeat(
-                    speaker="SCENE",
-                    text=line,
-                    beat_type="scene"
-                )
+                return ("SCENE", 0, len(line), "scene")
         
         # Check for stage directions
         for pattern in self.STAGE_PATTERNS:
             match = pattern.match(line)
             if match:
-                stage_text = match.group(1) if match.groups() else line
-                return DialogueBeat(
-                    speaker="STAGE",
-                    text=stage_text,
-                    beat_type="stage"
-                )
+                start, end = match.span(1) if match.groups() else (0, len(line))
+                return ("STAGE", start, end, "stage")
         
         # Check for speaker + dialogue
         for pattern in self.SPEAKER_PATTERNS:
             match = pattern.match(line)
             if match:
                 speaker = match.group(1).strip()
-                dialogue = match.group(2).strip() if len(match.groups()) > 1 else ""
                 
                 # Update current speaker
                 self.current_speaker = speaker
                 
-                if dialogue:
-                    return DialogueBeat(
-                        speaker=speaker,
-                        text=dialogue,
-                        beat_type="dialogue"
-                    )
+                if len(match.groups()) > 1:
+                    start, end = match.span(2)
+                    dialogue = match.group(2)
+                    start += len(dialogue) - len(dialogue.lstrip())
+                    end -= len(dialogue) - len(dialogue.rstrip())
+                    if start < end:
+                        return (speaker, start, end, "dialogue")
                 # Just speaker name, no dialogue on this line
                 return None
         
         # Continuation of previous speaker's dialogue
         if line and not line.startswith(('#', '//', ';')):  # Skip comments
-            return DialogueBeat(
-                speaker=self.current_speaker,
-                text=line,
-                beat_type="dialogue"
-            )
+            return (self.current_speaker, 0, len(line), "dialogue")
         
         return None
     
@@ -185,28 +347,29 @@ class ConversationParser:
         beats = []
         current_speaker = "SPEAKER1"
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            match = self.SPEAKER_PATTERN.match(line)
-            if match:
-                speaker = match.group(1).strip()
-                dialogue = match.group(2).strip()
-                current_speaker = speaker
-                beats.append(DialogueBeat(
-                    speaker=speaker,
-                    text=dialogue,
-                    beat_type="dialogue"
-                ))
-            elif line:
-                # Continuation
-                beats.append(DialogueBeat(
-                    speaker=current_speaker,
-                    text=line,
-                    beat_type="dialogue"
-                ))
+        with speaker_scope():  # Speaker table private to this transcript
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                
+                match = self.SPEAKER_PATTERN.match(line)
+                if match:
+                    speaker = match.group(1).strip()
+                    dialogue = match.group(2).strip()
+                    current_speaker = speaker
+                    beats.append(DialogueBeat(
+                        speaker=speaker,
+                        text=dialogue,
+                        beat_type="dialogue"
+                    ))
+                elif line:
+                    # Continuation
+                    beats.append(DialogueBeat(
+                        speaker=current_speaker,
+                        text=line,
+                        beat_type="dialogue"
+                    ))
         
         return beats
 
@@ -0,0 +1,204 @@
+"""
+Scoring Pipeline
+
+Overlaps file parsing, NER requests and regex scoring for a single
+script. Stages run concurrently and are connected by bounded queues:
+
+    parser thread ──queue──▶ NER I/O pool ──in-order window──▶ scorer (caller thread)
+
+Memory for in-flight work is bounded by `queue_size` parsed beats plus
+`max_in_flight` pending NER requests; a full queue blocks the stage
+upstream of it. End-to-end time approaches the slowest stage rather
+than the sum of all three.
+
+Beat scores depend on the total beat count, which is only known once
+parsing finishes, so the scorer computes the position-independent part
+of each beat (keyword/NER trauma, entropy, arrhythmia) as it streams and
+finishes the narrative-arc terms in a final cheap pass. Results are
+identical to BatchScorer.score_file().
+"""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.mpn_calculus import MPNCalculus, MPNMetrics
+from core.records import speaker_scope
+from text.dialogue_parser import DialogueParser, DialogueBeat
+
+
+# Marks the end of the parser stream
+_DONE = object()
+
+
+class ScoringPipeline:
+    """
+    Producer/consumer pipeline for scoring one script.
+
+    Usage:
+        pipeline = ScoringPipeline(MPNCalculus(), DialogueParser())
+        metrics = pipeline.score_file("hamlet.txt")
+    """
+
+    def __init__(self,
+                 calculus: MPNCalculus,
+                 parser: DialogueParser,
+                 ner_workers: int = 8,
+                 queue_size: int = 256,
+                 max_in_flight: int = 64):
+        """
+        Initialize the pipeline.
+
+        Args:
+            calculus: Calculus engine used for scoring and NER requests
+            parser: Parser used to read the script
+            ner_workers: Threads issuing NER HTTP requests
+            queue_size: Parsed beats buffered between parser and scorer
+            max_in_flight: Outstanding NER requests ahead of the scorer
+        """
+        self.calculus = calculus
+        self.parser = parser
+        self.ner_workers = ner_workers
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight
+
+    def score_file(self, filepath: str) -> List[MPNMetrics]:
+        """
+        Score a script file with parsing, NER and scoring overlapped.
+
+        Args:
+            filepath: Path to the text file
+
+        Returns:
+            List of MPNMetrics for each beat
+        """
+        return self.score_stream(self.parser.iter_file(filepath))
+
+    def score_stream(self, beats: Iterable[DialogueBeat]) -> List[MPNMetrics]:
+        """
+        Score a lazily produced beat stream.
+
+        The iterable is consumed on a dedicated parser thread.
+
+        Args:
+            beats: Beats in script order (e.g. DialogueParser.iter_file())
+
+        Returns:
+            List of MPNMetrics for each beat
+        """
+        parsed: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        producer = threading.Thread(
+            target=self._produce, args=(beats, parsed, stop),
+            name="mpn-parser", daemon=True
+        )
+        producer.start()
+
+        try:
+            partials = self._consume(parsed)
+        finally:
+            stop.set()
+            producer.join()
+
+        total = len(partials)
+        return [
+            self._finish(i, total, beat, trauma_score, entropy_H, alpha)
+            for i, (beat, trauma_score, entropy_H, alpha) in enumerate(partials, 1)
+        ]
+
+    def _produce(self, beats: Iterable[DialogueBeat], parsed: queue.Queue, stop: threading.Event):
+        """Parser stage: push beats into the bounded queue"""
+        try:
+            for beat in beats:
+                if not self._put(parsed, beat, stop):
+                    return
+            self._put(parsed, _DONE, stop)
+        except BaseException as e:
+            self._put(parsed, e, stop)
+
+    @staticmethod
+    def _put(parsed: queue.Queue, item, stop: threading.Event) -> bool:
+        """Blocking put that gives up once the consumer has stopped"""
+        while not stop.is_set():
+            try:
+                parsed.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _consume(self, parsed: queue.Queue) -> List[Tuple[DialogueBeat, float, float, float]]:
+        """NER + scoring stages: prefetch entities ahead, score in order"""
+        calc = self.calculus
+        partials: List[Tuple[DialogueBeat, float, float, float]] = []
+        in_flight: deque = deque()
+        prev_speaker: Optional[str] = None
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.ner_workers,
+                                thread_name_prefix="mpn-ner") as pool:
+            while not exhausted or in_flight:
+                # Keep the NER window full
+                while not exhausted and len(in_flight) < self.max_in_flight:
+                    item = parsed.get() if not in_flight else self._get_nowait(parsed)
+                    if item is None:
+                        break
+                    if item is _DONE:
+                        exhausted = True
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    text = item.text
+                    in_flight.append((item, text, pool.submit(calc.ner_client.analyze_text, text)))
+
+                if not in_flight:
+                    continue
+
+                # Score the oldest beat once its entities arrive
+                beat, text, future = in_flight.popleft()
+                speaker = beat.speaker
+                partials.append((
+                    beat,
+                    calc.calculate_trauma_score(text, future.result()),
+                    calc.calculate_entropy_H(text),
+                    calc.calculate_arrhythmia_alpha(speaker, prev_speaker),
+                ))
+                prev_speaker = speaker
+
+        return partials
+
+    @staticmethod
+    def _get_nowait(parsed: queue.Queue):
+        """Non-blocking get; None when the parser has nothing ready"""
+        try:
+            return parsed.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _finish(self,
+                i: int,
+                total: int,
+                beat: DialogueBeat,
+                trauma_score: float,
+                entropy_H: float,
+                alpha: float) -> MPNMetrics:
+        """Apply the position-dependent terms once the total is known"""
+        with speaker_scope(beat.speakers):  # Intern alongside the beat
+            metrics = self.calculus.build_metrics(
+                beat=i,
+                total_beats=total,
+                speaker=beat.speaker,
+                text="",
+                trauma_score=trauma_score,
+                entropy_H=entropy_H,
+                arrhythmia_alpha=alpha
+            )
+        metrics.share_text(beat)
+        return metrics
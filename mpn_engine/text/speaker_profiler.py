@@ -0,0 +1,125 @@
+"""
+Speaker Profiler
+
+Infers DISC and OCEAN profiles for every speaker of a play in a
+single pass over the beat stream.
+
+The per-speaker heuristics in InstrumentMapper and DynamicsMapper join
+all of a speaker's lines into one string and rescan it for every
+keyword. This profiler keeps running counters per speaker instead and
+feeds them to the same scoring rules, so results are identical.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Set, Tuple
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.instrument_mapper import InstrumentMapper, DISCProfile
+from core.dynamics_mapper import DynamicsMapper, OceanProfile
+from text.dialogue_parser import DialogueBeat
+
+
+# Keywords tracked for both DISC and OCEAN inference
+PROFILE_KEYWORDS = InstrumentMapper.KEYWORDS | DynamicsMapper.KEYWORDS
+
+
+@dataclass
+class SpeakerCounters:
+    """Running text features for one speaker"""
+    matched: Set[str] = field(default_factory=set)
+    exclamations: int = 0
+    questions: int = 0
+    word_count: int = 0
+    line_count: int = 0
+
+
+class SpeakerProfiler:
+    """
+    One-pass DISC/OCEAN profile inference for all speakers.
+
+    Usage:
+        profiler = SpeakerProfiler()
+        profiler.feed(beats)
+        disc = profiler.disc_profiles()
+        ocean = profiler.ocean_profiles()
+    """
+
+    # Pseudo-speakers that never receive a profile
+    EXCLUDED_SPEAKERS = ('STAGE', 'SCENE', 'NARRATOR')
+
+    def __init__(self, exclude: Tuple[str, ...] = EXCLUDED_SPEAKERS):
+        """
+        Initialize an empty profiler.
+
+        Args:
+            exclude: Speaker names to skip (stage directions, scene markers)
+        """
+        self.exclude = frozenset(exclude)
+        self.counters: Dict[str, SpeakerCounters] = {}
+
+    def add_line(self, speaker: str, text: str):
+        """Accumulate one line of dialogue for a speaker"""
+        if speaker in self.exclude:
+            return
+
+        counters = self.counters.get(speaker)
+        if counters is None:
+            counters = self.counters[speaker] = SpeakerCounters()
+
+        text_lower = text.lower()
+        counters.exclamations += text_lower.count('!')
+        counters.questions += text_lower.count('?')
+        counters.word_count += len(text_lower.split())
+        counters.line_count += 1
+
+        # Keyword presence is sticky: once seen, stop searching for it
+        if len(counters.matched) < len(PROFILE_KEYWORDS):
+            for w in PROFILE_KEYWORDS - counters.matched:
+                if w in text_lower:
+                    counters.matched.add(w)
+
+    def feed(self, beats: Iterable[DialogueBeat]) -> 'SpeakerProfiler':
+        """Accumulate a stream of dialogue beats"""
+        for beat in beats:
+            self.add_line(beat.speaker, beat.text)
+        return self
+
+    def speakers(self):
+        """Speakers seen so far, sorted by name"""
+        return sorted(self.counters)
+
+    def disc_profiles(self) -> Dict[str, DISCProfile]:
+        """DISC profile for every speaker seen"""
+        return {
+            speaker: InstrumentMapper.profile_from_counts(
+                matched=c.matched,
+                exclamations=c.exclamations,
+                questions=c.questions,
+                word_count=c.word_count,
+                line_count=c.line_count
+            )
+            for speaker, c in self.counters.items()
+        }
+
+    def ocean_profiles(self) -> Dict[str, OceanProfile]:
+        """OCEAN profile for every speaker seen"""
+        return {
+            speaker: DynamicsMapper.profile_from_counts(
+                matched=c.matched,
+                exclamations=c.exclamations,
+                questions=c.questions
+            )
+            for speaker, c in self.counters.items()
+        }
+
+    def apply(self,
+              instrument_mapper: InstrumentMapper,
+              dynamics_mapper: DynamicsMapper):
+        """Register all inferred profiles on the given mappers"""
+        for speaker, profile in self.disc_profiles().items():
+            instrument_mapper.set_speaker_profile(speaker, profile)
+        for speaker, profile in self.ocean_profiles().items():
+            dynamics_mapper.set_speaker_profile(speaker, profile)